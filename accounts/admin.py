@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import User, EmailOTP
+from .models import User, EmailOTP, EmailSuppression, AccountDeletionJob
 # Register your models here.
 
 admin.site.register(User)
-admin.site.register(EmailOTP)
\ No newline at end of file
+admin.site.register(EmailOTP)
+admin.site.register(EmailSuppression)
+admin.site.register(AccountDeletionJob)
@@ -0,0 +1,147 @@
+"""
+JWT authentication with a cached principal.
+
+simplejwt's ``JWTAuthentication`` loads the full ``User`` row for every
+request, although views and permission classes only read a handful of fields
+(``active_role``, ``roles``, ``profile_completed``…). ``CachedJWTAuthentication``
+resolves those fields from a two-level cache instead:
+
+* L1 — a small per-process LRU: ``user id -> (version, fields)``,
+* L2 — the shared cache (Redis): ``principal:<id>`` holding the fields and the
+  version they were read at,
+
+both validated against a per-user version stamp (``principal:ver:<id>``) kept in
+the shared cache. Any save or delete of the user or their exhibitor profile
+bumps the stamp (see ``accounts/signals.py``), so a role switch is visible on
+the very next request in every worker. On a hit no query is made; the
+principal is a real ``User`` instance built with ``from_db`` from the cached
+fields, so FK assignment and ``save()`` work, and any other field is loaded
+lazily if a view needs it.
+"""
+import copy
+import logging
+import threading
+
+from cachetools import LRUCache
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from redis.exceptions import RedisError
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_FIELDS = (
+    "id", "username", "email", "roles", "active_role", "profile_completed",
+    "is_active", "is_staff", "is_superuser",
+)
+PRINCIPAL_L1_SIZE = 4096
+PRINCIPAL_L2_TIMEOUT = 3600  # seconds; the version stamp guards freshness
+
+_l1 = LRUCache(maxsize=PRINCIPAL_L1_SIZE)
+_l1_lock = threading.Lock()
+
+
+def _version_key(user_id):
+    return f"principal:ver:{user_id}"
+
+
+def _principal_key(user_id):
+    return f"principal:{user_id}"
+
+
+def invalidate_principal(user_id):
+    """Bump ``user_id``'s version stamp so every cached copy is ignored."""
+    with _l1_lock:
+        _l1.pop(str(user_id), None)
+    key = _version_key(user_id)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+        cache.delete(_principal_key(user_id))
+    except (RedisError, ValueError) as exc:
+        logger.warning("Could not invalidate principal %s: %s", user_id, exc)
+
+
+def clear_principal_cache():
+    """Drop this process's L1 (tests, management commands)."""
+    with _l1_lock:
+        _l1.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def _build(self, fields):
+        # from_db expects partial values in concrete field order
+        names = [
+            f.attname for f in self.user_model._meta.concrete_fields
+            if f.attname in fields
+        ]
+        # Copies: views mutate e.g. ``user.roles`` in place, which must not leak
+        # into the shared L1 entry.
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model), names, [copy.copy(fields[name]) for name in names],
+        )
+
+    def _load_fields(self, user_id):
+        try:
+            user = self.user_model.objects.only(*PRINCIPAL_FIELDS).get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+        return {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+
+    def _resolve(self, user_id):
+        key = str(user_id)
+        try:
+            version = cache.get(_version_key(user_id), 0)
+        except RedisError as exc:
+            logger.warning("Principal cache unavailable (%s); reading the database.", exc)
+            return self._load_fields(user_id)
+
+        with _l1_lock:
+            cached = _l1.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        try:
+            entry = cache.get(_principal_key(user_id))
+        except RedisError:
+            entry = None
+        if entry is not None and entry["v"] == version:
+            fields = entry["fields"]
+        else:
+            fields = self._load_fields(user_id)
+            try:
+                cache.set(
+                    _principal_key(user_id),
+                    {"v": version, "fields": fields},
+                    timeout=PRINCIPAL_L2_TIMEOUT,
+                )
+            except RedisError:
+                pass
+
+        with _l1_lock:
+            _l1[key] = (version, fields)
+        return fields
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which is deliberately not cached.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = self._build(self._resolve(user_id))
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
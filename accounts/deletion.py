@@ -0,0 +1,171 @@
+"""
+Background account deletion.
+
+``user.delete()`` makes Django's collector load every dependent row of an
+exhibitor (applications, properties and their images, registrations,
+profile, tokens) into memory inside one request, and leaves their uploaded
+files on disk. Instead, ``DeleteAccountView``:
+
+1. disables the account (``is_active = False``) so its tokens stop working
+   on the next request,
+2. records an ``AccountDeletionJob`` and hands it to ``delete_account_task``,
+3. returns 202 with the job id.
+
+The task deletes dependents in primary-key batches of DELETION_BATCH_SIZE,
+one short transaction each, removes each batch's storage files once it has
+committed, and records progress on the job. Re-running a job simply carries
+on where it stopped. The user row itself goes last, when nothing is left to
+cascade.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .authentication import invalidate_principal
+from .models import AccountDeletionJob, User
+
+logger = logging.getLogger(__name__)
+
+DELETION_BATCH_SIZE = 500
+FILE_DELETE_WORKERS = 8
+
+# (model label, lookup to the user id, fields holding storage files), children first
+DEPENDENTS = (
+    ("exhibitions.PropertyImage", "property__exhibitor_id", ("image",)),
+    ("exhibitions.Property", "exhibitor_id", ()),
+    ("exhibitions.ExhibitorApplication", "user_id", ("payment_screenshot", "badge")),
+    ("exhibitions.VisitorRegistration", "user_id", ("qr_pass_hash",)),
+    ("exhibitions.ExhibitorProfile", "user_id", ()),
+    ("token_blacklist.OutstandingToken", "user_id", ()),
+)
+
+
+def start_account_deletion(user):
+    """Disable ``user`` and queue the deletion of their account. Returns the job."""
+    from .tasks import delete_account_task
+
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        job = AccountDeletionJob.objects.create(user_id=user.pk)
+        # update() sends no signals, so invalidate the cached principal here
+        transaction.on_commit(lambda: invalidate_principal(user.pk))
+        transaction.on_commit(lambda: delete_account_task.delay(str(job.pk)))
+    return job
+
+
+def _storage_paths(field, value):
+    if not value:
+        return []
+    if field == "qr_pass_hash":
+        from exhibitions.utils.qr_passes import PASS_FORMATS, pass_path
+
+        return [pass_path(value, fmt) for fmt in PASS_FORMATS]
+    return [value]
+
+
+def delete_files(paths):
+    """Delete ``paths`` from the default storage concurrently. Returns the count removed."""
+    def delete(path):
+        try:
+            default_storage.delete(path)
+            return 1
+        except Exception:
+            logger.warning("Could not delete %s from storage", path, exc_info=True)
+            return 0
+
+    if not paths:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(FILE_DELETE_WORKERS, len(paths))) as pool:
+        return sum(pool.map(delete, paths))
+
+
+def _delete_batch(model, lookup, file_fields, user_id, batch_size):
+    """Delete one batch of ``model`` rows owned by ``user_id``. Returns (rows, file paths)."""
+    with transaction.atomic():
+        rows = list(
+            model.objects.filter(**{lookup: user_id})
+            .order_by("pk")
+            .values_list("pk", *file_fields)[:batch_size]
+        )
+        if not rows:
+            return 0, []
+        model.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+    paths = []
+    for row in rows:
+        for field, value in zip(file_fields, row[1:]):
+            paths.extend(_storage_paths(field, value))
+    return len(rows), paths
+
+
+def _touched_exhibitions(user_id):
+    """Exhibitions whose analytics rollups include this user's rows."""
+    from exhibitions.models import ExhibitorApplication, VisitorRegistration
+
+    ids = set()
+    for model in (VisitorRegistration, ExhibitorApplication):
+        ids.update(model.objects.filter(user_id=user_id).values_list("exhibition_id", flat=True))
+    return ids
+
+
+def run_account_deletion(job_id, batch_size=DELETION_BATCH_SIZE):
+    job = AccountDeletionJob.objects.get(pk=job_id)
+    if job.status == "DONE":
+        return job
+    AccountDeletionJob.objects.filter(pk=job.pk).update(status="RUNNING", error="")
+
+    progress = dict(job.progress)
+    files_deleted = job.files_deleted
+    # Recorded before anything is deleted: a re-run after a crash could no
+    # longer find the exhibitions of the rows an earlier attempt removed.
+    if "touched_exhibitions" not in progress:
+        progress["touched_exhibitions"] = sorted(_touched_exhibitions(job.user_id))
+        AccountDeletionJob.objects.filter(pk=job.pk).update(progress=progress)
+    touched = progress["touched_exhibitions"]
+    for label, lookup, file_fields in DEPENDENTS:
+        try:
+            model = apps.get_model(label)
+        except LookupError:  # optional app (token_blacklist) not installed
+            continue
+        while True:
+            deleted, paths = _delete_batch(model, lookup, file_fields, job.user_id, batch_size)
+            if not deleted:
+                break
+            files_deleted += delete_files(paths)
+            progress[label] = progress.get(label, 0) + deleted
+            AccountDeletionJob.objects.filter(pk=job.pk).update(
+                progress=progress, files_deleted=files_deleted,
+            )
+
+    # Bulk deletes send no per-row signals: update the dashboard rollups and
+    # the public exhibitor lists once for the whole account.
+    from exhibitions.signals import exhibitors_changed
+    from exhibitions.utils import stats
+
+    if progress.get("exhibitions.VisitorRegistration"):
+        stats.visitor_registrations_removed([job.user_id])
+    if progress.get("exhibitions.ExhibitorApplication"):
+        stats.exhibitor_approvals_removed([job.user_id])
+        for exhibition_id in touched:
+            exhibitors_changed(exhibition_id)
+
+    # Deleted rows leave nothing for the incremental analytics job to see.
+    # Marked after the deletes, so a rollup run in between cannot clear it.
+    from exhibitions.utils.analytics import mark_dirty
+
+    mark_dirty(touched)
+
+    # Only the user's own row (and small M2M / admin log rows) is left to collect.
+    deleted, _ = User.objects.filter(pk=job.user_id).delete()
+    progress["accounts.User"] = progress.get("accounts.User", 0) + min(deleted, 1)
+    AccountDeletionJob.objects.filter(pk=job.pk).update(
+        status="DONE", progress=progress, files_deleted=files_deleted,
+        finished_at=timezone.now(),
+    )
+    logger.info("Deleted account %s: %s, %d file(s)", job.user_id, progress, files_deleted)
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,154 @@
+"""
+Verification of Google Sign-In ID tokens.
+
+``id_token.verify_oauth2_token(token, google_requests.Request(), ...)`` opens a
+new HTTP session and downloads Google's signing certificates on every call,
+so each login used to wait on an outbound HTTPS round trip inside a gunicorn
+thread. ``GoogleTokenVerifier`` instead keeps, per process:
+
+* one pooled ``requests.Session`` (keep-alive to googleapis.com),
+* the certificate set, cached for as long as the endpoint's
+  ``Cache-Control: max-age`` allows (minus ``Age``).
+
+Tokens are verified locally against the cached certificates; the endpoint is
+only contacted when the cache has expired or a token names a key id we have
+not seen (Google rotated its keys), and only one thread fetches at a time.
+
+The certificate URL comes from GOOGLE_CERTS_URL so tests and local setups can
+point it at a stand-in endpoint.
+"""
+import logging
+import os
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+DEFAULT_MAX_AGE = 300       # seconds, when the endpoint sends no max-age
+MIN_REFRESH_INTERVAL = 60   # seconds between forced fetches for unknown key ids
+CLOCK_SKEW = 10             # seconds tolerated on iat/exp
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertsUnavailable(Exception):
+    """Google's certificate endpoint could not be reached or returned garbage."""
+
+
+class GoogleTokenError(ValueError):
+    """The token is not a valid Google ID token for this app."""
+
+
+def cache_lifetime(headers):
+    """Seconds a certificate response may be reused, from its caching headers."""
+    match = _MAX_AGE_RE.search(headers.get("Cache-Control", ""))
+    if not match:
+        return DEFAULT_MAX_AGE
+    try:
+        age = int(headers.get("Age", 0))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+class GoogleTokenVerifier:
+    def __init__(self, certs_url, audience, timeout=5, clock=time.monotonic):
+        self.certs_url = certs_url
+        self.audience = audience
+        self.timeout = timeout
+        self._clock = clock
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._certs = None
+        self._expires_at = 0.0
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _fetch(self):
+        try:
+            response = self._session.get(self.certs_url, timeout=self.timeout)
+            response.raise_for_status()
+            certs = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise GoogleCertsUnavailable(f"Could not fetch {self.certs_url}: {exc}") from exc
+        if not isinstance(certs, dict) or not certs:
+            raise GoogleCertsUnavailable(f"Unexpected certificate payload from {self.certs_url}")
+
+        now = self._clock()
+        self._certs = certs
+        self._fetched_at = now
+        self._expires_at = now + cache_lifetime(response.headers)
+        self.fetches += 1
+
+    def get_certs(self, key_id=None):
+        """The current certificate mapping, refreshed if stale or missing ``key_id``."""
+        certs = self._certs
+        if certs is not None and self._clock() < self._expires_at and (
+            key_id is None or key_id in certs
+        ):
+            return certs
+
+        with self._lock:
+            now = self._clock()
+            certs = self._certs
+            if certs is None or now >= self._expires_at:
+                self._fetch()
+            elif key_id is not None and key_id not in certs:
+                # Rotated keys: refetch, but don't let bogus key ids hammer Google.
+                if now - self._fetched_at >= MIN_REFRESH_INTERVAL:
+                    self._fetch()
+            return self._certs
+
+    def verify(self, token):
+        """
+        Return the claims of a valid ID token. Raises GoogleTokenError if the
+        token is invalid and GoogleCertsUnavailable if it cannot be checked.
+        """
+        try:
+            key_id = jwt.decode_header(token).get("kid")
+        except (ValueError, TypeError) as exc:
+            raise GoogleTokenError(str(exc)) from exc
+
+        certs = self.get_certs(key_id)
+        try:
+            idinfo = jwt.decode(
+                token, certs=certs, audience=self.audience,
+                clock_skew_in_seconds=CLOCK_SKEW,
+            )
+        except (ValueError, google_exceptions.GoogleAuthError) as exc:
+            raise GoogleTokenError(str(exc)) from exc
+
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise GoogleTokenError(f"Wrong issuer {idinfo.get('iss')!r}")
+        return idinfo
+
+
+_verifier = None
+_verifier_pid = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """Return this process's shared verifier (re-created after a fork)."""
+    global _verifier, _verifier_pid
+    pid = os.getpid()
+    if _verifier is None or _verifier_pid != pid:
+        with _verifier_lock:
+            if _verifier is None or _verifier_pid != pid:
+                _verifier = GoogleTokenVerifier(
+                    settings.GOOGLE_CERTS_URL,
+                    settings.GOOGLE_CLIENT_ID,
+                    timeout=settings.GOOGLE_CERTS_TIMEOUT,
+                )
+                _verifier_pid = pid
+    return _verifier
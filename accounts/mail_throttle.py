@@ -0,0 +1,171 @@
+"""
+Redis-backed token-bucket rate limiting for outbound mail.
+
+Every worker process takes tokens from the same bucket
+(``mail:bucket:<EMAIL_PROVIDER>``) before handing a message to SMTP, so the
+whole fleet stays under the provider's per-minute quota instead of bursting
+into 4xx deferrals. Refill and take happen atomically in a Lua script using
+the Redis server clock, so workers on different hosts agree on timing.
+
+Backpressure: a sender blocks for at most EMAIL_THROTTLE_MAX_WAIT seconds.
+If no token is available by then ``MailThrottled`` is raised carrying
+``retry_after``, and the task reschedules itself instead of holding the worker.
+
+Counters for sent / throttled / deferred messages are kept in the
+``mail:metrics`` hash and exposed through ``mail_metrics()``.
+"""
+import logging
+import smtplib
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from backend.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "mail:metrics"
+
+# KEYS[1] = bucket hash
+# ARGV    = capacity, refill rate (tokens/sec), requested, allow partial (0/1)
+# returns {granted, wait_ms until `requested` (or 1 if partial) tokens exist}
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local partial = tonumber(ARGV[4]) == 1
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local granted = 0
+if tokens >= requested then
+    granted = requested
+elseif partial then
+    granted = math.floor(tokens)
+end
+tokens = tokens - granted
+
+local wait = 0
+if granted == 0 then
+    local needed = partial and 1 or requested
+    wait = math.ceil((needed - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {granted, wait}
+"""
+
+
+class MailThrottled(Exception):
+    """No send capacity right now; try again after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after):
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(f"Mail rate limit reached; retry in {self.retry_after}s")
+
+
+class TokenBucket:
+    def __init__(self, name, rate, per, burst):
+        self.key = f"mail:bucket:{name}"
+        self.capacity = max(1, burst)
+        self.refill_rate = rate / per  # tokens per second
+        self._script = None
+
+    def take(self, count=1, partial=False):
+        """
+        Try to take ``count`` tokens. Returns ``(granted, wait_seconds)``;
+        with ``partial`` up to ``count`` tokens may be granted.
+        """
+        if self._script is None:
+            self._script = get_redis().register_script(_TAKE_SCRIPT)
+        granted, wait_ms = self._script(
+            keys=[self.key],
+            args=[self.capacity, self.refill_rate, count, 1 if partial else 0],
+        )
+        return int(granted), int(wait_ms) / 1000.0
+
+    def acquire(self, count=1, max_wait=None):
+        """Block until ``count`` tokens are taken, or raise ``MailThrottled``."""
+        if max_wait is None:
+            max_wait = settings.EMAIL_THROTTLE_MAX_WAIT
+        deadline = time.monotonic() + max_wait
+        while True:
+            granted, wait = self.take(count)
+            if granted:
+                return
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                record("throttled", count)
+                raise MailThrottled(wait)
+            time.sleep(wait)
+
+    def peek(self):
+        """Tokens currently available (approximate; does not refill)."""
+        tokens = get_redis().hget(self.key, "tokens")
+        return self.capacity if tokens is None else float(tokens)
+
+
+_buckets = {}
+
+
+def bucket_for(provider=None):
+    provider = provider or settings.EMAIL_PROVIDER
+    if provider not in _buckets:
+        limits = settings.EMAIL_RATE_LIMITS.get(provider) or settings.EMAIL_RATE_LIMITS["default"]
+        _buckets[provider] = TokenBucket(
+            provider, limits["rate"], limits["per"], limits.get("burst", 1)
+        )
+    return _buckets[provider]
+
+
+def acquire_send_token():
+    """
+    Take one token for the configured provider before sending a message.
+    Fails open (logs and sends) if Redis is unreachable: mail must still go out.
+    """
+    try:
+        bucket_for().acquire()
+    except RedisError as exc:
+        logger.warning("Mail throttle unavailable (%s); sending unthrottled.", exc)
+
+
+def is_deferral(exc):
+    """True for temporary (4xx) SMTP refusals, i.e. the provider asking us to slow down."""
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in exc.recipients.values()]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    return False
+
+
+def record(metric, count=1):
+    try:
+        get_redis().hincrby(METRICS_KEY, metric, count)
+    except RedisError:
+        pass
+
+
+def mail_metrics():
+    """Throttle counters, bucket level and Celery queue depth for dashboards."""
+    client = get_redis()
+    counters = {key: int(value) for key, value in client.hgetall(METRICS_KEY).items()}
+    bucket = bucket_for()
+    return {
+        "provider": settings.EMAIL_PROVIDER,
+        "tokens_available": round(bucket.peek(), 2),
+        "bucket_capacity": bucket.capacity,
+        "refill_per_second": bucket.refill_rate,
+        "celery_queue_depth": client.llen("celery"),
+        "sent": counters.get("sent", 0),
+        "throttled": counters.get("throttled", 0),
+        "deferred": counters.get("deferred", 0),
+        "failed": counters.get("failed", 0),
+    }
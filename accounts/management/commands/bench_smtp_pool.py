@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from accounts.smtp_pool import SMTPConnectionPool
+from accounts.smtp_sink import SMTPSink
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare one-connection-per-message sending with the pooled SMTP "
+        "connection manager against a local SMTP sink."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=500)
+        parser.add_argument(
+            "--connect-delay-ms",
+            type=float,
+            default=20.0,
+            help="Simulated TLS handshake + AUTH cost per new session.",
+        )
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        delay = options["connect_delay_ms"] / 1000.0
+
+        messages = [
+            EmailMessage(
+                subject=f"Benchmark {i}",
+                body="Pooled SMTP benchmark message.",
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[f"user{i}@example.com"],
+            )
+            for i in range(count)
+        ]
+
+        with SMTPSink(connect_delay=delay) as sink:
+            backend_kwargs = {
+                "host": sink.host,
+                "port": sink.port,
+                "username": "",
+                "password": "",
+                "use_ssl": False,
+                "use_tls": False,
+            }
+
+            # ---- Before: a fresh session per message (msg.send()) ----
+            started = time.perf_counter()
+            for msg in messages:
+                get_connection(backend=SMTP_BACKEND, **backend_kwargs).send_messages([msg])
+            fresh_elapsed = time.perf_counter() - started
+            fresh_connections = sink.connections
+
+            # ---- After: one pooled session reused across "tasks" ----
+            sink.reset()
+            pool = SMTPConnectionPool(backend=SMTP_BACKEND, **backend_kwargs)
+            started = time.perf_counter()
+            for msg in messages:
+                pool.send_messages([msg])
+            pooled_elapsed = time.perf_counter() - started
+            pool.close_all()
+            pooled_connections = sink.connections
+
+        self.stdout.write(f"messages: {count}, simulated connect cost: {delay * 1000:.1f} ms")
+        self.stdout.write(
+            f"fresh connection : {count / fresh_elapsed:8.1f} msg/s "
+            f"({fresh_connections} connections)"
+        )
+        self.stdout.write(
+            f"pooled connection: {count / pooled_elapsed:8.1f} msg/s "
+            f"({pooled_connections} connections)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"speed-up: {fresh_elapsed / pooled_elapsed:.1f}x"))
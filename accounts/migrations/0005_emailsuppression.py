@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_profile_completed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailSuppression',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('reason', models.CharField(choices=[('HARD_BOUNCE', 'Hard bounce'), ('COMPLAINT', 'Spam complaint'), ('UNSUBSCRIBE', 'Unsubscribed'), ('MANUAL', 'Manual')], default='HARD_BOUNCE', max_length=20)),
+                ('source', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
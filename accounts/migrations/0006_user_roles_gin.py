@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:47
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_emailsuppression'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['roles'], name='user_roles_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:50
+
+from django.db import migrations, models
+
+PURGE_BATCH_SIZE = 5000
+
+
+def purge_otp_backlog(apps, schema_editor):
+    # Every existing row holds a plain-text code that the hashed scheme cannot
+    # verify (and most expired long ago), so the backlog is dropped before the
+    # index is built. Deleted in primary-key batches, each in its own
+    # transaction (atomic = False), so the table is never locked for long.
+    EmailOTP = apps.get_model("accounts", "EmailOTP")
+    while True:
+        ids = list(EmailOTP.objects.values_list("pk", flat=True)[:PURGE_BATCH_SIZE])
+        if not ids:
+            return
+        EmailOTP.objects.filter(pk__in=ids).delete()
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0006_user_roles_gin'),
+    ]
+
+    operations = [
+        migrations.RunPython(purge_otp_backlog, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='emailotp',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='emailotp',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='emailotp',
+            name='otp',
+            field=models.CharField(max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_people_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='emailotp',
+            name='is_verified',
+        ),
+    ]
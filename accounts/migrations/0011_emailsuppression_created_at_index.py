@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:18
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0010_remove_emailotp_is_verified'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='emailsuppression',
+            index=models.Index(fields=['created_at'], name='suppression_created_at'),
+        ),
+    ]
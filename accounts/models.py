@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.utils import timezone
 import uuid
 
@@ -22,13 +25,80 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Campaign targeting filters on `roles @> '["VISITOR"]'`
+            GinIndex(fields=["roles"], name="user_roles_gin", opclasses=["jsonb_path_ops"]),
+            # Admin people search (exhibitions/utils/people_search.py). Django's
+            # icontains compares UPPER(col), so the indexes do too.
+            GinIndex(OpClass(Upper("username"), name="gin_trgm_ops"), name="user_username_trgm"),
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="user_email_trgm"),
+        ]
+
 
 
 class EmailOTP(models.Model):
-    email = models.EmailField()
-    otp = models.CharField(max_length=6)
-    is_verified = models.BooleanField(default=False)
+    """Fallback OTP store for DatabaseOTPBackend (see accounts/otp.py)."""
+    email = models.EmailField(db_index=True)
+    otp = models.CharField(max_length=64)  # HMAC of the code, never the code itself
+    attempts = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
 
     def is_expired(self):
-        return timezone.now() > self.created_at + timezone.timedelta(minutes=5)
+        return timezone.now() > self.created_at + timezone.timedelta(seconds=settings.OTP_TTL_SECONDS)
+
+
+class EmailSuppression(models.Model):
+    """
+    Addresses that must never receive campaign mail (hard bounces, spam
+    complaints, unsubscribes). Emails are stored lower-cased.
+    """
+    REASON_CHOICES = [
+        ("HARD_BOUNCE", "Hard bounce"),
+        ("COMPLAINT", "Spam complaint"),
+        ("UNSUBSCRIBE", "Unsubscribed"),
+        ("MANUAL", "Manual"),
+    ]
+
+    email = models.EmailField(unique=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default="HARD_BOUNCE")
+    source = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Suppression filter catch-up (accounts/suppression.py)
+            models.Index(fields=["created_at"], name="suppression_created_at"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.email = self.email.strip().lower()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.email} ({self.reason})"
+
+
+class AccountDeletionJob(models.Model):
+    """
+    Background deletion of a user and everything they own (accounts/deletion.py).
+    Outlives the user row, so the id is kept as a plain integer.
+    """
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_id = models.BigIntegerField(db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    progress = models.JSONField(default=dict)   # rows deleted per model label, touched_exhibitions
+    files_deleted = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id} ({self.status})"
@@ -0,0 +1,167 @@
+"""
+Pluggable storage for email login OTPs.
+
+The backend is chosen with the OTP_BACKEND setting:
+
+* ``accounts.otp.RedisOTPBackend`` (default) — one Redis hash per email with
+  the HMAC of the code and an attempt counter. The key carries a native
+  expiry of twice OTP_TTL_SECONDS, so nothing ever needs cleaning up; in the
+  second half the code only tells "expired" from "invalid". Verification
+  runs as a Lua script so "count the attempt, compare, consume" is atomic
+  across gunicorn workers.
+* ``accounts.otp.DatabaseOTPBackend`` — the ``EmailOTP`` table, kept as a
+  fallback for deployments without Redis. Expired rows are removed hourly by
+  ``purge_expired_otps_task``.
+
+Plain codes are never stored: both backends keep ``salted_hmac(email, otp)``.
+After OTP_MAX_ATTEMPTS wrong guesses the code is burnt and a new one must be
+requested. As before the move to Redis, a code that was never issued (or
+was already used) is "invalid"; only the right code submitted after
+OTP_TTL_SECONDS is "expired".
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.module_loading import import_string
+
+from backend.redis_client import get_redis
+
+OTP_OK = "ok"
+OTP_INVALID = "invalid"
+OTP_EXPIRED = "expired"
+OTP_LOCKED = "locked"
+
+PURGE_BATCH_SIZE = 5000
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def hash_otp(email, otp):
+    return salted_hmac(
+        "accounts.otp", f"{normalize_email(email)}:{otp}", algorithm="sha256",
+    ).hexdigest()
+
+
+# KEYS[1] = otp hash key; ARGV = submitted code hash, max attempts, TTL ms
+# A missing key means the code was never issued, was used or burnt, or
+# expired long ago. Less than TTL ms left on the key means it has expired.
+_VERIFY_SCRIPT = """
+local stored = redis.call('HGET', KEYS[1], 'hash')
+if not stored then
+    return 'invalid'
+end
+if redis.call('PTTL', KEYS[1]) <= tonumber(ARGV[3]) then
+    if stored == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+        return 'expired'
+    end
+    return 'invalid'
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts > tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return 'locked'
+end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 'ok'
+end
+return 'invalid'
+"""
+
+
+class RedisOTPBackend:
+    def __init__(self):
+        self._verify = None
+
+    def _key(self, email):
+        return f"otp:{normalize_email(email)}"
+
+    def issue(self, email, otp):
+        """Store a new code for ``email``, replacing any previous one and its attempts."""
+        key = self._key(email)
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping={"hash": hash_otp(email, otp), "attempts": 0})
+        # Kept for a second TTL so the verify script can answer "expired"
+        pipe.expire(key, 2 * settings.OTP_TTL_SECONDS)
+        pipe.execute()
+
+    def verify(self, email, otp):
+        if self._verify is None:
+            self._verify = get_redis().register_script(_VERIFY_SCRIPT)
+        return self._verify(
+            keys=[self._key(email)],
+            args=[hash_otp(email, otp), settings.OTP_MAX_ATTEMPTS, settings.OTP_TTL_SECONDS * 1000],
+        )
+
+
+class DatabaseOTPBackend:
+    def issue(self, email, otp):
+        from .models import EmailOTP
+
+        email = normalize_email(email)
+        with transaction.atomic():
+            EmailOTP.objects.filter(email=email).delete()
+            EmailOTP.objects.create(email=email, otp=hash_otp(email, otp))
+
+    def verify(self, email, otp):
+        from .models import EmailOTP
+
+        email = normalize_email(email)
+        with transaction.atomic():
+            record = (
+                EmailOTP.objects.select_for_update()
+                .filter(email=email)
+                .order_by("-created_at")
+                .first()
+            )
+            if record is None:
+                return OTP_INVALID
+            if record.is_expired():
+                if not constant_time_compare(record.otp, hash_otp(email, otp)):
+                    return OTP_INVALID
+                record.delete()
+                return OTP_EXPIRED
+
+            EmailOTP.objects.filter(pk=record.pk).update(attempts=F("attempts") + 1)
+            if record.attempts + 1 > settings.OTP_MAX_ATTEMPTS:
+                record.delete()
+                return OTP_LOCKED
+            if not constant_time_compare(record.otp, hash_otp(email, otp)):
+                return OTP_INVALID
+
+            record.delete()
+            return OTP_OK
+
+
+def purge_expired_otps(batch_size=PURGE_BATCH_SIZE):
+    """Delete expired ``EmailOTP`` rows in primary-key batches. Returns the count."""
+    from .models import EmailOTP
+
+    cutoff = timezone.now() - timedelta(seconds=settings.OTP_TTL_SECONDS)
+    deleted = 0
+    while True:
+        ids = list(
+            EmailOTP.objects.filter(created_at__lt=cutoff)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += EmailOTP.objects.filter(pk__in=ids).delete()[0]
+
+
+_backend = None
+
+
+def get_otp_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.OTP_BACKEND)()
+    return _backend
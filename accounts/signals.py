@@ -0,0 +1,28 @@
+"""
+Keep cached principals (accounts/authentication.py) in step with the database:
+any change to a user or their exhibitor profile bumps the user's version stamp
+once the transaction commits.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_principal
+from .models import User
+
+
+def _invalidate_on_commit(user_id):
+    # After commit, so no reader can cache the old row under the new stamp.
+    transaction.on_commit(lambda: invalidate_principal(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender="exhibitions.ExhibitorProfile")
+@receiver(post_delete, sender="exhibitions.ExhibitorProfile")
+def invalidate_profile_owner_principal(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.user_id)
@@ -0,0 +1,272 @@
+"""
+Per-process pool of authenticated SMTP connections shared by all mail tasks.
+
+Opening an SMTP session costs a TCP connect, a TLS handshake and an AUTH
+exchange — far more than sending one transactional email over it. Each
+Celery worker process therefore keeps its sessions open between tasks:
+
+* idle sessions are dropped after EMAIL_POOL_IDLE_TIMEOUT seconds (providers
+  close them server-side anyway),
+* a session that has been idle for more than EMAIL_POOL_HEALTHCHECK_INTERVAL
+  seconds is probed with NOOP before it is reused,
+* a message that fails because the server dropped the session is retried once
+  on a fresh connection, so callers never see a stale-socket error.
+
+Messages are sent one at a time over the borrowed session so that a reconnect
+in the middle of a batch never re-sends what was already accepted. The shared
+pool takes a token from the provider rate limiter (accounts/mail_throttle.py)
+before each message.
+"""
+import atexit
+import logging
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from .mail_throttle import MailThrottled, acquire_send_token, is_deferral, record
+
+logger = logging.getLogger(__name__)
+
+
+def is_connection_error(exc):
+    """True if ``exc`` means the session is unusable (vs. a per-message refusal)."""
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        # 421: service not available, closing transmission channel
+        return exc.smtp_code == 421
+    if isinstance(exc, smtplib.SMTPException):
+        return False
+    return isinstance(exc, OSError)
+
+
+class _PooledConnection:
+    __slots__ = ("backend", "last_used", "last_checked")
+
+    def __init__(self, backend):
+        now = time.monotonic()
+        self.backend = backend
+        self.last_used = now
+        self.last_checked = now
+
+
+class SMTPConnectionPool:
+    """
+    A small LIFO pool of open Django email backends.
+
+    ``backend`` and ``backend_kwargs`` are passed to ``get_connection`` so the
+    pool can wrap any SMTP-based backend (production uses EMAIL_BACKEND, the
+    benchmarks point it at a local sink). ``throttle`` is called before every
+    message and may raise ``MailThrottled`` to stop the batch.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        max_size=None,
+        idle_timeout=None,
+        health_check_interval=None,
+        throttle=None,
+        **backend_kwargs,
+    ):
+        self.backend = backend or settings.EMAIL_BACKEND
+        self.throttle = throttle
+        self.backend_kwargs = backend_kwargs
+        self.max_size = max_size or getattr(settings, "EMAIL_POOL_MAX_CONNECTIONS", 2)
+        self.idle_timeout = (
+            idle_timeout if idle_timeout is not None
+            else getattr(settings, "EMAIL_POOL_IDLE_TIMEOUT", 120)
+        )
+        self.health_check_interval = (
+            health_check_interval if health_check_interval is not None
+            else getattr(settings, "EMAIL_POOL_HEALTHCHECK_INTERVAL", 30)
+        )
+        self._idle = []
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    # ── connection lifecycle ──────────────────────────────────────────────
+
+    def _open(self):
+        backend = get_connection(
+            backend=self.backend, fail_silently=False, **self.backend_kwargs
+        )
+        backend.open()
+        self.connections_opened += 1
+        return _PooledConnection(backend)
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.backend.close()
+        except Exception:
+            # The session is already broken; nothing more to clean up.
+            pass
+
+    def _is_usable(self, conn, now):
+        if conn.backend.connection is None:
+            return False
+        if now - conn.last_used > self.idle_timeout:
+            return False
+        if now - conn.last_checked > self.health_check_interval:
+            try:
+                status = conn.backend.connection.noop()[0]
+            except Exception:
+                return False
+            if status != 250:
+                return False
+            conn.last_checked = now
+        return True
+
+    def acquire(self):
+        """Borrow a healthy open connection, opening a new one if needed."""
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._open()
+            if self._is_usable(conn, time.monotonic()):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn, broken=False):
+        """Return ``conn`` to the pool, or close it if broken or the pool is full."""
+        if not broken:
+            conn.last_used = time.monotonic()
+            with self._lock:
+                if len(self._idle) < self.max_size:
+                    self._idle.append(conn)
+                    return
+        self._discard(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+    # ── sending ───────────────────────────────────────────────────────────
+
+    def _send_one(self, conn, message):
+        """
+        Send ``message`` on ``conn``, replacing the session once if the server
+        dropped it. Returns ``(conn, sent)`` where ``conn`` is the session now in use.
+        """
+        if self.throttle is not None:
+            self.throttle()
+        try:
+            return conn, conn.backend.send_messages([message])
+        except Exception as exc:
+            if not is_connection_error(exc):
+                raise
+            logger.warning("SMTP session lost (%s); reconnecting.", exc)
+        self._discard(conn)
+        conn = self._open()
+        try:
+            return conn, conn.backend.send_messages([message])
+        except Exception:
+            self._discard(conn)
+            raise
+
+    def send_messages(self, messages):
+        """
+        Send ``messages`` over one pooled session and return how many were sent.
+
+        A dropped session is replaced transparently (once per message); any other
+        SMTP error is raised to the caller, as with ``fail_silently=False``.
+        """
+        if not messages:
+            return 0
+
+        sent_total = 0
+        conn = self.acquire()
+        try:
+            for message in messages:
+                conn, sent = self._send_one(conn, message)
+                sent_total += sent
+        except Exception as exc:
+            self.release(conn, broken=is_connection_error(exc))
+            raise
+        self.release(conn)
+        return sent_total
+
+    def send_each(self, messages):
+        """
+        Send ``messages`` over one pooled session without stopping at the first
+        failure. Returns one entry per message: ``None`` if it was sent, or the
+        exception that prevented it. If the server stays unreachable after a
+        reconnect, or the rate limiter says stop, the remaining messages are
+        failed with the same error.
+        """
+        if not messages:
+            return []
+
+        results = []
+        broken = False
+        conn = self.acquire()
+        for index, message in enumerate(messages):
+            try:
+                conn, _ = self._send_one(conn, message)
+                results.append(None)
+            except Exception as exc:
+                results.append(exc)
+                if is_connection_error(exc) or isinstance(exc, MailThrottled):
+                    results.extend([exc] * (len(messages) - index - 1))
+                    broken = is_connection_error(exc)
+                    break
+        self.release(conn, broken=broken)
+        return results
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return this process's shared pool (re-created after a fork)."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = SMTPConnectionPool(throttle=acquire_send_token)
+                _pool_pid = pid
+    return _pool
+
+
+def _record_error(exc, count=1):
+    if isinstance(exc, MailThrottled):
+        return  # counted by the throttle itself
+    record("deferred" if is_deferral(exc) else "failed", count)
+
+
+def send_messages(messages):
+    """Send ``messages`` through the process-wide pool."""
+    try:
+        sent = get_pool().send_messages(messages)
+    except Exception as exc:
+        _record_error(exc)
+        raise
+    record("sent", sent)
+    return sent
+
+
+def send_each(messages):
+    """Send ``messages`` through the process-wide pool, reporting per-message errors."""
+    results = get_pool().send_each(messages)
+    record("sent", sum(1 for error in results if error is None))
+    for error in results:
+        if error is not None:
+            _record_error(error)
+    return results
+
+
+@atexit.register
+def _close_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close_all()
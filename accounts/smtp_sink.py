@@ -0,0 +1,107 @@
+"""
+Minimal in-process SMTP server used by the mail benchmarks.
+
+It speaks just enough plain-text SMTP for smtplib (EHLO/HELO, MAIL, RCPT,
+DATA, RSET, NOOP, QUIT), discards what it receives and keeps counters of
+connections, messages and bytes on the wire. ``connect_delay`` simulates the
+TLS handshake + AUTH round trips a real provider charges per session.
+"""
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        data = (line + "\r\n").encode()
+        self.wfile.write(data)
+        self.server.sink._count(bytes_out=len(data))
+
+    def _readline(self):
+        line = self.rfile.readline()
+        self.server.sink._count(bytes_in=len(line))
+        return line
+
+    def handle(self):
+        sink = self.server.sink
+        sink._count(connections=1)
+        if sink.connect_delay:
+            time.sleep(sink.connect_delay)
+        self._reply("220 sink ESMTP ready")
+
+        while True:
+            line = self._readline()
+            if not line:
+                return
+            command = line.decode("latin-1").strip().upper()
+
+            if command.startswith("EHLO"):
+                self._reply("250-sink")
+                self._reply("250 8BITMIME")
+            elif command.startswith(("HELO", "MAIL", "RCPT", "RSET", "NOOP")):
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while True:
+                    chunk = self._readline()
+                    if not chunk or chunk == b".\r\n":
+                        break
+                sink._count(messages=1)
+                self._reply("250 OK: queued")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    Usage::
+
+        with SMTPSink() as sink:
+            send(..., host=sink.host, port=sink.port)
+            print(sink.messages, sink.bytes_in)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, connect_delay=0.0):
+        self.connect_delay = connect_delay
+        self._server = _ThreadingServer((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.messages = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _count(self, connections=0, messages=0, bytes_in=0, bytes_out=0):
+        with self._lock:
+            self.connections += connections
+            self.messages += messages
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,166 @@
+"""
+Email suppression list with an in-process Bloom filter.
+
+Campaign fan-out checks every recipient against ``EmailSuppression``. Instead
+of one big ``email IN (…)`` query per batch, each worker keeps a Bloom filter
+of the suppressed addresses:
+
+* a miss is definitive — the address is not suppressed (O(1), no query),
+* a hit is confirmed with one exact indexed query for all hits of the batch,
+  so a false positive never drops a legitimate recipient.
+
+The filter is refreshed incrementally: rows created since the newest one
+loaded, minus SUPPRESSION_CATCH_UP_OVERLAP, are added on the next check.
+Ids and timestamps are assigned before commit, so a row can become visible
+after a later one; the overlap re-reads that window, and addresses already
+in the filter are not counted again. Deletions cannot be removed from a
+Bloom filter, so it is rebuilt from scratch every
+SUPPRESSION_FULL_REBUILD_SECONDS or when it outgrows its sizing.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from .models import EmailSuppression
+
+logger = logging.getLogger(__name__)
+
+SUPPRESSION_FALSE_POSITIVE_RATE = 0.001
+SUPPRESSION_MIN_CAPACITY = 10_000
+SUPPRESSION_REFRESH_SECONDS = 30
+SUPPRESSION_FULL_REBUILD_SECONDS = 6 * 3600
+SUPPRESSION_CATCH_UP_OVERLAP = timedelta(minutes=5)
+SUPPRESSION_INGEST_CHUNK = 1000
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity, error_rate=SUPPRESSION_FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class SuppressionFilter:
+    def __init__(self):
+        self._bloom = None
+        self._watermark = None   # newest created_at loaded
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _rebuild(self):
+        total = EmailSuppression.objects.count()
+        bloom = BloomFilter(max(SUPPRESSION_MIN_CAPACITY, total * 2))
+        watermark = None
+        rows = EmailSuppression.objects.order_by("id").values_list("email", "created_at")
+        for email, created_at in rows.iterator(chunk_size=5000):
+            bloom.add(email)
+            watermark = created_at if watermark is None else max(watermark, created_at)
+        self._bloom, self._watermark = bloom, watermark
+        self._built_at = self._refreshed_at = time.monotonic()
+        logger.info("Suppression filter rebuilt: %d address(es), %d bits.", bloom.count, bloom.num_bits)
+
+    def _catch_up(self):
+        new_rows = EmailSuppression.objects.values_list("email", "created_at")
+        if self._watermark is not None:
+            new_rows = new_rows.filter(created_at__gte=self._watermark - SUPPRESSION_CATCH_UP_OVERLAP)
+        for email, created_at in new_rows.iterator(chunk_size=5000):
+            if email not in self._bloom:
+                self._bloom.add(email)
+            self._watermark = created_at if self._watermark is None else max(self._watermark, created_at)
+        self._refreshed_at = time.monotonic()
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if (
+                force
+                or self._bloom is None
+                or now - self._built_at > SUPPRESSION_FULL_REBUILD_SECONDS
+                or self._bloom.count > self._bloom.capacity
+            ):
+                self._rebuild()
+            elif now - self._refreshed_at > SUPPRESSION_REFRESH_SECONDS:
+                self._catch_up()
+
+    def filter(self, emails):
+        """Return ``emails`` without the suppressed ones, preserving order."""
+        self.refresh()
+        bloom = self._bloom
+        candidates = {normalize_email(e) for e in emails}
+        candidates = {e for e in candidates if e in bloom}
+        if not candidates:
+            return list(emails)
+
+        suppressed = set(
+            EmailSuppression.objects
+            .filter(email__in=candidates)
+            .values_list("email", flat=True)
+        )
+        return [e for e in emails if normalize_email(e) not in suppressed]
+
+
+_filter = SuppressionFilter()
+
+
+def filter_suppressed(emails):
+    """Drop suppressed addresses from ``emails`` (Bloom check, exact confirm on hits)."""
+    return _filter.filter(emails)
+
+
+def suppress(emails, reason="HARD_BOUNCE", source=""):
+    """
+    Add ``emails`` to the suppression list in bulk; invalid and duplicate
+    addresses are skipped. Returns ``(valid, created)`` counts.
+    """
+    valid = set()
+    for email in emails:
+        email = normalize_email(email)
+        try:
+            validate_email(email)
+        except ValidationError:
+            continue
+        valid.add(email)
+
+    valid = sorted(valid)
+    created = 0
+    for i in range(0, len(valid), SUPPRESSION_INGEST_CHUNK):
+        chunk = valid[i:i + SUPPRESSION_INGEST_CHUNK]
+        existing = set(
+            EmailSuppression.objects.filter(email__in=chunk).values_list("email", flat=True)
+        )
+        new = [
+            EmailSuppression(email=email, reason=reason, source=source[:100])
+            for email in chunk if email not in existing
+        ]
+        EmailSuppression.objects.bulk_create(new, ignore_conflicts=True)
+        created += len(new)
+    return len(valid), created
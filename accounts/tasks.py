@@ -1,6 +1,8 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.conf import settings
+from .mail_throttle import MailThrottled
+from .smtp_pool import send_messages
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,16 +24,64 @@ def send_otp_email_task(self, email, otp):
 
     Moving it here means Celery handles the blocking I/O, and Gunicorn workers
     are freed immediately to handle the next request.
+
+    The message goes out over the worker's pooled SMTP session, so an OTP does
+    not pay for a fresh TLS handshake + AUTH.
     """
     try:
-        send_mail(
-            subject="Your NearEstate Login OTP",
-            message=f"Your OTP is {otp}. It is valid for 5 minutes.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
-        )
+        send_messages([
+            EmailMessage(
+                subject="Your NearEstate Login OTP",
+                body=f"Your OTP is {otp}. It is valid for 5 minutes.",
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[email],
+            )
+        ])
         logger.info(f"OTP email sent successfully to {email}")
+    except MailThrottled as exc:
+        # Rate limit reached: come back exactly when a token will be available
+        raise self.retry(exc=exc, countdown=exc.retry_after)
     except Exception as exc:
         logger.error(f"Failed to send OTP email to {email}: {exc}")
         raise  # Celery will retry automatically (max 3 times)
+
+
+@shared_task
+def purge_expired_otps_task():
+    """Remove expired EmailOTP rows (only written by the database OTP backend)."""
+    from .otp import purge_expired_otps
+
+    deleted = purge_expired_otps()
+    if deleted:
+        logger.info("Purged %d expired OTP row(s).", deleted)
+    return deleted
+
+
+@shared_task
+def prune_outstanding_tokens_task():
+    """Mirror live DB revocations into Redis and drop expired token_blacklist rows."""
+    from .tokens import prune_outstanding_tokens
+
+    deleted = prune_outstanding_tokens()
+    if deleted:
+        logger.info("Pruned %d expired outstanding token(s).", deleted)
+    return deleted
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_kwargs={"max_retries": 5},
+)
+def delete_account_task(self, job_id):
+    """Delete a disabled account in batches (accounts/deletion.py). Safe to re-run."""
+    from .deletion import run_account_deletion
+    from .models import AccountDeletionJob
+
+    try:
+        run_account_deletion(job_id)
+    except Exception as exc:
+        logger.exception("Account deletion job %s failed", job_id)
+        AccountDeletionJob.objects.filter(pk=job_id).update(status="FAILED", error=str(exc))
+        raise
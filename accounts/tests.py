@@ -1,3 +1,351 @@
-from django.test import TestCase
+import json
+import threading
+import time
+import unittest
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import rsa
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from google.auth import crypt, jwt
+from redis.exceptions import RedisError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import deletion, otp, suppression, throttling, tokens
+from .authentication import CachedJWTAuthentication, clear_principal_cache
+from .google_auth import GoogleTokenError, GoogleTokenVerifier
+from .models import EmailSuppression, User
+from .views import AdminSuppressionIngestView, LogoutView
+
+try:  # requirements-dev.txt
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        clear_principal_cache()
+        self.user = User.objects.create(
+            username="visitor", email="visitor@example.com",
+            roles=["VISITOR"], active_role="VISITOR",
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.factory = APIRequestFactory()
+
+    def authenticate(self):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+
+    def user_queries(self, ctx):
+        table = User._meta.db_table
+        return [q for q in ctx.captured_queries if table in q["sql"]]
+
+    def test_cache_hit_makes_no_user_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.authenticate()
+        self.assertEqual(len(self.user_queries(ctx)), 1)
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.active_role, "VISITOR")
+        self.assertEqual(user.roles, ["VISITOR"])
+
+    def test_shared_cache_serves_other_processes(self):
+        self.authenticate()
+        clear_principal_cache()  # a different worker: empty L1, warm shared cache
+
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_role_switch_invalidates_principal(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.roles = ["VISITOR", "EXHIBITOR"]
+            self.user.active_role = "EXHIBITOR"
+            self.user.save()
+
+        with CaptureQueriesContext(connection) as ctx:
+            user = self.authenticate()
+        self.assertEqual(len(self.user_queries(ctx)), 1)
+        self.assertEqual(user.active_role, "EXHIBITOR")
+
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_principal_can_be_saved(self):
+        user = self.authenticate()
+        user.profile_completed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.profile_completed)
+        self.assertEqual(self.user.email, "visitor@example.com")
+        self.assertTrue(self.authenticate().profile_completed)
+
+    def test_mutating_principal_does_not_touch_cache(self):
+        user = self.authenticate()
+        user.roles.append("EXHIBITOR")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().roles, ["VISITOR"])
+
+
+class _CertsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        body = json.dumps(server.certs).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", f"public, max-age={server.max_age}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GoogleTokenVerifierTests(TestCase):
+    """Runs against a local stand-in for Google's certificate endpoint."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        public, private = rsa.newkeys(1024)
+        cls.signer = crypt.RSASigner.from_string(private.save_pkcs1().decode(), key_id="k1")
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _CertsHandler)
+        cls.server.certs = {"k1": public.save_pkcs1().decode()}
+        cls.server.max_age = 600
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.hits = 0
+        self.now = 1000.0
+        self.verifier = GoogleTokenVerifier(
+            f"http://127.0.0.1:{self.server.server_port}/certs", "client-id",
+            clock=lambda: self.now,
+        )
+
+    def token(self, **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com", "aud": "client-id",
+            "email": "guest@example.com", "iat": now, "exp": now + 3600,
+        }
+        payload.update(claims)
+        return jwt.encode(self.signer, payload).decode()
+
+    def test_certs_fetched_once_within_max_age(self):
+        for _ in range(3):
+            self.assertEqual(self.verifier.verify(self.token())["email"], "guest@example.com")
+        self.assertEqual(self.server.hits, 1)
+
+        self.now += 601
+        self.verifier.verify(self.token())
+        self.assertEqual(self.server.hits, 2)
+
+    def test_rejects_wrong_audience_and_issuer(self):
+        with self.assertRaises(GoogleTokenError):
+            self.verifier.verify(self.token(aud="someone-else"))
+        with self.assertRaises(GoogleTokenError):
+            self.verifier.verify(self.token(iss="https://evil.example.com"))
+        with self.assertRaises(GoogleTokenError):
+            self.verifier.verify("not-a-token")
+
+
+class AccountDeletionTests(TestCase):
+    def test_rerun_still_marks_exhibitions_of_rows_deleted_before_a_crash(self):
+        from exhibitions.models import Exhibition, ExhibitionStats, VisitorRegistration
+
+        exhibition = Exhibition.objects.create(
+            name="Expo", description="", start_date="2026-11-01", end_date="2026-11-03",
+            venue="Hall", city="Melbourne", state="VIC", country="Australia",
+            booth_capacity=10, visitor_capacity=10,
+        )
+        user = User.objects.create(username="visitor", email="visitor@example.com")
+        VisitorRegistration.objects.create(user=user, exhibition=exhibition)
+        job = deletion.start_account_deletion(user)
+
+        with mock.patch.object(deletion, "delete_files", side_effect=RuntimeError("worker lost")):
+            with self.assertRaises(RuntimeError):
+                deletion.run_account_deletion(job.pk)
+        self.assertFalse(VisitorRegistration.objects.exists())
+        self.assertFalse(ExhibitionStats.objects.filter(dirty=True).exists())
+
+        job = deletion.run_account_deletion(job.pk)
+        self.assertEqual(job.status, "DONE")
+        self.assertTrue(ExhibitionStats.objects.get(pk=exhibition.pk).dirty)
+
+
+class LogoutTests(TestCase):
+    def test_logout_reports_an_unreachable_blacklist(self):
+        user = User.objects.create(username="visitor", email="visitor@example.com")
+        request = APIRequestFactory().post(
+            "/", {"refresh": str(tokens.RefreshToken.for_user(user))}, format="json",
+        )
+        force_authenticate(request, user=user)
+        with mock.patch.object(tokens, "get_redis", side_effect=RedisError("down")):
+            response = LogoutView.as_view()(request)
+        self.assertEqual(response.status_code, 503)
+
+
+class _ThrottledView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = [throttling.IPRateThrottle, throttling.EmailRateThrottle]
+    throttle_scope = "test"
+
+    def post(self, request):
+        return Response({"ok": True})
+
+
+@unittest.skipUnless(fakeredis, "fakeredis[lua] is not installed (requirements-dev.txt)")
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_RATES": {"test_ip": "4/1s", "test_email": "2/1s"},
+})
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        for target, value in (("get_redis", lambda: self.redis), ("_script", None)):
+            patcher = mock.patch.object(throttling, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, email, ip="10.0.0.1"):
+        request = APIRequestFactory().post("/", {"email": email}, format="json", REMOTE_ADDR=ip)
+        return _ThrottledView.as_view()(request)
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate("5/15m"), (5, 900))
+        self.assertEqual(throttling.parse_rate("10/h"), (10, 3600))
+        self.assertEqual(throttling.parse_rate("2/30s"), (2, 30))
+        with self.assertRaises(ValueError):
+            throttling.parse_rate("5 per minute")
+
+    def test_rejects_over_the_limit_until_the_window_slides(self):
+        self.assertEqual([self.post("A@example.com").status_code for _ in range(2)], [200, 200])
+        response = self.post("a@example.com ")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        # The email limit is per address; the IP throttle also counted the
+        # rejected request (DRF asks every throttle), leaving room for one.
+        self.assertEqual(self.post("b@example.com").status_code, 200)
+        self.assertEqual(self.post("c@example.com").status_code, 429)
+        self.assertEqual(self.post("c@example.com", ip="10.0.0.2").status_code, 200)
+
+        time.sleep(int(response["Retry-After"]) + 0.05)
+        self.assertEqual(self.post("a@example.com").status_code, 200)
+
+    def test_rejected_requests_are_not_recorded(self):
+        for _ in range(5):
+            self.post("a@example.com")
+        self.assertEqual(self.redis.zcard("throttle:test:email:a@example.com"), 2)
+
+    def test_scope_without_a_rate_is_not_throttled(self):
+        with mock.patch.object(_ThrottledView, "throttle_scope", "unlimited"):
+            self.assertEqual({self.post("a@example.com").status_code for _ in range(5)}, {200})
+
+    def test_fails_open_when_redis_is_down(self):
+        with mock.patch.object(throttling, "get_redis", side_effect=RedisError("down")):
+            self.assertEqual({self.post("a@example.com").status_code for _ in range(5)}, {200})
+
+
+@unittest.skipUnless(fakeredis, "fakeredis[lua] is not installed (requirements-dev.txt)")
+@override_settings(OTP_MAX_ATTEMPTS=3)
+class RedisOTPBackendTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = mock.patch.object(otp, "get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = otp.RedisOTPBackend()
+
+    def test_code_is_single_use(self):
+        self.backend.issue("User@Example.com", "123456")
+        self.assertEqual(self.backend.verify("user@example.com ", "123456"), otp.OTP_OK)
+        self.assertEqual(self.backend.verify("user@example.com", "123456"), otp.OTP_INVALID)
+
+    def test_code_is_burnt_after_max_attempts(self):
+        self.backend.issue("user@example.com", "123456")
+        for _ in range(3):
+            self.assertEqual(self.backend.verify("user@example.com", "000000"), otp.OTP_INVALID)
+        self.assertEqual(self.backend.verify("user@example.com", "123456"), otp.OTP_LOCKED)
+        self.assertEqual(self.backend.verify("user@example.com", "123456"), otp.OTP_INVALID)
+
+        # A new code starts with a fresh attempt count.
+        self.backend.issue("user@example.com", "654321")
+        self.assertEqual(self.backend.verify("user@example.com", "000000"), otp.OTP_INVALID)
+        self.assertEqual(self.backend.verify("user@example.com", "654321"), otp.OTP_OK)
+
+    @override_settings(OTP_TTL_SECONDS=1)
+    def test_expired_code(self):
+        self.backend.issue("user@example.com", "123456")
+        time.sleep(1.05)
+        self.assertEqual(self.backend.verify("user@example.com", "000000"), otp.OTP_INVALID)
+        self.assertEqual(self.backend.verify("user@example.com", "123456"), otp.OTP_EXPIRED)
+        self.assertEqual(self.backend.verify("user@example.com", "123456"), otp.OTP_INVALID)
+        self.assertLessEqual(self.redis.ttl("otp:user@example.com"), 2)
+
+    def test_never_issued_code_is_invalid(self):
+        self.assertEqual(self.backend.verify("nobody@example.com", "123456"), otp.OTP_INVALID)
+        with mock.patch.object(otp, "_backend", self.backend), \
+                mock.patch.object(throttling, "get_redis", return_value=self.redis):
+            response = self.client.post(
+                "/api/auth/email-otp/verify/", {"email": "nobody@example.com", "otp": "123456"},
+            )
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "Invalid OTP"}))
+
+
+class SuppressionTests(TestCase):
+    def ingest(self, data):
+        request = APIRequestFactory().post("/", data, format="json")
+        force_authenticate(request, user=User(username="admin", active_role="ADMIN"))
+        return AdminSuppressionIngestView.as_view()(request)
+
+    def test_ingest_rejects_entries_that_are_not_strings(self):
+        for emails in (["a@example.com", 42], [{"email": "a@example.com"}], {"a@example.com": 1}):
+            self.assertEqual(self.ingest({"emails": emails}).status_code, 400)
+        self.assertFalse(EmailSuppression.objects.exists())
+
+        response = self.ingest({"emails": ["A@example.com", "not-an-email"]})
+        self.assertEqual(response.data, {"received": 2, "valid": 1, "created": 1})
+
+    def test_catch_up_sees_rows_committed_out_of_order(self):
+        now = timezone.now()
+        EmailSuppression.objects.create(pk=10, email="first@example.com", created_at=now)
+        bloom_filter = suppression.SuppressionFilter()
+        bloom_filter.refresh(force=True)
+
+        # Id and timestamp taken before the row already loaded, committed after the rebuild.
+        EmailSuppression.objects.create(pk=5, email="late@example.com", created_at=now - timedelta(minutes=1))
+        for _ in range(3):
+            bloom_filter._catch_up()
+        self.assertEqual(bloom_filter.filter(["late@example.com", "ok@example.com"]), ["ok@example.com"])
+        self.assertEqual(bloom_filter._bloom.count, 2)
@@ -0,0 +1,130 @@
+"""
+Refresh tokens revoked through Redis instead of the token_blacklist tables.
+
+simplejwt's blacklist app writes an ``OutstandingToken`` row for every login
+and answers "is this refresh token revoked?" with a join in Postgres, and
+nothing ever deletes expired rows. ``RefreshToken`` here keeps the same API
+(``for_user``, ``blacklist``, ``check_blacklist``) but:
+
+* logging in writes nothing,
+* ``blacklist()`` sets ``jwt:revoked:<jti>`` in Redis with a TTL equal to the
+  token's remaining lifetime, so the blacklist only ever holds live tokens,
+* ``check_blacklist()`` is a single EXISTS.
+
+The blacklist tables are optional. With JWT_BLACKLIST_DB = True logins and
+revocations are still recorded there as well (e.g. for the admin). While the
+app is installed, ``prune_outstanding_tokens`` (hourly beat job) copies
+revocations that are still live from the tables into Redis and deletes
+expired rows in batches.
+
+If Redis is unreachable ``check_blacklist`` raises RedisError rather than
+accepting a token that may have been revoked.
+"""
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from backend.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PRUNE_BATCH_SIZE = 5000
+
+
+def _revoked_key(jti):
+    return f"jwt:revoked:{jti}"
+
+
+def _db_blacklist_enabled():
+    return getattr(settings, "JWT_BLACKLIST_DB", False) and apps.is_installed(
+        "rest_framework_simplejwt.token_blacklist"
+    )
+
+
+def revoke_jti(jti, exp):
+    """Blacklist ``jti`` until ``exp`` (epoch seconds). No-op if already expired."""
+    ttl = int(exp - time.time())
+    if ttl > 0:
+        get_redis().set(_revoked_key(jti), 1, ex=ttl)
+
+
+def is_revoked(jti):
+    return bool(get_redis().exists(_revoked_key(jti)))
+
+
+class RefreshToken(BaseRefreshToken):
+    # The methods below skip simplejwt's BlacklistMixin (database-backed when
+    # the token_blacklist app is installed) and go straight to Token.
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super(BlacklistMixin, self).verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        revoke_jti(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])
+        if _db_blacklist_enabled():
+            super().blacklist()
+
+    @classmethod
+    def for_user(cls, user):
+        if _db_blacklist_enabled():
+            return super().for_user(user)
+        return super(BlacklistMixin, cls).for_user(user)
+
+
+def prune_outstanding_tokens(batch_size=PRUNE_BATCH_SIZE):
+    """
+    Mirror live revocations from the token_blacklist tables into Redis, then
+    delete expired ``OutstandingToken`` rows (their ``BlacklistedToken`` rows
+    cascade) in primary-key batches. Returns the number of tokens deleted.
+    """
+    if not apps.is_installed("rest_framework_simplejwt.token_blacklist"):
+        return 0
+    from rest_framework_simplejwt.token_blacklist.models import (
+        BlacklistedToken, OutstandingToken,
+    )
+
+    now = timezone.now()
+    live = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        .values_list("token__jti", "token__expires_at")
+        .iterator(chunk_size=batch_size)
+    )
+    pipe = get_redis().pipeline(transaction=False)
+    mirrored = 0
+    for jti, expires_at in live:
+        ttl = int((expires_at - now).total_seconds())
+        if ttl > 0:
+            pipe.set(_revoked_key(jti), 1, ex=ttl)
+            mirrored += 1
+        if len(pipe) >= batch_size:
+            pipe.execute()
+    pipe.execute()
+    if mirrored:
+        logger.info("Mirrored %d blacklisted token(s) to Redis.", mirrored)
+
+    # Rows are inserted in expiry order (fixed lifetime), so walking the
+    # primary key finds the expired ones first without an index on expires_at.
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        OutstandingToken.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
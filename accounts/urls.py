@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import SendEmailOTPView, VerifyEmailOTPView, RefreshTokenView, GoogleLoginView, SelectRoleView, CurrentUserView, UpdateProfileView, SwitchRoleView, AdminLoginView, LogoutView, DeleteAccountView
+from .views import SendEmailOTPView, VerifyEmailOTPView, RefreshTokenView, GoogleLoginView, SelectRoleView, CurrentUserView, UpdateProfileView, SwitchRoleView, AdminLoginView, LogoutView, DeleteAccountView, AccountDeletionStatusView, AdminSuppressionIngestView
 
 urlpatterns = [
     path("admin/login/", AdminLoginView.as_view()),
@@ -14,4 +14,6 @@ urlpatterns = [
     path("profile/update/", UpdateProfileView.as_view()),
     path("switch-role/", SwitchRoleView.as_view()),
     path("account/delete/", DeleteAccountView.as_view()),
+    path("account/delete/<uuid:job_id>/", AccountDeletionStatusView.as_view(), name="account-deletion-status"),
+    path("admin/suppressions/ingest/", AdminSuppressionIngestView.as_view()),
 ]
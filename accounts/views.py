@@ -1,23 +1,29 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.conf import settings
-from django.utils import timezone
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.urls import reverse
 
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import EmailOTP, User
+from .deletion import start_account_deletion
+from .models import AccountDeletionJob, User
+from .google_auth import GoogleCertsUnavailable, GoogleTokenError, get_verifier
+from .otp import OTP_EXPIRED, OTP_LOCKED, OTP_OK, get_otp_backend
 from .utils import generate_otp
 from .tasks import send_otp_email_task  # Celery async task — never blocks worker
 
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
+from .permissions import IsAdminUserRole
+from .throttling import EmailRateThrottle, IPRateThrottle
+from .tokens import RefreshToken
 from django.contrib.auth import authenticate
+from redis.exceptions import RedisError
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class AdminLoginView(APIView):
@@ -74,6 +80,8 @@ class AdminLoginView(APIView):
 
 class SendEmailOTPView(APIView):
     permission_classes = []
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "otp_send"
 
     def post(self, request):
         email = request.data.get("email")
@@ -97,14 +105,14 @@ class SendEmailOTPView(APIView):
 
         otp = generate_otp()
 
-        EmailOTP.objects.update_or_create(
-            email=email,
-            defaults={
-                "otp": otp,
-                "is_verified": False,
-                "created_at": timezone.now()
-            }
-        )
+        try:
+            get_otp_backend().issue(email, otp)
+        except RedisError:
+            logger.exception("OTP store unavailable")
+            return Response(
+                {"error": "Could not send OTP right now, please try again"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
 
         # ✅ CRITICAL FIX: Use Celery — never call send_mail() directly in a request
         # handler. Synchronous SMTP hangs the gunicorn worker until the email server
@@ -133,6 +141,12 @@ class RefreshTokenView(APIView):
             return Response({
                 "access": access_token,
             }, status=status.HTTP_200_OK)
+        except RedisError:
+            logger.exception("Token blacklist unavailable")
+            return Response(
+                {"error": "Could not refresh the session right now, please try again"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {"error": "Invalid or expired refresh token", "detail": str(e)},
@@ -155,12 +169,18 @@ class LogoutView(APIView):
             
             try:
                 token = RefreshToken(refresh_token)
-                # ✅ FIX: token_blacklist must be in INSTALLED_APPS for this to work.
-                # It is now added to settings.py. This blacklists the token properly.
+                # Revoked in Redis until the token would have expired (accounts/tokens.py).
                 token.blacklist()
+            except RedisError:
+                # The refresh token would stay usable: tell the client to retry
+                logger.exception("Token blacklist unavailable")
+                return Response(
+                    {"error": "Could not log out right now, please try again"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             except Exception as e:
                 # Still return success — token will expire naturally via ACCESS_TOKEN_LIFETIME
-                print(f"Token blacklist error (non-fatal): {e}")
+                logger.warning("Token blacklist error (non-fatal): %s", e)
             
             return Response(
                 {"message": "Successfully logged out"},
@@ -175,6 +195,8 @@ class LogoutView(APIView):
 
 class VerifyEmailOTPView(APIView):
     permission_classes = []
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "otp_verify"
 
     def post(self, request):
         email = request.data.get("email")
@@ -198,15 +220,24 @@ class VerifyEmailOTPView(APIView):
             pass
         else:
             try:
-                otp_record = EmailOTP.objects.get(email=email, otp=otp)
-                if otp_record.is_expired():
-                    return Response(
-                        {"error": "OTP expired"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                otp_record.is_verified = True
-                otp_record.save()
-            except EmailOTP.DoesNotExist:
+                result = get_otp_backend().verify(email, otp)
+            except RedisError:
+                logger.exception("OTP store unavailable")
+                return Response(
+                    {"error": "Could not verify OTP right now, please try again"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            if result == OTP_EXPIRED:
+                return Response(
+                    {"error": "OTP expired"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if result == OTP_LOCKED:
+                return Response(
+                    {"error": "Too many attempts. Please request a new OTP"},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+            if result != OTP_OK:
                 return Response(
                     {"error": "Invalid OTP"},
                     status=status.HTTP_400_BAD_REQUEST
@@ -243,16 +274,18 @@ class GoogleLoginView(APIView):
             )
 
         try:
-            idinfo = id_token.verify_oauth2_token(
-                token,
-                google_requests.Request(),
-                settings.GOOGLE_CLIENT_ID
-            )
-        except ValueError:
+            idinfo = get_verifier().verify(token)
+        except GoogleTokenError:
             return Response(
                 {"error": "Invalid Google token"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except GoogleCertsUnavailable as exc:
+            logger.warning("Google sign-in unavailable: %s", exc)
+            return Response(
+                {"error": "Google sign-in is temporarily unavailable, please try again"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
 
         email = idinfo.get("email")
 
@@ -283,7 +316,7 @@ class GoogleLoginView(APIView):
         })
 
 class SelectRoleView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -317,7 +350,7 @@ class SelectRoleView(APIView):
 
 
 class CurrentUserView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -333,7 +366,7 @@ class CurrentUserView(APIView):
 
 
 class SwitchRoleView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -368,7 +401,7 @@ class SwitchRoleView(APIView):
         })
 
 class UpdateProfileView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def put(self, request):
@@ -405,15 +438,103 @@ class UpdateProfileView(APIView):
 
 
 class DeleteAccountView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def delete(self, request):
-        user = request.user
-        
-        # Additional cleanup if needed (e.g. invalidating tokens) can be done here.
-        # But for now, hard delete is enough since tokens will become invalid when user is gone.
-        user.delete()
+        # Disabled now, deleted in the background (accounts/deletion.py): the
+        # request takes the same time whatever the account owns.
+        job = start_account_deletion(request.user)
+
+        return Response(
+            {
+                "job_id": str(job.pk),
+                "status": job.status,
+                "status_url": reverse("account-deletion-status", args=[job.pk]),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class AccountDeletionStatusView(APIView):
+    """
+    Progress of an account deletion. Public: the account is already disabled,
+    so the unguessable job id is the only credential left.
+    """
+    permission_classes = []
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = "public"
+
+    def get(self, request, job_id):
+        job = AccountDeletionJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response(
+                {"error": "Deletion job not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            "job_id": str(job.pk),
+            "status": job.status,
+            "progress": job.progress,
+            "files_deleted": job.files_deleted,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        })
+
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
 
+class AdminSuppressionIngestView(APIView):
+    """
+    Bulk-add addresses to the email suppression list.
+
+    Accepts JSON ``{"emails": [...], "reason": "HARD_BOUNCE", "source": "..."}``
+    or a multipart ``file`` (CSV / plain text export from the mail provider,
+    one address per line, extra columns ignored).
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def post(self, request):
+        import csv
+        import io
+        from .models import EmailSuppression
+        from .suppression import suppress
+
+        reason = request.data.get("reason", "HARD_BOUNCE")
+        if reason not in dict(EmailSuppression.REASON_CHOICES):
+            return Response(
+                {"error": "Invalid reason"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        upload = request.FILES.get("file")
+        if upload:
+            rows = csv.reader(io.TextIOWrapper(upload.file, encoding="utf-8", errors="replace"))
+            emails = [
+                next((cell for cell in row if "@" in cell), "")
+                for row in rows
+            ]
+        else:
+            emails = request.data.get("emails") or []
+            if isinstance(emails, str):
+                emails = emails.split()
+            elif not isinstance(emails, list) or not all(isinstance(email, str) for email in emails):
+                return Response(
+                    {"error": "emails must be a list of strings"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        if not emails:
+            return Response(
+                {"error": "Provide a list of emails or a file"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        valid, created = suppress(emails, reason=reason, source=request.data.get("source", ""))
+
+        return Response({
+            "received": len(emails),
+            "valid": valid,
+            "created": created,
+        })
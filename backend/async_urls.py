@@ -0,0 +1,12 @@
+"""
+URL configuration of the ASGI read service (ASYNC_READ_VIEWS=true).
+
+Only the async read endpoints are routed; anything else that reaches this
+service gets a 404, since it runs without the session, CSRF and auth
+middleware the rest of the API relies on.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path("api/exhibitions/", include("exhibitions.async_urls")),
+]
@@ -0,0 +1,461 @@
+"""
+Cache-aside on the shared (Redis) cache.
+
+``get_or_compute(key, compute, ttl)`` returns the cached value for ``key`` or
+computes and stores it, with two guards against stampedes when a popular
+entry expires:
+
+* probabilistic early expiry ("XFetch"): each entry records how long it took
+  to compute, and a reader recomputes it *before* it expires with a
+  probability that rises as expiry approaches and with the compute cost —
+  so usually one request refreshes a hot entry while everyone else is still
+  served the current value,
+* single flight: recomputation takes a short lock (``cache.add``). Whoever
+  loses the race serves the previous value if there is one (entries are kept
+  STALE_GRACE past their logical expiry for exactly this) or waits briefly
+  for the winner, then computes itself as a last resort.
+
+Keys are namespaced and versioned — ``cache:<namespace>:v<n>:<digest>`` —
+and ``bump_namespace`` increments ``n``, which invalidates every entry of
+the namespace at once without scanning Redis; old entries simply age out.
+
+``cached_view(namespace, ttl)`` applies this to an ``APIView`` handler: the
+namespace may name URL kwargs (``"public-exhibition:{id}"``), so one object's
+entries can be invalidated without touching the rest; the key covers host,
+path, query string (and the user, with ``per_user=True``),
+only 200 responses are cached, and the response carries ``X-Cache: HIT`` /
+``MISS``. If Redis is unavailable everything is computed directly.
+``acached_view`` is the same for the async read views (exhibitions/
+async_views.py); it caches the rendered body, and an L1 hit is answered
+without leaving the event loop.
+
+In front of Redis sits a small per-process L1 (``cachetools.TTLCache``)
+holding recently used entries and namespace versions, so a hot key costs no
+network round trip at all. ``bump_namespace`` publishes the namespace on
+INVALIDATION_CHANNEL; a daemon thread in every process listens and drops
+that namespace from its L1 as the message arrives. The L1 is only used while
+the listener is subscribed (it is cleared on every (re)subscribe, since
+messages may have been missed), and L1_TTL bounds how stale it can get if a
+message is lost anyway.
+
+Lookups are counted per namespace (the part before any ``:``) and tier (``l1`` / ``l2`` hits and
+``miss``es). The listener thread flushes the counts to the CACHE_METRICS_KEY
+hash every few seconds; ``cache_metrics()`` reports totals and hit ratios.
+"""
+import functools
+import hashlib
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync, sync_to_async
+from cachetools import TTLCache
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+from backend.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+XFETCH_BETA = 1.0
+STALE_GRACE = 30          # seconds an entry outlives its logical expiry
+LOCK_TIMEOUT = 10         # seconds; longer than any sane recompute
+LOCK_WAIT = 2.0           # seconds a lock loser waits for the winner
+LOCK_POLL = 0.05
+
+L1_SIZE = 1024
+L1_TTL = 30               # seconds; bounds staleness if an invalidation is lost
+INVALIDATION_CHANNEL = "cache:invalidate"
+CACHE_METRICS_KEY = "cache:metrics"
+METRICS_FLUSH_INTERVAL = 5  # seconds
+TIERS = ("l1", "l2", "miss")
+
+
+# ---------------------------------------------------------------------------
+# L1 and its invalidation listener
+# ---------------------------------------------------------------------------
+
+_l1_entries = TTLCache(maxsize=L1_SIZE, ttl=L1_TTL)
+_l1_versions = TTLCache(maxsize=256, ttl=L1_TTL)
+_l1_lock = threading.Lock()
+_l1_generation = 0        # bumped on every drop, so a racing read never re-caches an old version
+
+_listener_pid = None
+_listener_ready = threading.Event()
+_listener_lock = threading.Lock()
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def _count(namespace, tier):
+    family = namespace.partition(":")[0]   # "public-exhibition:7" counts as "public-exhibition"
+    with _counts_lock:
+        _counts[f"{family}:{tier}"] += 1
+
+
+def _flush_metrics(force=False):
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    with _counts_lock:
+        counts = dict(_counts)
+        _counts.clear()
+    if not counts:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for field, n in counts.items():
+            pipe.hincrby(CACHE_METRICS_KEY, field, n)
+        pipe.execute()
+    except RedisError:
+        with _counts_lock:
+            _counts.update(counts)  # try again next time
+
+
+def _drop_namespace(namespace):
+    global _l1_generation
+    prefix = f"cache:{namespace}:"
+    with _l1_lock:
+        _l1_generation += 1
+        _l1_versions.pop(namespace, None)
+        for key in [key for key in _l1_entries if key.startswith(prefix)]:
+            _l1_entries.pop(key, None)
+
+
+def clear_l1():
+    """Drop this process's L1 (tests, reconnects)."""
+    global _l1_generation
+    with _l1_lock:
+        _l1_generation += 1
+        _l1_versions.clear()
+        _l1_entries.clear()
+
+
+def _listen():
+    backoff = 1
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            clear_l1()  # anything published while we were not listening is lost
+            _listener_ready.set()
+            backoff = 1
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None and message["type"] == "message":
+                    _drop_namespace(message["data"])
+                _flush_metrics()
+        except Exception as exc:
+            _listener_ready.clear()
+            logger.warning("Cache invalidation listener down (%s); L1 disabled, retrying in %ds.", exc, backoff)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def _l1_enabled():
+    """Start this process's listener if needed; the L1 is used only while it is subscribed."""
+    global _listener_pid
+    if _listener_pid != os.getpid():
+        with _listener_lock:
+            if _listener_pid != os.getpid():
+                # A forked worker inherits the parent's L1 but not its thread.
+                _listener_pid = os.getpid()
+                _listener_ready.clear()
+                clear_l1()
+                threading.Thread(target=_listen, name="cache-invalidation", daemon=True).start()
+    return _listener_ready.is_set()
+
+
+# ---------------------------------------------------------------------------
+# Namespaces and keys
+# ---------------------------------------------------------------------------
+
+def _namespace_key(namespace):
+    return f"cache:ns:{namespace}"
+
+
+def namespace_version(namespace):
+    use_l1 = _l1_enabled()
+    if use_l1:
+        with _l1_lock:
+            version = _l1_versions.get(namespace)
+            generation = _l1_generation
+        if version is not None:
+            return version
+
+    version = cache.get(_namespace_key(namespace), 1)
+    if use_l1:
+        with _l1_lock:
+            if generation == _l1_generation:
+                _l1_versions[namespace] = version
+    return version
+
+
+def bump_namespace(namespace):
+    """Invalidate every entry of ``namespace``, in Redis and in every process's L1."""
+    key = _namespace_key(namespace)
+    _drop_namespace(namespace)
+    try:
+        cache.add(key, 1, timeout=None)
+        cache.incr(key)
+        get_redis().publish(INVALIDATION_CHANNEL, namespace)
+    except (RedisError, ValueError) as exc:
+        logger.warning("Could not bump cache namespace %s: %s", namespace, exc)
+
+
+def bump_namespace_on_commit(namespace):
+    """``bump_namespace`` once the current transaction commits."""
+    from django.db import transaction
+
+    transaction.on_commit(lambda: bump_namespace(namespace))
+
+
+def make_key(namespace, *parts):
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f"cache:{namespace}:v{namespace_version(namespace)}:{digest}"
+
+
+def _fresh(entry, beta):
+    """XFetch: serve ``entry`` unless this reader is picked to recompute early."""
+    remaining = entry["expires"] - time.time()
+    return remaining > -entry["delta"] * beta * math.log(1.0 - random.random())
+
+
+def _store(key, compute, ttl):
+    start = time.monotonic()
+    value = compute()
+    entry = {"value": value, "delta": time.monotonic() - start, "expires": time.time() + ttl}
+    try:
+        cache.set(key, entry, timeout=ttl + STALE_GRACE)
+    except RedisError as exc:
+        logger.warning("Could not cache %s: %s", key, exc)
+    return entry
+
+
+def _wait_for(key):
+    """Poll for a lock winner's value for up to LOCK_WAIT seconds."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        try:
+            entry = cache.get(key)
+        except RedisError:
+            return None
+        if entry is not None:
+            return entry
+    return None
+
+
+def _l1_store(key, entry):
+    with _l1_lock:
+        _l1_entries[key] = entry
+
+
+def get_or_compute(key, compute, ttl, beta=XFETCH_BETA):
+    """Cached value of ``compute()`` under ``key`` (from ``make_key``; see module docstring)."""
+    namespace = key[len("cache:"):].rsplit(":", 2)[0]
+    use_l1 = _l1_enabled()
+    if use_l1:
+        with _l1_lock:
+            entry = _l1_entries.get(key)
+        if entry is not None and _fresh(entry, beta):
+            _count(namespace, "l1")
+            return entry["value"]
+
+    try:
+        entry = cache.get(key)
+    except RedisError as exc:
+        logger.warning("Cache unavailable (%s); computing %s directly.", exc, key)
+        return compute()
+    if entry is not None and _fresh(entry, beta):
+        if use_l1:
+            _l1_store(key, entry)
+        _count(namespace, "l2")
+        return entry["value"]
+
+    lock = f"{key}:lock"
+    try:
+        leader = cache.add(lock, 1, timeout=LOCK_TIMEOUT)
+    except RedisError:
+        return compute()
+    if not leader:
+        if entry is None:
+            entry = _wait_for(key)
+        if entry is not None:
+            _count(namespace, "l2")
+            return entry["value"]  # someone else is refreshing it
+
+    _count(namespace, "miss")
+    try:
+        entry = _store(key, compute, ttl)
+    finally:
+        if leader:
+            try:
+                cache.delete(lock)
+            except RedisError:
+                pass
+    if use_l1:
+        _l1_store(key, entry)
+    return entry["value"]
+
+
+def _peek_l1(namespace, parts, beta=XFETCH_BETA):
+    """An L1 hit for ``make_key(namespace, *parts)`` or None — memory only, no Redis."""
+    if not _l1_enabled():
+        return None
+    with _l1_lock:
+        version = _l1_versions.get(namespace)
+    if version is None:
+        return None
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    with _l1_lock:
+        entry = _l1_entries.get(f"cache:{namespace}:v{version}:{digest}")
+    if entry is None or not _fresh(entry, beta):
+        return None
+    _count(namespace, "l1")
+    return entry["value"]
+
+
+def cache_metrics():
+    """Lookups per tier and hit ratios, overall and per namespace (all processes)."""
+    _flush_metrics(force=True)
+    raw = get_redis().hgetall(CACHE_METRICS_KEY)
+
+    by_namespace = {}
+    for field, n in raw.items():
+        namespace, _, tier = field.rpartition(":")
+        if tier in TIERS:
+            by_namespace.setdefault(namespace, dict.fromkeys(TIERS, 0))[tier] += int(n)
+
+    def ratios(counts):
+        total = sum(counts.values())
+        past_l1 = counts["l2"] + counts["miss"]
+        return dict(
+            counts,
+            lookups=total,
+            l1_hit_ratio=round(counts["l1"] / total, 4) if total else 0.0,
+            l2_hit_ratio=round(counts["l2"] / past_l1, 4) if past_l1 else 0.0,
+            hit_ratio=round((counts["l1"] + counts["l2"]) / total, 4) if total else 0.0,
+        )
+
+    overall = dict.fromkeys(TIERS, 0)
+    for counts in by_namespace.values():
+        for tier in TIERS:
+            overall[tier] += counts[tier]
+    return {
+        "overall": ratios(overall),
+        "namespaces": {namespace: ratios(counts) for namespace, counts in sorted(by_namespace.items())},
+    }
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def cached_view(namespace, ttl, per_user=False):
+    """Cache a DRF ``APIView`` handler's 200 responses for ``ttl`` seconds."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            from rest_framework.response import Response
+
+            ns = namespace.format(**kwargs)
+            parts = [request.get_host(), request.path, sorted(request.GET.lists())]
+            if per_user:
+                parts.append(getattr(request.user, "pk", None))
+            hit = True
+
+            def compute():
+                nonlocal hit
+                hit = False
+                response = handler(self, request, *args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    raise _Uncacheable(response)
+                return response.data
+
+            try:
+                key = make_key(ns, *parts)
+            except RedisError as exc:
+                logger.warning("Cache unavailable (%s); serving %s uncached.", exc, request.path)
+                return handler(self, request, *args, **kwargs)
+            try:
+                data = get_or_compute(key, compute, ttl)
+            except _Uncacheable as exc:
+                return exc.response
+            response = Response(data)
+            response["X-Cache"] = "HIT" if hit else "MISS"
+            return response
+
+        return wrapper
+    return decorator
+
+
+def acached_view(namespace, ttl, per_user=False):
+    """``cached_view`` for an async handler returning an ``HttpResponse``; caches the body."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(self, request, *args, **kwargs):
+            from django.http import HttpResponse
+
+            ns = namespace.format(**kwargs)
+            # "body" keeps these apart from cached_view's entries (serializer data)
+            # for the same URL: both deployments share Redis.
+            parts = [request.get_host(), request.path, sorted(request.GET.lists()), "body"]
+            if per_user:
+                parts.append(getattr(request.user, "pk", None))
+
+            def respond(value, cache_status):
+                body, content_type = value
+                response = HttpResponse(body, content_type=content_type)
+                response["X-Cache"] = cache_status
+                return response
+
+            value = _peek_l1(ns, parts)
+            if value is not None:
+                return respond(value, "HIT")
+
+            hit = True
+
+            async def acompute():
+                nonlocal hit
+                hit = False
+                response = await handler(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise _Uncacheable(response)
+                return response.content, response["Content-Type"]
+
+            def lookup():
+                # The Redis round trips and locking stay off the event loop; a
+                # miss computes back on it, and its queries then run on this
+                # request's thread (never a pool thread holding a connection).
+                try:
+                    key = make_key(ns, *parts)
+                except RedisError as exc:
+                    logger.warning("Cache unavailable (%s); serving %s uncached.", exc, request.path)
+                    return async_to_sync(acompute)()
+                return get_or_compute(key, async_to_sync(acompute), ttl)
+
+            try:
+                value = await sync_to_async(lookup)()
+            except _Uncacheable as exc:
+                return exc.response
+            return respond(value, "HIT" if hit else "MISS")
+
+        return wrapper
+    return decorator
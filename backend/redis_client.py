@@ -0,0 +1,28 @@
+"""
+Shared Redis client for application features (mail throttling, caches, OTPs…).
+
+redis-py clients are thread-safe and their connection pools reset themselves
+after a fork, so one lazily created client per process is enough.
+"""
+import threading
+
+import redis
+from django.conf import settings
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=30,
+                )
+    return _client
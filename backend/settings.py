@@ -48,8 +48,8 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
 
-    # ✅ FIX: token_blacklist MUST be here or logout crashes with AttributeError
-    # This was causing the "OutstandingToken has no attribute 'objects'" error in logs
+    # Optional since revocations moved to Redis (accounts/tokens.py); kept so the
+    # hourly prune job can drain the existing rows and for JWT_BLACKLIST_DB.
     'rest_framework_simplejwt.token_blacklist',
 
     'accounts',
@@ -89,6 +89,23 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# The ASGI deployment (web-async in docker-compose.yml) serves the hot read
+# endpoints from exhibitions/async_views.py. Its URLconf (backend/async_urls.py)
+# routes only those JWT / anonymous API reads — static files, the admin site
+# and everything session-based 404 there and stay with ``web`` — so it drops
+# the middleware they need: under ASGI WhiteNoise (sync-only) and each
+# process_request / process_response of the others cost a hop to a thread.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False").lower() == "true"
+if ASYNC_READ_VIEWS:
+    ROOT_URLCONF = 'backend.async_urls'
+    MIDDLEWARE = [
+        'corsheaders.middleware.CorsMiddleware',
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    ]
+    SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]  # admin is on ``web``
+
 
 # if os.name == 'nt' or os.getenv("USE_SQLITE") == "True":
 #     DATABASES = {
@@ -109,10 +126,24 @@ DATABASES = {
         # ✅ FIX: Reuse DB connections across requests instead of opening a new one
         # every time. Without this, after days of traffic the pg_stat_activity
         # connection count grows and queries slow down, contributing to worker hangs.
-        "CONN_MAX_AGE": 60,  # seconds — reuse connections for up to 1 minute
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),  # seconds — reuse connections for up to 1 minute
     }
 }
 
+# Under ASGI every request runs its ORM work in a thread of its own, so the
+# per-thread persistent connections above are never reused and each request
+# would open a new one. DB_POOL=true (the web-async service) replaces them
+# with a psycopg 3 pool shared by all threads of the worker process.
+if os.getenv("DB_POOL", "False").lower() == "true":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0  # Django requires 0 with a pool
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),  # per worker process
+            "timeout": 10,
+        },
+    }
+
 
 
 # Password validation
@@ -162,14 +193,30 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
+    # Sliding-window limits per view scope and key kind (accounts/throttling.py).
+    "DEFAULT_THROTTLE_RATES": {
+        "otp_send_ip": "20/h",
+        "otp_send_email": "5/15m",
+        "otp_verify_ip": "60/h",
+        "otp_verify_email": "10/15m",
+        "public_ip": "120/m",
+        "visitor_register_user": "10/m",
+        "visitor_register_ip": "60/m",
+    },
+    # gunicorn only listens on 127.0.0.1 behind the host's reverse proxy, so the
+    # client IP is the last X-Forwarded-For hop.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "1")),
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
+# Revoked refresh tokens live in Redis (accounts/tokens.py). Set to True to
+# also record logins/revocations in the token_blacklist tables.
+JWT_BLACKLIST_DB = False
 
 EMAIL_BACKEND = "accounts.email_backend.UnverifiedSSLEmailBackend"
 # EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
@@ -181,17 +228,66 @@ EMAIL_USE_SSL = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
+# Pooled SMTP sessions shared by all mail tasks in a worker (accounts/smtp_pool.py).
+# A timeout is required so a half-dead pooled socket can never hang a task.
+EMAIL_TIMEOUT = 30
+EMAIL_POOL_MAX_CONNECTIONS = 2
+EMAIL_POOL_IDLE_TIMEOUT = 120          # seconds before an idle session is dropped
+EMAIL_POOL_HEALTHCHECK_INTERVAL = 30   # NOOP a session idle longer than this
+
+# Outbound mail rate limits per provider (token bucket shared by all workers via
+# Redis, see accounts/mail_throttle.py): `rate` messages every `per` seconds,
+# with bursts of up to `burst` messages.
+EMAIL_PROVIDER = os.getenv("EMAIL_PROVIDER", "default")
+EMAIL_RATE_LIMITS = {
+    "default": {"rate": 60, "per": 60, "burst": 10},
+}
+EMAIL_THROTTLE_MAX_WAIT = 5  # seconds a task may block for tokens before it is rescheduled
+
 DEFAULT_FROM_EMAIL = "NearEstate <contact@nearestate.com>"
 
+# Email login codes (accounts/otp.py). DatabaseOTPBackend is the no-Redis fallback.
+OTP_BACKEND = os.getenv("OTP_BACKEND", "accounts.otp.RedisOTPBackend")
+OTP_TTL_SECONDS = 300
+OTP_MAX_ATTEMPTS = 5
+
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+# Signing certificates for Google ID tokens, cached per their max-age
+# (accounts/google_auth.py).
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+GOOGLE_CERTS_TIMEOUT = 5  # seconds
 
 INSTALLED_APPS += ["django_celery_beat"]
 
-CELERY_BROKER_URL = "redis://redis:6379/0"
+# Application-level Redis (backend/redis_client.py). Short timeouts so a slow
+# Redis degrades a feature instead of hanging a gunicorn thread.
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_SOCKET_TIMEOUT = 2  # seconds
+
+# Shared cache (cached JWT principals, …). Redis so every gunicorn/celery
+# process sees the same entries and invalidations.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "OPTIONS": {
+            "socket_timeout": REDIS_SOCKET_TIMEOUT,
+            "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+        },
+    }
+}
+
+CELERY_BROKER_URL = REDIS_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 
-CELERY_RESULT_BACKEND = "redis://redis:6379/0"
+CELERY_RESULT_BACKEND = REDIS_URL
+
+# Exports can run for minutes: keep them off the default worker (see
+# exhibitions/utils/export_jobs.py and the celery-exports service).
+CELERY_TASK_ROUTES = {
+    "exhibitions.utils.tasks.run_export_job": {"queue": "exports"},
+}
 
 # Celery Beat Schedule
 from celery.schedules import crontab
@@ -201,6 +297,30 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'exhibitions.utils.tasks.deactivate_expired_events',
         'schedule': crontab(hour=0, minute=0),
     },
+    'purge-expired-otps-hourly': {
+        'task': 'accounts.tasks.purge_expired_otps_task',
+        'schedule': crontab(minute=15),
+    },
+    'prune-outstanding-tokens-hourly': {
+        'task': 'accounts.tasks.prune_outstanding_tokens_task',
+        'schedule': crontab(minute=45),
+    },
+    'reconcile-dashboard-stats-nightly': {
+        'task': 'exhibitions.utils.tasks.reconcile_dashboard_stats',
+        'schedule': crontab(hour=0, minute=30),  # after the deactivation job
+    },
+    'update-exhibition-rollups': {
+        'task': 'exhibitions.utils.tasks.update_exhibition_rollups',
+        'schedule': 300.0,  # seconds
+    },
+    'purge-expired-exports-hourly': {
+        'task': 'exhibitions.utils.tasks.purge_expired_exports',
+        'schedule': crontab(minute=0),  # also fails stale jobs, so runs more often than the TTL
+    },
+    'dispatch-email-outbox': {
+        'task': 'exhibitions.utils.tasks.dispatch_email_outbox',
+        'schedule': 10.0,  # seconds
+    },
 }
 
 LOGGING = {
@@ -3,7 +3,7 @@ from .models import (
     ExhibitorProfile, Exhibition, VisitorRegistration, ExhibitorApplication,
     Property, PropertyImage, ExhibitionImage,
     EventRecap, RecapImage, RecapVideo, RecapSocialLink,
-    ExhibitionPriceTier,
+    ExhibitionPriceTier, EmailOutbox, ExportJob,
 )
 
 admin.site.register(ExhibitorProfile)
@@ -17,4 +17,6 @@ admin.site.register(EventRecap)
 admin.site.register(RecapImage)
 admin.site.register(RecapVideo)
 admin.site.register(RecapSocialLink)
-admin.site.register(ExhibitionPriceTier)
\ No newline at end of file
+admin.site.register(ExhibitionPriceTier)
+admin.site.register(EmailOutbox)
+admin.site.register(ExportJob)
\ No newline at end of file
@@ -7,3 +7,4 @@ class ExhibitionsConfig(AppConfig):
 
     def ready(self):
         import exhibitions.utils.tasks
+        import exhibitions.signals
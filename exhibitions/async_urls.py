@@ -0,0 +1,9 @@
+from django.urls import path
+from .async_views import PublicExhibitionListView, PublicExhibitionDetailView, PublicExhibitorsByExhibitionView, VisitorMyRegistrationsView
+
+urlpatterns = [
+    path("public/exhibitions/", PublicExhibitionListView.as_view()),
+    path("public/exhibitions/<int:id>/", PublicExhibitionDetailView.as_view()),
+    path("public/exhibitions/<int:id>/exhibitors/", PublicExhibitorsByExhibitionView.as_view()),
+    path("visitor/my-registrations/", VisitorMyRegistrationsView.as_view()),
+]
@@ -0,0 +1,239 @@
+"""
+Async versions of the high-traffic read endpoints, for the ASGI deployment.
+
+Under gthread gunicorn each of these requests holds one of the worker's
+threads for as long as its Postgres round trips take. Served by
+``backend.asgi`` under uvicorn workers (the ``web-async`` service in
+docker-compose.yml, with ``ASYNC_READ_VIEWS=true``), the same URLs are routed
+by ``exhibitions/async_urls.py`` to the views below, and nothing else is: they
+query through the async ORM (``aaggregate``, ``async for``, ``aget``), so a worker
+keeps accepting requests while queries are in flight.
+
+DRF has no async views, so these are plain Django views producing the same
+JSON as their DRF counterparts (exhibitions/views.py) and applying the same
+policy up front: the ``public`` IP throttle, or ``CachedJWTAuthentication``
+for "my registrations". Both are sync and run through ``sync_to_async``;
+the throttle only talks to Redis and so runs on the shared pool rather than
+the request's database thread. Responses are cached through
+``acached_view`` under the same namespaces as the sync views, so the signals
+that invalidate one invalidate both.
+
+Serializers never query here: everything they touch is prefetched, and
+Django raises ``SynchronousOnlyOperation`` if one ever tries.
+
+Under ASGI every request runs its sync work in a thread of its own, so
+persistent connections cannot be reused across requests; the async service
+takes its connections from a process-wide pool instead (``DB_POOL=true``).
+``manage.py bench_read_views`` compares the two deployments.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+
+from accounts.authentication import CachedJWTAuthentication
+from accounts.throttling import IPRateThrottle
+from backend.caching import acached_view
+from exhibitions.signals import PUBLIC_EXHIBITION_CACHE, PUBLIC_EXHIBITIONS_CACHE, PUBLIC_EXHIBITORS_CACHE
+
+from .models import Exhibition, ExhibitorApplication, VisitorRegistration
+from .serializers import ExhibitionSerializer
+from .views import pass_image_url
+
+EXHIBITION_PREFETCH = (
+    "images", "price_tiers", "schedules",
+    "recap", "recap__images", "recap__videos", "recap__social_links",
+)
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status,
+        content_type="application/json", headers=headers,
+    )
+
+
+class AsyncReadView(View):
+    """
+    Base for the async views: GET only, IP-throttled on ``throttle_scope``
+    and/or authenticated with ``CachedJWTAuthentication`` before the handler
+    runs; errors have DRF's ``{"detail": ...}`` shape.
+    """
+    http_method_names = ["get", "head", "options"]
+    throttle_scope = None
+    require_auth = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        denied = await self.check_request(request)
+        if denied is not None:
+            return denied
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404 as exc:
+            return json_response({"detail": str(exc)}, status=status.HTTP_404_NOT_FOUND)
+
+    async def check_request(self, request):
+        if self.throttle_scope:
+            throttle = IPRateThrottle()
+            if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, self):
+                exc = exceptions.Throttled(throttle.wait())
+                return json_response(
+                    {"detail": exc.detail}, status=exc.status_code,
+                    headers={"Retry-After": str(int(exc.wait))} if exc.wait is not None else None,
+                )
+
+        if self.require_auth:
+            authenticator = CachedJWTAuthentication()
+            try:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.AuthenticationFailed as exc:
+                detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+                return json_response(
+                    detail, status=exc.status_code,
+                    headers={"WWW-Authenticate": authenticator.authenticate_header(request)},
+                )
+            if result is None:
+                return json_response(
+                    {"detail": exceptions.NotAuthenticated.default_detail},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                    headers={"WWW-Authenticate": authenticator.authenticate_header(request)},
+                )
+            request.user, request.auth = result
+        return None
+
+
+class PublicExhibitionListView(AsyncReadView):
+    throttle_scope = "public"
+
+    @acached_view(PUBLIC_EXHIBITIONS_CACHE, ttl=60)
+    async def get(self, request):
+        page = int(request.GET.get("page", 1))
+        page_size = int(request.GET.get("limit", 10))
+        status_filter = request.GET.get("status", "all")
+        query = request.GET.get("search", "")
+
+        today = timezone.localdate()
+        ongoing = Q(start_date__lte=today, end_date__gte=today)
+        upcoming = Q(start_date__gt=today)
+        past = Q(end_date__lt=today)
+
+        base_query = Exhibition.objects.filter(is_active=True)
+        if query:
+            base_query = base_query.filter(
+                Q(name__icontains=query) |
+                Q(state__icontains=query) |
+                Q(city__icontains=query) |
+                Q(country__icontains=query)
+            )
+
+        # One round trip for the four tab counts (the sync view makes four).
+        counts = await base_query.aaggregate(
+            all=Count("id"),
+            ongoing=Count("id", filter=ongoing),
+            upcoming=Count("id", filter=upcoming),
+            past=Count("id", filter=past),
+        )
+
+        if status_filter == "ongoing":
+            exhibitions = base_query.filter(ongoing).order_by("start_date")
+        elif status_filter == "upcoming":
+            exhibitions = base_query.filter(upcoming).order_by("start_date")
+        elif status_filter == "past":
+            exhibitions = base_query.filter(past).order_by("-start_date")
+        else:
+            status_filter = "all"
+            exhibitions = base_query.annotate(
+                status_priority=Case(
+                    When(ongoing, then=Value(1)),
+                    When(upcoming, then=Value(2)),
+                    When(past, then=Value(3)),
+                    default=Value(3),
+                    output_field=IntegerField(),
+                )
+            ).order_by("status_priority", "start_date")
+
+        start = (page - 1) * page_size
+        exhibitions_page = [
+            exhibition async for exhibition in
+            exhibitions.prefetch_related(*EXHIBITION_PREFETCH)[start:start + page_size]
+        ]
+
+        return json_response({
+            "data": ExhibitionSerializer(exhibitions_page, many=True, context={"request": request}).data,
+            "total": counts[status_filter],
+            "page": page,
+            "limit": page_size,
+            "counts": counts,
+        })
+
+
+class PublicExhibitionDetailView(AsyncReadView):
+    throttle_scope = "public"
+
+    @acached_view(PUBLIC_EXHIBITION_CACHE, ttl=300)
+    async def get(self, request, id):
+        exhibition = await aget_object_or_404(
+            Exhibition.objects.prefetch_related(*EXHIBITION_PREFETCH).filter(is_active=True), id=id,
+        )
+        return json_response(ExhibitionSerializer(exhibition, context={"request": request}).data)
+
+
+class PublicExhibitorsByExhibitionView(AsyncReadView):
+    throttle_scope = "public"
+
+    @acached_view(PUBLIC_EXHIBITORS_CACHE, ttl=300)
+    async def get(self, request, id):
+        rows = (
+            ExhibitorApplication.objects
+            .filter(exhibition_id=id, status="APPROVED")
+            .values(
+                "user_id", "user__username", "booth_number",
+                "user__exhibitorprofile__id", "user__exhibitorprofile__company_name",
+                "user__exhibitorprofile__business_type", "user__exhibitorprofile__council_area",
+                "user__exhibitorprofile__contact_number",
+            )
+        )
+
+        data = []
+        async for row in rows:
+            has_profile = row["user__exhibitorprofile__id"] is not None
+            data.append({
+                "id": row["user_id"],
+                "company_name": (
+                    row["user__exhibitorprofile__company_name"] if has_profile else row["user__username"]
+                ),
+                "business_type": row["user__exhibitorprofile__business_type"] if has_profile else "N/A",
+                "council_area": row["user__exhibitorprofile__council_area"] if has_profile else "N/A",
+                "contact_number": row["user__exhibitorprofile__contact_number"] if has_profile else "N/A",
+                "booth_number": row["booth_number"],
+            })
+
+        return json_response(data)
+
+
+class VisitorMyRegistrationsView(AsyncReadView):
+    require_auth = True
+
+    async def get(self, request):
+        regs = VisitorRegistration.objects.filter(user_id=request.user.pk).select_related("exhibition")
+
+        data = []
+        async for r in regs:
+            data.append({
+                "event_id": r.exhibition.id,
+                "event_name": r.exhibition.name,
+                "start_date": r.exhibition.start_date,
+                "end_date": r.exhibition.end_date,
+                "city": r.exhibition.city,
+                "venue": r.exhibition.venue,
+                "is_active": r.exhibition.is_active,
+                "qr_code": str(r.qr_code),
+                "qr_image_url": pass_image_url(request, r.qr_code),
+                "is_checked_in": r.is_checked_in,
+            })
+
+        return json_response(data)
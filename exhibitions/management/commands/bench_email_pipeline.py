@@ -0,0 +1,216 @@
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import resource
+import time
+import uuid
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from accounts import smtp_pool
+from accounts.smtp_sink import SMTPSink
+from exhibitions.utils.tasks import (
+    INVITATION_CHUNK_SIZE, send_event_email, send_exhibitor_approval_email,
+    send_visitor_qr_email,
+)
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+PIPELINES = ("event", "visitor_qr", "exhibitor_approval")
+
+EXHIBITION = {
+    'name': 'NearEstate Property Expo',
+    'start_date': '2026-11-01',
+    'end_date': '2026-11-03',
+    'venue': 'Convention Centre',
+    'city': 'Melbourne',
+    'state': 'VIC',
+    'country': 'Australia',
+}
+
+
+def _rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _drive(pipeline, count):
+    """Run ``count`` sends through ``pipeline`` exactly as a worker would."""
+    emails = (f"bench{i}@example.com" for i in range(count))
+
+    if pipeline == "event":
+        # Same chunking as fan_out_event_invitations
+        chunk = []
+        for email in emails:
+            chunk.append(email)
+            if len(chunk) == INVITATION_CHUNK_SIZE:
+                send_event_email("Invitation: NearEstate Property Expo", EXHIBITION, chunk)
+                chunk = []
+        if chunk:
+            send_event_email("Invitation: NearEstate Property Expo", EXHIBITION, chunk)
+
+    elif pipeline == "visitor_qr":
+        for i, email in enumerate(emails):
+            send_visitor_qr_email(
+                email=email,
+                visitor_name=f"visitor{i}",
+                exhibition_name=EXHIBITION['name'],
+                exhibition_venue=EXHIBITION['venue'],
+                exhibition_city=EXHIBITION['city'],
+                start_date=EXHIBITION['start_date'],
+                end_date=EXHIBITION['end_date'],
+                qr_code_uuid=str(uuid.UUID(int=i)),
+            )
+
+    elif pipeline == "exhibitor_approval":
+        for i, email in enumerate(emails):
+            send_exhibitor_approval_email(
+                email=email,
+                exhibitor_name=f"exhibitor{i}",
+                exhibition_name=EXHIBITION['name'],
+                booth_number=i % 500 + 1,
+            )
+
+
+def _wait_for_result(child, results, label):
+    """The child's result; CommandError if it dies (exception, OOM kill) without one."""
+    while True:
+        try:
+            run = results.get(timeout=1)
+            break
+        except queue_module.Empty:
+            if child.is_alive():
+                continue
+            try:  # it may have exited right after putting its result
+                run = results.get(timeout=1)
+                break
+            except queue_module.Empty:
+                child.join()
+                raise CommandError(f"{label}: worker exited with code {child.exitcode} without a result")
+    child.join()
+    if child.exitcode != 0:
+        raise CommandError(f"{label}: worker exited with code {child.exitcode}")
+    return run
+
+
+def _worker(pipeline, count, backend_kwargs, results):
+    """Child process: one pipeline run with its own pool, caches and peak RSS."""
+    baseline = _rss_mb()
+    with override_settings(EMAIL_BACKEND=SMTP_BACKEND):
+        # Unthrottled pool pointed at the sink: measure the pipeline, not the rate limit.
+        smtp_pool._pool = smtp_pool.SMTPConnectionPool(backend=SMTP_BACKEND, **backend_kwargs)
+        smtp_pool._pool_pid = os.getpid()
+        started = time.perf_counter()
+        _drive(pipeline, count)
+        elapsed = time.perf_counter() - started
+        smtp_pool._pool.close_all()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    results.put({
+        "seconds": elapsed,
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak, 1),
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the invitation, visitor-QR and exhibitor-approval email tasks "
+        "against a local SMTP sink and report throughput, worker peak RSS and "
+        "bytes on the wire as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000",
+                            help="Comma-separated recipient counts.")
+        parser.add_argument("--pipelines", default=",".join(PIPELINES),
+                            help=f"Comma-separated subset of: {', '.join(PIPELINES)}.")
+        parser.add_argument("--connect-delay-ms", type=float, default=20.0,
+                            help="Simulated TLS handshake + AUTH cost per new session.")
+        parser.add_argument("--output", default="email_pipeline_bench.json",
+                            help="Where to write the JSON results.")
+        parser.add_argument("--compare", help="Earlier results file to compare msg/s against.")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",") if size]
+        pipelines = [p for p in options["pipelines"].split(",") if p]
+        unknown = set(pipelines) - set(PIPELINES)
+        if unknown:
+            raise CommandError(f"Unknown pipeline(s): {', '.join(sorted(unknown))}")
+
+        baseline = {}
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = {
+                    (r["pipeline"], r["recipients"]): r for r in json.load(f)["results"]
+                }
+
+        ctx = multiprocessing.get_context("fork")
+        results = []
+
+        with SMTPSink(connect_delay=options["connect_delay_ms"] / 1000.0) as sink:
+            backend_kwargs = {
+                "host": sink.host,
+                "port": sink.port,
+                "username": "",
+                "password": "",
+                "use_ssl": False,
+                "use_tls": False,
+            }
+            for pipeline in pipelines:
+                for size in sizes:
+                    sink.reset()
+                    connections.close_all()  # never share a DB socket with the child
+                    queue = ctx.Queue()
+                    child = ctx.Process(target=_worker, args=(pipeline, size, backend_kwargs, queue))
+                    child.start()
+                    run = _wait_for_result(child, queue, f"{pipeline} x {size}")
+
+                    row = {
+                        "pipeline": pipeline,
+                        "recipients": size,
+                        "delivered": sink.messages,
+                        "seconds": round(run["seconds"], 3),
+                        "messages_per_sec": round(sink.messages / run["seconds"], 1),
+                        "baseline_rss_mb": run["baseline_rss_mb"],
+                        "peak_rss_mb": run["peak_rss_mb"],
+                        "smtp_connections": sink.connections,
+                        "bytes_in": sink.bytes_in,
+                        "bytes_out": sink.bytes_out,
+                        "bytes_per_message": round(sink.bytes_in / max(sink.messages, 1)),
+                    }
+                    results.append(row)
+                    self._report(row, baseline.get((pipeline, size)))
+
+        report = {
+            "generated_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "connect_delay_ms": options["connect_delay_ms"],
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"results written to {options['output']}"))
+
+    def _report(self, row, previous):
+        line = (
+            f"{row['pipeline']:<19} {row['recipients']:>7} rcpts: "
+            f"{row['messages_per_sec']:>8.1f} msg/s, peak RSS {row['peak_rss_mb']:.1f} MB, "
+            f"{row['bytes_in'] / 1e6:.1f} MB on the wire ({row['bytes_per_message']} B/msg)"
+        )
+        if row["delivered"] != row["recipients"]:
+            line += f" — only {row['delivered']} delivered"
+        if previous:
+            change = row["messages_per_sec"] / previous["messages_per_sec"] - 1
+            style = self.style.SUCCESS if change >= -0.05 else self.style.ERROR
+            line += " " + style(f"[{change:+.0%} vs baseline]")
+        self.stdout.write(line)
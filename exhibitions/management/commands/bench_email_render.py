@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from exhibitions.utils.email_render import clear_caches, render_personalised
+
+EXHIBITION = {
+    'exhibition_name': 'NearEstate Property Expo',
+    'exhibition_venue': 'Convention Centre',
+    'exhibition_city': 'Melbourne',
+    'start_date': '2026-11-01',
+    'end_date': '2026-11-03',
+    'has_qr_image': False,
+}
+
+
+def _message(email, html):
+    msg = EmailMultiAlternatives(
+        subject="Your Entry Pass",
+        body="Please view this email in an HTML-compatible email client.",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
+    msg.attach_alternative(html, "text/html")
+    return msg.message().as_bytes()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure visitor-pass emails rendered per second with a fresh "
+        "render_to_string per message versus the per-process render cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=5000)
+
+    def _run(self, count, render, build_message):
+        started = time.perf_counter()
+        for i in range(count):
+            personal = {'visitor_name': f'visitor{i}', 'qr_code_uuid': f'00000000-0000-0000-0000-{i:012d}'}
+            html = render(personal)
+            if build_message:
+                _message(f'visitor{i}@example.com', html)
+        return count / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        template = 'emails/visitor_registration.html'
+
+        def uncached(personal):
+            return render_to_string(template, {**EXHIBITION, **personal})
+
+        def cached(personal):
+            return render_personalised(template, EXHIBITION, personal)
+
+        self.stdout.write(f"messages: {count}")
+        for label, build_message in (("template render", False), ("render + MIME build", True)):
+            before = self._run(count, uncached, build_message)
+            clear_caches()
+            after = self._run(count, cached, build_message)
+            self.stdout.write(
+                f"{label:20}: render_to_string {before:10.1f} msg/s | "
+                f"render cache {after:10.1f} msg/s | {after / before:.1f}x"
+            )
@@ -0,0 +1,125 @@
+import statistics
+import threading
+import time
+from pathlib import Path
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    "/api/exhibitions/public/exhibitions/",
+    "/api/exhibitions/public/exhibitions/?status=upcoming",
+]
+
+
+def _rss_kb(pid):
+    """Resident memory of ``pid`` and all its descendants (gunicorn master + workers), in kB."""
+    total = 0
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        proc = Path(f"/proc/{pid}")
+        try:
+            for line in (proc / "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+            for task in (proc / "task").iterdir():
+                pending.extend(int(child) for child in (task / "children").read_text().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the read endpoints of two running deployments in turn — gthread "
+        "(backend.wsgi) and uvicorn (backend.asgi, ASYNC_READ_VIEWS=true) — and "
+        "report requests/sec and p50/p99 latency side by side. Give the gunicorn "
+        "master pids to check both run at equal memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--gthread", default="http://127.0.0.1:8000", help="Base URL of the gthread service")
+        parser.add_argument("--asgi", default="http://127.0.0.1:8002", help="Base URL of the ASGI service")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help="Path to request (repeatable; requests rotate through them)")
+        parser.add_argument("--concurrency", type=int, default=32, help="Client threads")
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds per deployment")
+        parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds first")
+        parser.add_argument("--token", default="", help="Bearer token, for visitor/my-registrations/")
+        parser.add_argument("--gthread-pid", type=int, help="gunicorn master pid of the gthread service")
+        parser.add_argument("--asgi-pid", type=int, help="gunicorn master pid of the ASGI service")
+
+    def _load(self, base_url, paths, concurrency, duration, headers):
+        latencies, errors = [], []
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def client(offset):
+            session = requests.Session()
+            session.headers.update(headers)
+            mine, failed, i = [], 0, offset
+            while time.monotonic() < deadline:
+                url = base_url + paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    ok = session.get(url, timeout=30).status_code == 200
+                except requests.RequestException:
+                    ok = False
+                if ok:
+                    mine.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, sum(errors), time.monotonic() - started
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or DEFAULT_PATHS
+        headers = {"Authorization": f"Bearer {options['token']}"} if options["token"] else {}
+        targets = [
+            ("gthread", options["gthread"].rstrip("/"), options["gthread_pid"]),
+            ("asgi", options["asgi"].rstrip("/"), options["asgi_pid"]),
+        ]
+
+        self.stdout.write(
+            f"paths: {', '.join(paths)} | concurrency {options['concurrency']} | "
+            f"{options['duration']:.0f}s each"
+        )
+        results = []
+        for label, base_url, pid in targets:
+            try:
+                requests.get(base_url + paths[0], headers=headers, timeout=10)
+            except requests.RequestException as exc:
+                raise CommandError(f"{label} service at {base_url} is not reachable: {exc}")
+            self._load(base_url, paths, options["concurrency"], options["warmup"], headers)
+            latencies, errors, elapsed = self._load(
+                base_url, paths, options["concurrency"], options["duration"], headers,
+            )
+            if not latencies:
+                raise CommandError(f"{label}: no successful responses ({errors} errors)")
+            rss = f"{_rss_kb(pid) / 1024:8.0f} MB" if pid else "       n/a"
+            results.append((label, len(latencies) / elapsed, latencies, errors, rss))
+
+        self.stdout.write(f"{'':8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'RSS':>11}")
+        for label, rate, latencies, errors, rss in results:
+            self.stdout.write(
+                f"{label:8} {rate:9.1f} {statistics.median(latencies) * 1000:8.1f} "
+                f"{_percentile(latencies, 99) * 1000:8.1f} {errors:7d} {rss}"
+            )
+        (_, before, *_), (_, after, *_) = results
+        self.stdout.write(f"asgi / gthread throughput: {after / before:.2f}x")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from exhibitions.models import VisitorRegistration
+from exhibitions.utils.qr_passes import store_pass_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render QR pass images (PNG + SVG) for registrations that do not "
+        "have them yet, e.g. after a bulk import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exhibition", type=int, help="Only this exhibition id.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render even registrations that already have pass images.",
+        )
+
+    def handle(self, *args, **options):
+        regs = VisitorRegistration.objects.only("id", "qr_code", "qr_pass_hash")
+        if options["exhibition"]:
+            regs = regs.filter(exhibition_id=options["exhibition"])
+        if not options["force"]:
+            regs = regs.filter(qr_pass_hash="")
+
+        total = regs.count()
+        done = failed = 0
+        for processed, registration in enumerate(regs.iterator(chunk_size=options["batch_size"]), 1):
+            if options["force"]:
+                registration.qr_pass_hash = ""
+            try:
+                store_pass_images(registration)
+                done += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"registration {registration.pk}: {exc}")
+            if processed % options["batch_size"] == 0:
+                self.stdout.write(f"{processed}/{total} processed ({failed} failed)")
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {done} pass(es), {failed} failed."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exhibitions', '0015_alter_exhibitorapplication_payment_screenshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('VISITOR_QR', 'Visitor QR pass'), ('EXHIBITOR_APPROVAL', 'Exhibitor approval')], max_length=30)),
+                ('recipient', models.EmailField(max_length=254)),
+                ('payload', models.JSONField(default=dict)),
+                ('dedupe_key', models.CharField(db_index=True, max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('COALESCED', 'Coalesced'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['next_attempt_at', 'id'], name='emailoutbox_pending_idx')],
+            },
+        ),
+    ]
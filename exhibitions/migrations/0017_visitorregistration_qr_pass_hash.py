@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exhibitions', '0016_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visitorregistration',
+            name='qr_pass_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
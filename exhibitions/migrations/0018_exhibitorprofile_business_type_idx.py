@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exhibitions', '0017_visitorregistration_qr_pass_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exhibitorprofile',
+            index=models.Index(fields=['business_type'], name='exhibitorprofile_btype_idx'),
+        ),
+    ]
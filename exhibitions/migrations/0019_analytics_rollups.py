@@ -0,0 +1,55 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exhibitions', '0018_exhibitorprofile_business_type_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExhibitionStats',
+            fields=[
+                ('exhibition', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='exhibitions.exhibition')),
+                ('applications', models.JSONField(default=dict)),
+                ('business_types', models.JSONField(default=dict)),
+                ('dirty', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exhibitorapplication',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='visitorregistration',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='ExhibitionDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registrations', models.PositiveIntegerField(default=0)),
+                ('checked_in', models.PositiveIntegerField(default=0)),
+                ('exhibition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='exhibitions.exhibition')),
+            ],
+            options={
+                'ordering': ['day'],
+                'unique_together': {('exhibition', 'day')},
+            },
+        ),
+    ]
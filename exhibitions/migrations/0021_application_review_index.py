@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exhibitions', '0020_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exhibitorapplication',
+            index=models.Index(fields=['exhibition', 'status', 'applied_at', 'id'], name='exhibitorapp_review_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exhibitions', '0023_people_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='emailoutbox',
+            name='emailoutbox_pending_idx',
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('COALESCED', 'Coalesced'), ('FAILED', 'Failed')], default='PENDING', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='emailoutbox',
+            index=models.Index(condition=models.Q(('status__in', ['PENDING', 'SENDING'])), fields=['next_attempt_at', 'id'], name='emailoutbox_due_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from accounts.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 User = settings.AUTH_USER_MODEL
@@ -47,6 +50,13 @@ class ExhibitorProfile(models.Model):
     )
     contact_number = models.CharField(max_length=15)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["business_type"], name="exhibitorprofile_btype_idx"),
+            # Admin people search (exhibitions/utils/people_search.py)
+            GinIndex(OpClass(Upper("company_name"), name="gin_trgm_ops"), name="exhibitorprofile_company_trgm"),
+        ]
+
     def __str__(self):
         return self.company_name
 
@@ -142,9 +152,25 @@ class ExhibitorApplication(models.Model):
     )
 
     applied_at = models.DateTimeField(auto_now_add=True)
+    # Watermark for the analytics rollups (exhibitions/utils/analytics.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Review claim: the admin working on this application until claim_expires_at
+    # (exhibitions/utils/review_queue.py)
+    claimed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, blank=True, null=True, related_name="+"
+    )
+    claim_expires_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         unique_together = ("user", "exhibition")
+        indexes = [
+            # Review queue: keyset pages per exhibition and status (exhibitions/utils/review_queue.py)
+            models.Index(
+                fields=["exhibition", "status", "applied_at", "id"],
+                name="exhibitorapp_review_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.exhibition}"
@@ -154,8 +180,12 @@ class VisitorRegistration(models.Model):
     exhibition = models.ForeignKey("Exhibition", on_delete=models.CASCADE)
 
     qr_code = models.UUIDField(default=uuid.uuid4, unique=True)
+    # sha256 of the pre-rendered pass PNG + SVG (see exhibitions/utils/qr_passes.py)
+    qr_pass_hash = models.CharField(max_length=64, blank=True, default="")
     is_checked_in = models.BooleanField(default=False)
     registered_at = models.DateTimeField(auto_now_add=True)
+    # Watermark for the analytics rollups (exhibitions/utils/analytics.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ("user", "exhibition")
@@ -182,6 +212,8 @@ class Property(models.Model):
     description = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Lets export jobs tell whether an exhibition's properties changed
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -270,3 +302,146 @@ class ExhibitionPriceTier(models.Model):
     def __str__(self):
         return f"{self.name} – {self.fee}"
 
+
+
+# ─────────────────────────────────────────────
+# Transactional email outbox
+# ─────────────────────────────────────────────
+
+class EmailOutbox(models.Model):
+    """
+    A transactional email written in the same DB transaction as the change that
+    triggers it, so a rolled-back registration never emails anyone and the
+    request never waits on the broker. Drained by ``dispatch_email_outbox``.
+    """
+    KIND_CHOICES = (
+        ("VISITOR_QR", "Visitor QR pass"),
+        ("EXHIBITOR_APPROVAL", "Exhibitor approval"),
+    )
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("SENDING", "Sending"),       # claimed by a dispatcher; next_attempt_at is the lease end
+        ("SENT", "Sent"),
+        ("COALESCED", "Coalesced"),   # superseded by another copy of the same notification
+        ("FAILED", "Failed"),         # gave up after OUTBOX_MAX_ATTEMPTS
+    )
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    recipient = models.EmailField()
+    payload = models.JSONField(default=dict)   # keyword arguments for the message builder
+    dedupe_key = models.CharField(max_length=255, db_index=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                name="emailoutbox_due_idx",
+                condition=models.Q(status__in=["PENDING", "SENDING"]),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} → {self.recipient} ({self.status})"
+
+
+# ─────────────────────────────────────────────
+# Analytics rollups (exhibitions/utils/analytics.py)
+# ─────────────────────────────────────────────
+
+class ExhibitionDailyStats(models.Model):
+    """Visitor registrations per exhibition per day (by registered_at)."""
+    exhibition = models.ForeignKey(
+        Exhibition, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    day = models.DateField()
+    registrations = models.PositiveIntegerField(default=0)
+    checked_in = models.PositiveIntegerField(default=0)   # of those registrations
+
+    class Meta:
+        unique_together = ("exhibition", "day")
+        ordering = ["day"]
+
+    def __str__(self):
+        return f"{self.exhibition_id} {self.day}: {self.registrations}"
+
+
+class ExhibitionStats(models.Model):
+    """Per-exhibition application rollup; ``dirty`` forces a full recompute."""
+    exhibition = models.OneToOneField(
+        Exhibition, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    applications = models.JSONField(default=dict)     # status -> count
+    business_types = models.JSONField(default=dict)   # approved exhibitors by business type
+    dirty = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for exhibition {self.exhibition_id}"
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup job has read its source tables."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
+
+
+# ─────────────────────────────────────────────
+# Background exports (exhibitions/utils/export_jobs.py)
+# ─────────────────────────────────────────────
+
+class ExportJob(models.Model):
+    KIND_CHOICES = (
+        ("visitors", "Visitors"),
+        ("exhibitors", "Exhibitors"),
+        ("applications", "Applications"),
+        ("properties", "Properties"),
+    )
+    FORMAT_CHOICES = (
+        ("csv", "CSV"),
+        ("xlsx", "Excel (XLSX)"),
+        ("parquet", "Parquet"),
+    )
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    exhibition = models.ForeignKey(Exhibition, on_delete=models.CASCADE, related_name="export_jobs")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    # kind + format + exhibition + state of the source rows; equal fingerprints
+    # mean the artifact can be reused
+    fingerprint = models.CharField(max_length=64, db_index=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    file = models.CharField(max_length=255, blank=True)   # storage path of the artifact
+    size = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # bumped when the job starts and at every progress update; a PENDING or
+    # RUNNING job that stops beating is treated as failed
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.kind}.{self.format} for {self.exhibition_id} ({self.status})"
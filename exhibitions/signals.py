@@ -0,0 +1,105 @@
+"""
+Feed the dashboard rollups (exhibitions/utils/stats.py) as registrations,
+approvals and exhibitions change, and invalidate the cached public endpoints
+(backend/caching.py) when what they show changes. Every update is sent on
+commit.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.caching import bump_namespace_on_commit
+
+from .models import (
+    EventRecap, Exhibition, ExhibitionImage, ExhibitionPriceTier, ExhibitionSchedule,
+    ExhibitorApplication, ExhibitorProfile, RecapImage, RecapSocialLink, RecapVideo,
+    VisitorRegistration,
+)
+from .utils import stats
+
+# The public list spans every event; the detail and exhibitor pages are
+# namespaced per exhibition so a change to one event leaves the rest cached.
+PUBLIC_EXHIBITIONS_CACHE = "public-exhibitions"
+PUBLIC_EXHIBITION_CACHE = "public-exhibition:{id}"
+PUBLIC_EXHIBITORS_CACHE = "public-exhibitors:{id}"
+
+
+def exhibition_changed(exhibition_id):
+    """Invalidate the public list and ``exhibition_id``'s detail page, on commit."""
+    bump_namespace_on_commit(PUBLIC_EXHIBITIONS_CACHE)
+    bump_namespace_on_commit(PUBLIC_EXHIBITION_CACHE.format(id=exhibition_id))
+
+
+def exhibitors_changed(exhibition_id):
+    """Invalidate ``exhibition_id``'s public exhibitor list, on commit."""
+    bump_namespace_on_commit(PUBLIC_EXHIBITORS_CACHE.format(id=exhibition_id))
+
+
+@receiver(post_save, sender=VisitorRegistration)
+def count_visitor(sender, instance, created, **kwargs):
+    if created:
+        stats.record_visitor(instance.user_id)
+
+
+@receiver(post_save, sender=ExhibitorApplication)
+def count_exhibitor(sender, instance, **kwargs):
+    if instance.status == "APPROVED":
+        stats.record_exhibitor(instance.user_id)
+
+
+@receiver(post_save, sender=Exhibition)
+@receiver(post_delete, sender=Exhibition)
+def count_events(sender, instance, **kwargs):
+    stats.events_changed()
+
+
+@receiver(post_save, sender=Exhibition)
+@receiver(post_delete, sender=Exhibition)
+def invalidate_public_exhibition(sender, instance, **kwargs):
+    # Seat counters are decremented with update(), which sends no signal, so a
+    # registration surge does not throw these pages away on every signup.
+    exhibition_changed(instance.pk)
+
+
+@receiver(post_save, sender=ExhibitionImage)
+@receiver(post_delete, sender=ExhibitionImage)
+@receiver(post_save, sender=ExhibitionPriceTier)
+@receiver(post_delete, sender=ExhibitionPriceTier)
+@receiver(post_save, sender=ExhibitionSchedule)
+@receiver(post_delete, sender=ExhibitionSchedule)
+@receiver(post_save, sender=EventRecap)
+@receiver(post_delete, sender=EventRecap)
+def invalidate_public_exhibition_part(sender, instance, **kwargs):
+    exhibition_changed(instance.exhibition_id)
+
+
+@receiver(post_save, sender=RecapImage)
+@receiver(post_delete, sender=RecapImage)
+@receiver(post_save, sender=RecapVideo)
+@receiver(post_delete, sender=RecapVideo)
+@receiver(post_save, sender=RecapSocialLink)
+@receiver(post_delete, sender=RecapSocialLink)
+def invalidate_public_recap_part(sender, instance, **kwargs):
+    exhibition_id = (
+        EventRecap.objects.filter(pk=instance.recap_id).values_list("exhibition_id", flat=True).first()
+    )
+    if exhibition_id is not None:
+        exhibition_changed(exhibition_id)
+
+
+# No post_delete receivers on VisitorRegistration / ExhibitorApplication: any
+# would make Django load and signal every row instead of fast-deleting them.
+# The code that deletes them (AdminDeleteExhibitionView, accounts/deletion.py)
+# updates the rollups and caches once, set-based.
+@receiver(post_save, sender=ExhibitorApplication)
+def invalidate_public_exhibitors(sender, instance, **kwargs):
+    exhibitors_changed(instance.exhibition_id)
+
+
+@receiver(post_save, sender=ExhibitorProfile)
+@receiver(post_delete, sender=ExhibitorProfile)
+def invalidate_public_exhibitors_of_profile(sender, instance, **kwargs):
+    exhibition_ids = ExhibitorApplication.objects.filter(
+        user_id=instance.user_id, status="APPROVED",
+    ).values_list("exhibition_id", flat=True)
+    for exhibition_id in exhibition_ids:
+        exhibitors_changed(exhibition_id)
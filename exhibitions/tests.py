@@ -1,3 +1,584 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import EmailMessage
+from django.db.models.signals import post_delete
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from redis.exceptions import RedisError
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import mail_throttle, smtp_pool
+from accounts.models import User
+from backend import caching
+from .models import EmailOutbox, Exhibition, ExhibitorApplication, ExportJob, VisitorRegistration
+from . import async_views, views
+from .utils import export_jobs, exports, outbox, people_search, qr_passes, review_queue, stats, tasks
+
+try:  # requirements-dev.txt
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class StreamingExportTests(TestCase):
+    VISITORS = 40000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.exhibition = Exhibition.objects.create(
+            name="Big Expo", description="", start_date="2026-11-01", end_date="2026-11-03",
+            venue="Hall", city="Melbourne", state="VIC", country="Australia",
+            booth_capacity=10, visitor_capacity=cls.VISITORS,
+        )
+        users = User.objects.bulk_create(
+            User(username=f"visitor{i}", email=f"visitor{i}@example.com")
+            for i in range(cls.VISITORS)
+        )
+        VisitorRegistration.objects.bulk_create(
+            VisitorRegistration(user=user, exhibition=cls.exhibition) for user in users
+        )
+
+    def export(self, gzip=False):
+        return exports.stream_csv(
+            exports.VISITORS,
+            exports.visitors_queryset(self.exhibition.id),
+            "visitors-Big_Expo",
+            gzip=gzip,
+        )
+
+    def test_large_export_streams_in_bounded_memory(self):
+        response = self.export()
+        size = rows = 0
+
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                size += len(chunk)
+                rows += chunk.count(b"\n")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(rows, self.VISITORS + 1)
+        # The CSV is ~3.7 MB; streaming holds one chunk of rows and one ~64 KB
+        # piece of output at a time (peak stays ~1.2 MB at 10k or 40k rows).
+        self.assertGreater(size, 3_000_000)
+        self.assertLess(peak, 2 * 1024 * 1024)
+
+    def test_gzip_export_matches_plain_csv(self):
+        plain = b"".join(self.export().streaming_content)
+        response = self.export(gzip=True)
+        self.assertIn(".csv.gz", response["Content-Disposition"])
+
+        unzipped = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(unzipped, plain)
+        header = next(csv.reader(io.StringIO(plain[:200].decode())))
+        self.assertEqual(header[:3], ["ID", "Visitor Name", "Email"])
+
+
+class ReviewQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exhibition = Exhibition.objects.create(
+            name="Queue Expo", description="", start_date="2026-11-01", end_date="2026-11-03",
+            venue="Hall", city="Melbourne", state="VIC", country="Australia",
+            booth_capacity=10, visitor_capacity=10,
+        )
+        users = User.objects.bulk_create(
+            User(username=f"exhibitor{i}", email=f"exhibitor{i}@example.com") for i in range(25)
+        )
+        ExhibitorApplication.objects.bulk_create(
+            ExhibitorApplication(user=user, exhibition=cls.exhibition) for user in users
+        )
+        cls.reviewer, cls.other_reviewer = User.objects.bulk_create(
+            User(username=f"admin{i}", email=f"admin{i}@example.com", active_role="ADMIN") for i in range(2)
+        )
+
+    def claim(self, user, count):
+        return [row["id"] for row in review_queue.claim_next(RequestFactory().get("/"), self.exhibition.id, user, count)]
+
+    def decide(self, user, application_id, **data):
+        request = APIRequestFactory().post("/", data)
+        force_authenticate(request, user=user)
+        return views.AdminUpdateExhibitorApplication.as_view()(request, application_id=application_id)
+
+    def test_reviewers_claim_disjoint_rows_until_claims_lapse(self):
+        mine, theirs = self.claim(self.reviewer, 10), self.claim(self.other_reviewer, 10)
+        self.assertEqual((len(mine), len(theirs)), (10, 10))
+        self.assertFalse(set(mine) & set(theirs))
+        self.assertEqual(len(self.claim(self.reviewer, 50)), 15)   # renews its own, takes the rest
+        self.assertEqual(self.claim(self.other_reviewer, 50), theirs)
+
+        ExhibitorApplication.objects.filter(claimed_by=self.reviewer).update(
+            claim_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(len(self.claim(self.other_reviewer, 50)), 25)
+
+    def test_single_decision_respects_claims_and_booths(self):
+        app_id = self.claim(self.reviewer, 1)[0]
+        response = self.decide(self.other_reviewer, app_id, action="APPROVE", booth_number=3)
+        self.assertEqual(response.status_code, 409)
+
+        for action, available in (("APPROVE", 9), ("APPROVE", 9), ("REJECT", 10), ("REJECT", 10)):
+            response = self.decide(self.reviewer, app_id, action=action, booth_number=3)
+            self.assertEqual(response.status_code, 200)
+            self.exhibition.refresh_from_db()
+            self.assertEqual(self.exhibition.available_booths, available)
+        app = ExhibitorApplication.objects.get(pk=app_id)
+        self.assertEqual((app.status, app.claimed_by_id), ("REJECTED", None))
+
+    def test_refused_decision_leaves_no_badge_file(self):
+        Exhibition.objects.filter(pk=self.exhibition.pk).update(available_booths=0)
+        app_id = self.claim(self.reviewer, 1)[0]
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            response = self.decide(
+                self.reviewer, app_id, action="APPROVE", booth_number=3,
+                badge=SimpleUploadedFile("badge.png", b"badge", content_type="image/png"),
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual([files for _, _, files in os.walk(media) if files], [])
+        self.assertFalse(ExhibitorApplication.objects.get(pk=app_id).badge)
+
+    def test_admin_add_takes_the_last_booth_once(self):
+        Exhibition.objects.filter(pk=self.exhibition.pk).update(available_booths=1, available_visitors=7)
+        stale = Exhibition.objects.get(pk=self.exhibition.pk)
+
+        def add(email):
+            request = APIRequestFactory().post("/", {"email": email, "booth_number": 4})
+            force_authenticate(request, user=self.reviewer)
+            with mock.patch.object(views.Exhibition.objects, "get", return_value=stale):
+                return views.AdminAddExhibitorView.as_view()(request, exhibition_id=self.exhibition.pk)
+
+        self.assertEqual(add("first@example.com").status_code, 201)
+        # A visitor signs up meanwhile; the exhibitor add must not overwrite it.
+        Exhibition.objects.filter(pk=self.exhibition.pk).update(available_visitors=6)
+        self.assertEqual(add("second@example.com").status_code, 400)
+        self.exhibition.refresh_from_db()
+        self.assertEqual((self.exhibition.available_booths, self.exhibition.available_visitors), (0, 6))
+        self.assertFalse(ExhibitorApplication.objects.filter(user__email="second@example.com").exists())
+
+    def test_pages_are_stable_while_the_queue_is_worked(self):
+        request = RequestFactory().get("/")
+        pending = list(
+            ExhibitorApplication.objects.order_by("applied_at", "id").values_list("id", flat=True)
+        )
+
+        first = review_queue.review_page(request, self.exhibition.id, limit=10)
+        self.assertEqual(first["counts"], {"PENDING": 25})
+        seen = [row["id"] for row in first["data"]]
+
+        # Reviewing the first page must not make the next one skip rows.
+        ExhibitorApplication.objects.filter(id__in=seen).update(status="APPROVED")
+        cursor = first["next_cursor"]
+        while cursor:
+            page = review_queue.review_page(request, self.exhibition.id, cursor=cursor, limit=10)
+            self.assertNotIn("counts", page)
+            seen += [row["id"] for row in page["data"]]
+            cursor = page["next_cursor"]
+
+        self.assertEqual(seen, pending)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(review_queue.InvalidCursor):
+            review_queue.review_page(RequestFactory().get("/"), self.exhibition.id, cursor="nope")
+
+
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exhibition = Exhibition.objects.create(
+            name="Async Expo", description="", start_date="2026-11-01", end_date="2026-11-03",
+            venue="Hall", city="Melbourne", state="VIC", country="Australia",
+            booth_capacity=10, visitor_capacity=10, is_active=True,
+        )
+        exhibitor = User.objects.create(username="exhibitor", email="exhibitor@example.com")
+        ExhibitorApplication.objects.create(
+            user=exhibitor, exhibition=cls.exhibition, status="APPROVED", booth_number=7,
+        )
+        cls.visitor = User.objects.create(username="visitor", email="visitor@example.com")
+        VisitorRegistration.objects.create(user=cls.visitor, exhibition=cls.exhibition)
+
+    async def assertSameResponse(self, path, sync_view, async_view, **kwargs):
+        headers = kwargs.pop("headers", {})
+        expected = await sync_to_async(sync_view.as_view())(
+            RequestFactory().get(path, headers=headers), **kwargs
+        )
+        expected.render()
+        response = await async_view.as_view()(AsyncRequestFactory().get(path, headers=headers), **kwargs)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    async def test_public_views_match_drf_views(self):
+        exhibition_id = self.exhibition.id
+        await self.assertSameResponse(
+            "/public/exhibitions/?status=upcoming",
+            views.PublicExhibitionListView, async_views.PublicExhibitionListView,
+        )
+        await self.assertSameResponse(
+            f"/public/exhibitions/{exhibition_id}/",
+            views.PublicExhibitionDetailView, async_views.PublicExhibitionDetailView, id=exhibition_id,
+        )
+        await self.assertSameResponse(
+            "/public/exhibitions/0/",
+            views.PublicExhibitionDetailView, async_views.PublicExhibitionDetailView, id=0,
+        )
+        await self.assertSameResponse(
+            f"/public/exhibitions/{exhibition_id}/exhibitors/",
+            views.PublicExhibitorsByExhibitionView, async_views.PublicExhibitorsByExhibitionView,
+            id=exhibition_id,
+        )
+
+    @override_settings(ROOT_URLCONF="backend.async_urls")
+    async def test_my_registrations_requires_a_token(self):
+        response = await async_views.VisitorMyRegistrationsView.as_view()(
+            AsyncRequestFactory().get("/visitor/my-registrations/")
+        )
+        self.assertEqual(response.status_code, 401)
+
+        token = AccessToken.for_user(self.visitor)
+        await self.assertSameResponse(
+            "/visitor/my-registrations/",
+            views.VisitorMyRegistrationsView, async_views.VisitorMyRegistrationsView,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    def test_async_urlconf_routes_only_the_read_endpoints(self):
+        match = resolve("/api/exhibitions/public/exhibitions/1/", urlconf="backend.async_urls")
+        self.assertIs(match.func.view_class, async_views.PublicExhibitionDetailView)
+        for path in ("/api/exhibitions/visitor/register/1/", "/api/auth/login/", "/admin/"):
+            with self.assertRaises(Resolver404):
+                resolve(path, urlconf="backend.async_urls")
+
+
+@mock.patch.object(outbox, "_builders", lambda: {"VISITOR_QR": lambda **payload: payload})
+class EmailOutboxTests(TestCase):
+    def enqueue(self, key, **kwargs):
+        return outbox.enqueue_email("VISITOR_QR", "v@example.com", {"key": key}, key, **kwargs)
+
+    def drain(self, errors=None):
+        """Drain once; ``send_each`` fails each message with ``errors`` (default: all sent)."""
+        def send_each(messages):
+            return [errors] * len(messages)
+
+        with mock.patch.object(outbox, "send_each", side_effect=send_each) as send:
+            result = outbox.drain_outbox()
+        return result, [message for call in send.call_args_list for message in call.args[0]]
+
+    def test_copies_of_a_notification_are_coalesced(self):
+        first, second, newest = self.enqueue("a"), self.enqueue("a"), self.enqueue("a")
+        (sent, failed, coalesced), messages = self.drain()
+        self.assertEqual((sent, failed, coalesced), (1, 0, 2))
+        self.assertEqual(len(messages), 1)
+        statuses = dict(EmailOutbox.objects.values_list("id", "status"))
+        self.assertEqual(
+            [statuses[first.id], statuses[second.id], statuses[newest.id]],
+            ["COALESCED", "COALESCED", "SENT"],
+        )
+
+        # A later copy of a delivered notification is dropped, a resend is not.
+        self.enqueue("a")
+        self.enqueue("a", resend=True)
+        (sent, _, coalesced), _ = self.drain()
+        self.assertEqual((sent, coalesced), (1, 1))
+
+    def test_failures_back_off_until_max_attempts(self):
+        row = self.enqueue("b")
+        for attempt in range(1, outbox.OUTBOX_MAX_ATTEMPTS + 1):
+            before = timezone.now()
+            (_, failed, _), _ = self.drain(errors=OSError("smtp down"))
+            self.assertEqual(failed, 1)
+            row.refresh_from_db()
+            self.assertEqual(row.attempts, attempt)
+            self.assertEqual(row.last_error, "OSError: smtp down")
+            if attempt < outbox.OUTBOX_MAX_ATTEMPTS:
+                self.assertEqual(row.status, "PENDING")
+                self.assertGreaterEqual(row.next_attempt_at - before, outbox._retry_delay(attempt))
+                # Not due yet: a drain right now leaves it alone.
+                self.assertEqual(self.drain()[0], (0, 0, 0))
+                EmailOutbox.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(row.status, "FAILED")
+        self.assertEqual(outbox._retry_delay(2), 2 * outbox._retry_delay(1))
+
+    def test_rows_of_a_dead_dispatcher_are_retried_after_the_lease(self):
+        row = self.enqueue("c")
+        EmailOutbox.objects.filter(pk=row.pk).update(
+            status="SENDING", next_attempt_at=timezone.now() + timedelta(minutes=1),
+        )
+        self.assertEqual(self.drain()[0], (0, 0, 0))
+        EmailOutbox.objects.filter(pk=row.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(self.drain()[0], (1, 0, 0))
+
+
+class PeopleSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exhibition = Exhibition.objects.create(
+            name="Expo", description="", start_date="2026-11-01", end_date="2026-11-03",
+            venue="Hall", city="Melbourne", state="VIC", country="Australia",
+            booth_capacity=10, visitor_capacity=10,
+        )
+        for username, email in (("mary", "mary.jane@example.com"), ("al", "al@jo.com"), ("bob", "bob@example.com")):
+            VisitorRegistration.objects.create(
+                user=User.objects.create(username=username, email=email), exhibition=cls.exhibition,
+            )
+
+    def search(self, query):
+        rows, _ = people_search.search_visitors(self.exhibition.id, query)
+        return [row["name"] for row in rows]
+
+    def test_every_query_is_a_substring_match(self):
+        self.assertEqual(self.search("jane@ex"), ["mary"])
+        self.assertEqual(self.search("@jo"), ["al"])
+        self.assertEqual(self.search("ar"), ["mary"])
+
+
+class QRPassTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        exhibition = Exhibition.objects.create(
+            name="Expo", description="", start_date="2026-11-01", end_date="2026-11-03",
+            venue="Hall", city="Melbourne", state="VIC", country="Australia",
+            booth_capacity=10, visitor_capacity=10,
+        )
+        cls.registration = VisitorRegistration.objects.create(
+            user=User.objects.create(username="visitor", email="visitor@example.com"),
+            exhibition=exhibition,
+        )
+
+    def test_hash_covers_both_images(self):
+        hashes = []
+        for svg in (b"<svg>1</svg>", b"<svg>2</svg>"):
+            self.registration.qr_pass_hash = ""
+            with mock.patch.object(qr_passes, "render_pass_images", return_value=(b"png", svg)):
+                hashes.append(qr_passes.store_pass_images(self.registration))
+            self.assertEqual(qr_passes.read_pass_image(self.registration, "svg"), svg)
+        self.assertNotEqual(*hashes)
+
+
+class CampaignEmailTests(TestCase):
+    def test_sends_without_resume_tracking_when_redis_is_down(self):
+        def build(subject, exhibition_data, recipients):
+            return [mock.Mock(to=[email]) for email in recipients]
+
+        with mock.patch.object(tasks, "get_redis", side_effect=RedisError("down")), \
+                mock.patch.object(tasks, "_build_event_invitation_messages", side_effect=build), \
+                mock.patch.object(tasks, "send_each", side_effect=lambda batch: [None] * len(batch)) as send:
+            result = tasks.send_event_email.apply(
+                args=("Invite", {}, ["a@example.com", "b@example.com"]), task_id="campaign-1",
+            )
+        self.assertEqual(result.get(), "Sent 2 of 2 emails.")
+        self.assertEqual(send.call_count, 1)
+
+    @unittest.skipUnless(fakeredis, "fakeredis[lua] is not installed (requirements-dev.txt)")
+    @override_settings(
+        EMAIL_RATE_LIMITS={"default": {"rate": 50, "per": 1, "burst": 3}},
+        EMAIL_THROTTLE_MAX_WAIT=0,
+    )
+    def test_throttled_campaign_sends_every_message_once_across_requeues(self):
+        redis = fakeredis.FakeRedis(decode_responses=True)
+        recipients = [f"guest{i}@example.com" for i in range(8)]
+        requeued = []
+
+        def build(subject, exhibition_data, recipients):
+            return [EmailMessage(subject, "See you there", to=[email]) for email in recipients]
+
+        with mock.patch.object(tasks, "get_redis", return_value=redis), \
+                mock.patch.object(mail_throttle, "get_redis", return_value=redis), \
+                mock.patch.dict(mail_throttle._buckets, clear=True), \
+                mock.patch.object(smtp_pool, "get_pool", side_effect=lambda: smtp_pool.SMTPConnectionPool(
+                    throttle=mail_throttle.acquire_send_token,
+                )), \
+                mock.patch.object(tasks, "_build_event_invitation_messages", side_effect=build), \
+                mock.patch.object(tasks.send_event_email, "apply_async",
+                                  side_effect=lambda args, **kwargs: requeued.append(args)):
+            runs = 0
+            while runs < 10:
+                # Every run gets the full list, as a Celery retry or redelivery
+                # would: the done set under the task id skips what was sent.
+                tasks.send_event_email.apply(args=("Invite", {}, recipients), task_id="campaign-2").get()
+                runs += 1
+                if not requeued:
+                    break
+                requeued.pop()
+                time.sleep(0.1)   # refills the 3-token burst
+
+        self.assertEqual((runs, requeued), (3, []))
+        sent = [message.to[0] for message in mail.outbox]
+        self.assertEqual(sorted(sent), recipients)
+        self.assertEqual(len(set(sent)), len(sent))
+        self.assertEqual(redis.scard("mail:campaign:campaign-2:done"), len(recipients))
+
+
+class DashboardStatsTests(TestCase):
+    def test_exhibition_delete_records_removals_in_one_go(self):
+        exhibitions = [
+            Exhibition.objects.create(
+                name=f"Expo {i}", description="", start_date="2026-11-01", end_date="2026-11-03",
+                venue="Hall", city="Melbourne", state="VIC", country="Australia",
+                booth_capacity=10, visitor_capacity=10,
+            )
+            for i in range(2)
+        ]
+        gone, staying, exhibitor, admin = User.objects.bulk_create(
+            User(username=name, email=f"{name}@example.com")
+            for name in ("gone", "staying", "exhibitor", "admin")
+        )
+        admin.active_role = "ADMIN"
+        VisitorRegistration.objects.create(user=gone, exhibition=exhibitions[0])
+        VisitorRegistration.objects.create(user=staying, exhibition=exhibitions[0])
+        VisitorRegistration.objects.create(user=staying, exhibition=exhibitions[1])
+        ExhibitorApplication.objects.create(user=exhibitor, exhibition=exhibitions[0], status="APPROVED")
+
+        # Any per-row delete receiver would stop the cascade from fast-deleting.
+        self.assertFalse(post_delete.has_listeners(VisitorRegistration))
+        self.assertFalse(post_delete.has_listeners(ExhibitorApplication))
+
+        request = APIRequestFactory().delete("/")
+        force_authenticate(request, user=admin)
+        with mock.patch.object(stats, "_removed") as removed:
+            response = views.AdminDeleteExhibitionView.as_view()(request, pk=exhibitions[0].pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(removed.call_args_list, [
+            mock.call(stats.VISITORS_REMOVED, [gone.pk]),
+            mock.call(stats.EXHIBITORS_REMOVED, [exhibitor.pk]),
+        ])
+
+
+class ExportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exhibition = Exhibition.objects.create(
+            name="Expo", description="", start_date="2026-11-01", end_date="2026-11-03",
+            venue="Hall", city="Melbourne", state="VIC", country="Australia",
+            booth_capacity=10, visitor_capacity=10,
+        )
+
+    def test_stale_jobs_are_not_reused_and_are_failed(self):
+        job, created = export_jobs.request_export(self.exhibition, "visitors", "csv")
+        self.assertTrue(created)
+        self.assertEqual(export_jobs.request_export(self.exhibition, "visitors", "csv"), (job, False))
+
+        ExportJob.objects.filter(pk=job.pk).update(
+            status="RUNNING",
+            heartbeat_at=timezone.now() - export_jobs.EXPORT_STALE_AFTER - timedelta(seconds=1),
+        )
+        replacement, created = export_jobs.request_export(self.exhibition, "visitors", "csv")
+        self.assertTrue(created)
+        self.assertNotEqual(replacement.pk, job.pk)
+
+        self.assertEqual(export_jobs.purge_expired_exports(), 0)
+        job.refresh_from_db()
+        replacement.refresh_from_db()
+        self.assertEqual((job.status, replacement.status), ("FAILED", "PENDING"))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_exports_run_on_their_own_queue(self):
+        route = tasks.run_export_job.app.amqp.router.route({}, tasks.run_export_job.name)
+        self.assertEqual(route["queue"].name, "exports")
+        route = tasks.send_event_email.app.amqp.router.route({}, tasks.send_event_email.name)
+        self.assertEqual(route["queue"].name, "celery")
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CacheAsideTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exhibitions = [
+            Exhibition.objects.create(
+                name=f"Cached Expo {i}", description="", start_date="2026-11-01",
+                end_date="2026-11-03", venue="Hall", city="Melbourne", state="VIC",
+                country="Australia", booth_capacity=10, visitor_capacity=10, is_active=True,
+            )
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        caching.clear_l1()
+
+    def test_concurrent_misses_compute_once(self):
+        key = caching.make_key("test", "single-flight")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(caching.get_or_compute(key, compute, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 8)
+
+    def test_stale_entry_is_served_while_another_process_refreshes(self):
+        key = caching.make_key("test", "stale")
+        # Logically expired but still inside STALE_GRACE, and someone holds the lock.
+        cache.set(key, {"value": "old", "delta": 0.0, "expires": time.time() - 1}, 60)
+        cache.add(f"{key}:lock", 1, 60)
+        self.assertEqual(caching.get_or_compute(key, lambda: "new", 60), "old")
+
+        cache.delete(f"{key}:lock")
+        self.assertEqual(caching.get_or_compute(key, lambda: "new", 60), "new")
+
+    def detail(self, exhibition):
+        return self.client.get(f"/api/exhibitions/public/exhibitions/{exhibition.id}/")
+
+    def test_only_ok_responses_are_cached(self):
+        for _ in range(2):
+            response = self.client.get("/api/exhibitions/public/exhibitions/0/")
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn("X-Cache", response)
+
+    def test_a_change_invalidates_only_that_exhibition(self):
+        first, second = self.exhibitions
+        for exhibition in self.exhibitions:
+            self.assertEqual(self.detail(exhibition)["X-Cache"], "MISS")
+            self.assertEqual(self.detail(exhibition)["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.name = "Renamed Expo"
+            first.save()
+        response = self.detail(first)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["name"], "Renamed Expo")
+        self.assertEqual(self.detail(second)["X-Cache"], "HIT")
+
+        # A visitor signup only decrements the seat counter: nothing is invalidated.
+        visitor = User.objects.create(
+            username="signup", email="signup@example.com", roles=["VISITOR"], active_role="VISITOR",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/exhibitions/visitor/register/{second.id}/",
+                headers={"Authorization": f"Bearer {AccessToken.for_user(visitor)}"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(VisitorRegistration.objects.filter(exhibition=second).count(), 1)
+        self.assertEqual(self.detail(second)["X-Cache"], "HIT")
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ExhibitorProfileView,  ExhibitorProfileStatusView, AdminUpdateExhibitionView, AdminCreateExhibitionView, AdminDeleteExhibitionView, AdminListExhibitionsView, ExhibitorApplyView, AdminListExhibitorApplications, AdminUpdateExhibitorApplication, PublicExhibitionListView, ExhibitorApplicationStatusView, VisitorRegistration, VisitorQRListView, VisitorRegisterView, AdminQRScanView, ExhibitorCreatePropertyView, ExhibitorMyPropertiesView, ExhibitorDeletePropertyView, PublicExhibitionPropertiesView, PublicExhibitionDetailView, PublicExhibitorsByExhibitionView, VisitorMyRegistrationsView, ExhibitorEditPropertyView, AdminDashboardStatsView, AdminEventVisitorsView, AdminEventExhibitorsView, AdminToggleVisitorCheckInView, AdminAddExhibitorView, AdminAddVisitorView, AdminCheckExhibitorView, AdminEventRecapView
+from .views import ExhibitorProfileView,  ExhibitorProfileStatusView, AdminUpdateExhibitionView, AdminCreateExhibitionView, AdminAudienceCountView, AdminDeleteExhibitionView, AdminListExhibitionsView, ExhibitorApplyView, AdminListExhibitorApplications, AdminApplicationReviewQueueView, AdminUpdateExhibitorApplication, AdminBulkApplicationDecisionView, AdminClaimApplicationsView, PublicExhibitionListView, ExhibitorApplicationStatusView, VisitorRegistration, VisitorQRListView, VisitorPassImageView, VisitorRegisterView, AdminQRScanView, ExhibitorCreatePropertyView, ExhibitorMyPropertiesView, ExhibitorDeletePropertyView, PublicExhibitionPropertiesView, PublicExhibitionDetailView, PublicExhibitorsByExhibitionView, VisitorMyRegistrationsView, ExhibitorEditPropertyView, AdminDashboardStatsView, AdminExhibitionAnalyticsView, AdminExportJobCreateView, AdminExportJobView, ExportDownloadView, AdminMailMetricsView, AdminCacheMetricsView, AdminEventVisitorsView, AdminEventExhibitorsView, AdminEventVisitorSearchView, AdminEventExhibitorSearchView, AdminToggleVisitorCheckInView, AdminResendVisitorPassView, AdminAddExhibitorView, AdminAddVisitorView, AdminCheckExhibitorView, AdminEventRecapView
 
 urlpatterns = [
     path("exhibitor/profile/", ExhibitorProfileView.as_view()),
@@ -7,14 +7,19 @@ urlpatterns = [
     path("public/exhibitions/", PublicExhibitionListView.as_view()),
     path("admin/exhibitions/", AdminListExhibitionsView.as_view()),
     path("admin/exhibitions/create/", AdminCreateExhibitionView.as_view()),
+    path("admin/invitations/audience-count/", AdminAudienceCountView.as_view()),
     path("admin/exhibitions/<int:pk>/update/", AdminUpdateExhibitionView.as_view()),
     path("admin/exhibitions/<int:pk>/delete/", AdminDeleteExhibitionView.as_view()),
     path("exhibitor/apply/<int:exhibition_id>/", ExhibitorApplyView.as_view()),
     path("admin/exhibitor-applications/<int:exhibition_id>/", AdminListExhibitorApplications.as_view()),
+    path("admin/exhibitor-applications/<int:exhibition_id>/queue/", AdminApplicationReviewQueueView.as_view()),
     path("admin/exhibitor-application/<int:application_id>/", AdminUpdateExhibitorApplication.as_view()),
+    path("admin/exhibitor-applications/<int:exhibition_id>/decisions/", AdminBulkApplicationDecisionView.as_view()),
+    path("admin/exhibitor-applications/<int:exhibition_id>/claim/", AdminClaimApplicationsView.as_view()),
     path("exhibitor/my-applications/", ExhibitorApplicationStatusView.as_view()),
     path("visitor/register/<int:exhibition_id>/", VisitorRegisterView.as_view()),
     path("visitor/my-qr/", VisitorQRListView.as_view()),
+    path("visitor/my-qr/<uuid:qr_code>/pass.<str:fmt>", VisitorPassImageView.as_view(), name="visitor-pass-image"),
     path("admin/qr/scan/", AdminQRScanView.as_view()),
     path("exhibitor/properties/<int:exhibition_id>/create/", ExhibitorCreatePropertyView.as_view()),
     path("exhibitor/my-properties/", ExhibitorMyPropertiesView.as_view()),
@@ -24,10 +29,19 @@ urlpatterns = [
     path("public/exhibitions/<int:id>/", PublicExhibitionDetailView.as_view()),
     path("public/exhibitions/<int:id>/exhibitors/", PublicExhibitorsByExhibitionView.as_view()),
     path("admin/dashboard/stats/", AdminDashboardStatsView.as_view()),
+    path("admin/exhibitions/<int:exhibition_id>/analytics/", AdminExhibitionAnalyticsView.as_view()),
+    path("admin/exports/", AdminExportJobCreateView.as_view()),
+    path("admin/exports/<uuid:job_id>/", AdminExportJobView.as_view()),
+    path("exports/download/<str:token>/", ExportDownloadView.as_view(), name="export-download"),
+    path("admin/mail/metrics/", AdminMailMetricsView.as_view()),
+    path("admin/cache/metrics/", AdminCacheMetricsView.as_view()),
     path("admin/exhibitions/<int:exhibition_id>/visitors/", AdminEventVisitorsView.as_view()),
     path("admin/exhibitions/<int:exhibition_id>/exhibitors/", AdminEventExhibitorsView.as_view()),
+    path("admin/exhibitions/<int:exhibition_id>/visitors/search/", AdminEventVisitorSearchView.as_view()),
+    path("admin/exhibitions/<int:exhibition_id>/exhibitors/search/", AdminEventExhibitorSearchView.as_view()),
     path("visitor/my-registrations/", VisitorMyRegistrationsView.as_view()),
     path("admin/visitors/<int:visitor_id>/toggle-checkin/", AdminToggleVisitorCheckInView.as_view()),
+    path("admin/visitors/<int:visitor_id>/resend-pass/", AdminResendVisitorPassView.as_view()),
     path("admin/exhibitions/<int:exhibition_id>/add-exhibitor/", AdminAddExhibitorView.as_view()),
     path("admin/exhibitions/<int:exhibition_id>/add-visitor/", AdminAddVisitorView.as_view()),
     path("admin/exhibitions/<int:exhibition_id>/check-exhibitor/", AdminCheckExhibitorView.as_view()),
@@ -0,0 +1,210 @@
+"""
+Per-exhibition analytics rollups.
+
+Charts on the admin analytics page read only small rollup tables:
+
+* ``ExhibitionDailyStats`` — registrations (and how many of them have
+  checked in) per exhibition per day of ``registered_at``,
+* ``ExhibitionStats`` — applications per status and the business-type mix of
+  approved exhibitors,
+
+plus the capacity columns of the exhibition itself for the booth fill-rate.
+
+``update_exhibition_rollups`` (Celery beat, every few minutes) keeps them
+current incrementally. It reads the registrations and applications whose
+``updated_at`` is past the stored watermark, works out which
+(exhibition, day) buckets and which exhibitions they touch, and recomputes
+exactly those from the source rows. Each bucket is recomputed rather than
+incremented, so reading some rows twice is harmless; the job re-reads a
+WATERMARK_OVERLAP window to catch rows committed after a run started.
+
+Deleted rows leave no ``updated_at`` behind: whoever deletes registrations
+or applications in bulk calls ``mark_dirty`` and the next run recomputes
+those exhibitions in full. Exhibition deletion cascades to its rollups.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "exhibition_rollups"
+WATERMARK_OVERLAP = timedelta(minutes=5)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def mark_dirty(exhibition_ids):
+    """Have the next run recompute ``exhibition_ids`` from scratch (after bulk deletes)."""
+    from exhibitions.models import ExhibitionStats
+
+    ids = set(exhibition_ids)
+    if not ids:
+        return
+    existing = set(
+        ExhibitionStats.objects.filter(pk__in=ids).values_list("pk", flat=True)
+    )
+    ExhibitionStats.objects.filter(pk__in=existing).update(dirty=True)
+    ExhibitionStats.objects.bulk_create(
+        [ExhibitionStats(exhibition_id=pk, dirty=True) for pk in ids - existing],
+        ignore_conflicts=True,
+    )
+
+
+def _recompute_days(exhibition_id, days=None):
+    """Recompute the daily buckets of one exhibition (all of them if ``days`` is None)."""
+    from exhibitions.models import ExhibitionDailyStats, VisitorRegistration
+
+    regs = VisitorRegistration.objects.filter(exhibition_id=exhibition_id)
+    buckets = ExhibitionDailyStats.objects.filter(exhibition_id=exhibition_id)
+    if days is not None:
+        regs = regs.filter(registered_at__date__in=days)
+        buckets = buckets.filter(day__in=days)
+
+    rows = [
+        ExhibitionDailyStats(
+            exhibition_id=exhibition_id,
+            day=row["day"],
+            registrations=row["registrations"],
+            checked_in=row["checked_in"],
+        )
+        for row in regs.annotate(day=TruncDate("registered_at"))
+        .values("day")
+        .annotate(
+            registrations=Count("id"),
+            checked_in=Count("id", filter=Q(is_checked_in=True)),
+        )
+        .order_by()
+    ]
+
+    with transaction.atomic():
+        buckets.exclude(day__in=[row.day for row in rows]).delete()
+        ExhibitionDailyStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["exhibition", "day"],
+            update_fields=["registrations", "checked_in"],
+        )
+
+
+def _recompute_applications(exhibition_id):
+    from exhibitions.models import ExhibitionStats, ExhibitorApplication
+
+    apps = ExhibitorApplication.objects.filter(exhibition_id=exhibition_id)
+    by_status = dict(
+        apps.values_list("status").annotate(n=Count("id")).order_by()
+    )
+    business_types = {
+        (business_type or "UNKNOWN"): n
+        for business_type, n in apps.filter(status="APPROVED")
+        .values_list("user__exhibitorprofile__business_type")
+        .annotate(n=Count("id"))
+        .order_by()
+    }
+    ExhibitionStats.objects.update_or_create(
+        exhibition_id=exhibition_id,
+        defaults={"applications": by_status, "business_types": business_types, "dirty": False},
+    )
+
+
+def update_rollups():
+    """One incremental pass. Returns how many exhibitions / day buckets were recomputed."""
+    from exhibitions.models import (
+        Exhibition, ExhibitionStats, ExhibitorApplication, RollupWatermark, VisitorRegistration,
+    )
+
+    now = timezone.now()
+    watermark = RollupWatermark.objects.filter(pk=WATERMARK_NAME).first()
+    since = watermark.value - WATERMARK_OVERLAP if watermark else EPOCH
+
+    dirty = set(ExhibitionStats.objects.filter(dirty=True).values_list("pk", flat=True))
+
+    days_by_exhibition = defaultdict(set)
+    for exhibition_id, day in (
+        VisitorRegistration.objects.filter(updated_at__gt=since, updated_at__lte=now)
+        .annotate(day=TruncDate("registered_at"))
+        .values_list("exhibition_id", "day")
+        .distinct()
+        .order_by()
+    ):
+        days_by_exhibition[exhibition_id].add(day)
+
+    application_exhibitions = set(
+        ExhibitorApplication.objects.filter(updated_at__gt=since, updated_at__lte=now)
+        .values_list("exhibition_id", flat=True)
+        .distinct()
+        .order_by()
+    )
+
+    # Skip anything whose exhibition was deleted meanwhile.
+    live = set(
+        Exhibition.objects.filter(
+            pk__in=dirty | application_exhibitions | set(days_by_exhibition)
+        ).values_list("pk", flat=True)
+    )
+
+    buckets = 0
+    for exhibition_id in live & dirty:
+        _recompute_days(exhibition_id)
+        _recompute_applications(exhibition_id)
+    for exhibition_id, days in days_by_exhibition.items():
+        if exhibition_id in live and exhibition_id not in dirty:
+            _recompute_days(exhibition_id, sorted(days))
+            buckets += len(days)
+    for exhibition_id in application_exhibitions & live - dirty:
+        _recompute_applications(exhibition_id)
+
+    RollupWatermark.objects.update_or_create(pk=WATERMARK_NAME, defaults={"value": now})
+    return {"exhibitions": len(live), "day_buckets": buckets, "full_recomputes": len(live & dirty)}
+
+
+def exhibition_analytics(exhibition):
+    """The analytics payload for ``exhibition``, read from the rollups only."""
+    from exhibitions.models import (
+        ExhibitionDailyStats, ExhibitionStats, ExhibitorProfile, RollupWatermark,
+    )
+
+    days = list(
+        ExhibitionDailyStats.objects.filter(exhibition=exhibition)
+        .values_list("day", "registrations", "checked_in")
+    )
+    stats = ExhibitionStats.objects.filter(exhibition=exhibition).first()
+    watermark = RollupWatermark.objects.filter(pk=WATERMARK_NAME).first()
+
+    registrations = sum(row[1] for row in days)
+    checked_in = sum(row[2] for row in days)
+    labels = dict(ExhibitorProfile._meta.get_field("business_type").choices)
+    business_types = stats.business_types if stats else {}
+    booths_filled = exhibition.booth_capacity - exhibition.available_booths
+
+    return {
+        "exhibition_id": exhibition.id,
+        "name": exhibition.name,
+        "registrations_per_day": [
+            {"date": day, "registrations": n, "checked_in": c} for day, n, c in days
+        ],
+        "total_registrations": registrations,
+        "checked_in": checked_in,
+        "check_in_rate": round(checked_in / registrations, 4) if registrations else 0.0,
+        "applications": stats.applications if stats else {},
+        "business_types": sorted(
+            (
+                {"business_type": key, "label": labels.get(key, key), "count": n}
+                for key, n in business_types.items()
+            ),
+            key=lambda row: -row["count"],
+        ),
+        "booths": {
+            "capacity": exhibition.booth_capacity,
+            "filled": booths_filled,
+            "fill_rate": (
+                round(booths_filled / exhibition.booth_capacity, 4)
+                if exhibition.booth_capacity else 0.0
+            ),
+        },
+        "as_of": watermark.value if watermark else None,
+    }
@@ -0,0 +1,168 @@
+"""
+Approve / reject of exhibitor applications, in bulk or one at a time.
+
+``apply_decisions`` takes a list of ``{"application_id", "action",
+"booth_number"}`` for one exhibition and applies all of them in a single
+transaction, whatever the batch size (the single-application endpoint sends
+a batch of one):
+
+* the exhibition row is locked once and its ``available_booths`` adjusted by
+  one ``UPDATE`` for the net change (new approvals take a booth, rejecting a
+  previously approved application gives it back); if the batch needs more
+  booths than are left nothing is applied,
+* approvals are one ``UPDATE`` (booth numbers through ``CASE``), rejections
+  another,
+* approval emails are bulk-inserted into the outbox in the same transaction
+  and one ``dispatch_email_outbox`` run is queued on commit, which sends them
+  in batches over a pooled SMTP session,
+* applications another admin currently has claimed (review_queue.claim_next)
+  are refused, and every decided application's claim is cleared.
+
+Set-based updates send no ``post_save`` and do not apply ``auto_now``, so
+``updated_at`` (the analytics watermark) is set explicitly and the dashboard
+figures are fed through ``stats.record_exhibitors`` /
+``stats.exhibitor_approvals_removed``.
+"""
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from exhibitions.signals import exhibition_changed, exhibitors_changed
+from exhibitions.utils import review_queue, stats
+from exhibitions.utils.outbox import enqueue_emails
+
+MAX_DECISIONS = 1000
+ACTIONS = ("APPROVE", "REJECT")
+
+
+class DecisionError(ValueError):
+    pass
+
+
+class NoBoothsLeft(DecisionError):
+    pass
+
+
+class ClaimedByOther(DecisionError):
+    pass
+
+
+def parse_decisions(raw):
+    """Validate the request body. Returns ``{application_id: (action, booth_number)}``."""
+    if not isinstance(raw, list) or not raw:
+        raise DecisionError("decisions must be a non-empty list")
+    if len(raw) > MAX_DECISIONS:
+        raise DecisionError(f"At most {MAX_DECISIONS} decisions per request")
+
+    decisions = {}
+    for item in raw:
+        if not isinstance(item, dict):
+            raise DecisionError("Each decision must be an object")
+        try:
+            app_id = int(item.get("application_id"))
+            booth = item.get("booth_number")
+            booth = int(booth) if booth not in (None, "") else None
+        except (TypeError, ValueError):
+            raise DecisionError("application_id and booth_number must be integers")
+        action = str(item.get("action", "")).upper()
+        if action not in ACTIONS:
+            raise DecisionError(f"Invalid action for application {app_id}")
+        if booth is not None and booth < 0:
+            raise DecisionError(f"Invalid booth_number for application {app_id}")
+        if app_id in decisions:
+            raise DecisionError(f"Duplicate decision for application {app_id}")
+        decisions[app_id] = (action, booth)
+    return decisions
+
+
+def apply_decisions(exhibition_id, decisions, user):
+    """Apply parsed ``decisions`` by ``user`` atomically. Returns a summary dict."""
+    from exhibitions.models import Exhibition, ExhibitorApplication
+    from exhibitions.utils.tasks import dispatch_email_outbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        exhibition = Exhibition.objects.select_for_update().get(pk=exhibition_id)
+        apps = {
+            row["id"]: row
+            for row in ExhibitorApplication.objects.select_for_update(of=("self",))
+            .filter(exhibition_id=exhibition_id, id__in=list(decisions))
+            .values(
+                "id", "status", "badge", "user_id", "user__email", "user__username",
+                "claimed_by_id", "claim_expires_at",
+            )
+        }
+        missing = sorted(set(decisions) - set(apps))
+        if missing:
+            raise DecisionError(f"Applications not found for this exhibition: {missing}")
+        held = sorted(
+            pk for pk, row in apps.items()
+            if review_queue.held_by_other(row["claimed_by_id"], row["claim_expires_at"], user, now)
+        )
+        if held:
+            raise ClaimedByOther(f"Applications claimed by another reviewer: {held}")
+
+        approve = [pk for pk, (action, _) in decisions.items() if action == "APPROVE"]
+        reject = [pk for pk, (action, _) in decisions.items() if action == "REJECT"]
+        booths_taken = sum(1 for pk in approve if apps[pk]["status"] != "APPROVED")
+        booths_freed = sum(1 for pk in reject if apps[pk]["status"] == "APPROVED")
+        delta = booths_taken - booths_freed
+        if delta > exhibition.available_booths:
+            raise NoBoothsLeft(
+                f"No booths left: {booths_taken} new approval(s), "
+                f"{exhibition.available_booths + booths_freed} booth(s) available"
+            )
+
+        if approve:
+            ExhibitorApplication.objects.filter(id__in=approve).update(
+                status="APPROVED",
+                booth_number=Case(
+                    *[When(id=pk, then=Value(decisions[pk][1])) for pk in approve],
+                    output_field=IntegerField(),
+                ),
+                claimed_by=None, claim_expires_at=None, updated_at=now,
+            )
+        if reject:
+            ExhibitorApplication.objects.filter(id__in=reject).update(
+                status="REJECTED", claimed_by=None, claim_expires_at=None, updated_at=now,
+            )
+        if delta:
+            Exhibition.objects.filter(pk=exhibition_id).update(
+                available_booths=F("available_booths") - delta
+            )
+
+        emails = enqueue_emails(
+            {
+                "kind": "EXHIBITOR_APPROVAL",
+                "recipient": apps[pk]["user__email"],
+                "payload": {
+                    "email": apps[pk]["user__email"],
+                    "exhibitor_name": apps[pk]["user__username"],
+                    "exhibition_name": exhibition.name,
+                    "booth_number": decisions[pk][1],
+                    "badge_path": (
+                        default_storage.path(apps[pk]["badge"]) if apps[pk]["badge"] else None
+                    ),
+                },
+                "dedupe_key": f"exhibitor_approval:{pk}:{decisions[pk][1]}",
+            }
+            for pk in approve
+        )
+        stats.record_exhibitors(apps[pk]["user_id"] for pk in approve)
+        stats.exhibitor_approvals_removed(
+            apps[pk]["user_id"] for pk in reject if apps[pk]["status"] == "APPROVED"
+        )
+        # update() sends no signals: invalidate the cached public pages here
+        exhibitors_changed(exhibition_id)
+        if delta:
+            exhibition_changed(exhibition_id)
+        if emails:
+            transaction.on_commit(dispatch_email_outbox.delay)
+
+    return {
+        "approved": len(approve),
+        "rejected": len(reject),
+        "emails_queued": len(emails),
+        "available_booths": exhibition.available_booths - delta,
+    }
@@ -0,0 +1,116 @@
+"""
+Per-process rendering cache for transactional / invitation emails.
+
+Every email for the same exhibition renders the same HTML except for a couple
+of personal fields (visitor name, QR id, booth number…). Instead of running the
+template engine per message we:
+
+* compile each template once per process,
+* render it once per (template, exhibition version) with opaque tokens in place
+  of the personal fields and keep that fragment in a bounded LRU,
+* substitute the HTML-escaped personal values into the fragment per recipient
+  in a single regex pass,
+* build inline MIME assets (the logo) once, already base64-encoded, and attach
+  the same part to every message.
+
+The "exhibition version" is a digest of the shared (non-personal) context, so
+editing an exhibition naturally produces new fragments and stale ones age out
+of the LRU.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from email.mime.image import MIMEImage
+from functools import lru_cache
+
+from cachetools import LRUCache
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.html import escape
+
+FRAGMENT_CACHE_SIZE = 256
+
+_fragments = LRUCache(maxsize=FRAGMENT_CACHE_SIZE)
+_fragments_lock = threading.Lock()
+
+_TOKEN_RE = re.compile(r"__NE_FIELD_([a-z0-9_]+)__")
+
+
+def _token(field):
+    return f"__NE_FIELD_{field}__"
+
+
+@lru_cache(maxsize=None)
+def compiled_template(template_name):
+    """Resolve and compile ``template_name`` once per process."""
+    return get_template(template_name)
+
+
+def exhibition_version(shared_context):
+    """Stable digest of the shared part of a template context."""
+    raw = json.dumps(shared_context, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def render_personalised(template_name, shared_context, personal_context=None):
+    """
+    Render ``template_name`` with ``shared_context`` (same for every recipient
+    of an exhibition) and ``personal_context`` (per recipient). The template
+    engine only runs on a cache miss for the shared part.
+    """
+    personal_context = personal_context or {}
+    key = (
+        template_name,
+        exhibition_version(shared_context),
+        tuple(sorted(personal_context)),
+    )
+
+    with _fragments_lock:
+        fragment = _fragments.get(key)
+    if fragment is None:
+        context = dict(shared_context)
+        context.update({field: _token(field) for field in personal_context})
+        fragment = compiled_template(template_name).render(context)
+        with _fragments_lock:
+            _fragments[key] = fragment
+
+    if not personal_context:
+        return fragment
+
+    values = {field: escape(value) for field, value in personal_context.items()}
+    return _TOKEN_RE.sub(lambda m: values.get(m.group(1), m.group(0)), fragment)
+
+
+@lru_cache(maxsize=None)
+def _logo_bytes():
+    logo_path = os.path.join(settings.STATIC_ROOT, 'emails', 'logo.png')
+    if not os.path.exists(logo_path):
+        return None
+    with open(logo_path, 'rb') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def logo_part():
+    """
+    The inline logo as a ready-to-attach MIME part (``cid:logo``), built and
+    base64-encoded once per process. ``None`` if the logo is not deployed.
+    """
+    logo_bytes = _logo_bytes()
+    if not logo_bytes:
+        return None
+    part = MIMEImage(logo_bytes)
+    part.add_header('Content-ID', '<logo>')
+    part.add_header('Content-Disposition', 'inline', filename='logo.png')
+    return part
+
+
+def clear_caches():
+    """Drop every cached template, fragment and asset (e.g. after a deploy in-process)."""
+    with _fragments_lock:
+        _fragments.clear()
+    compiled_template.cache_clear()
+    _logo_bytes.cache_clear()
+    logo_part.cache_clear()
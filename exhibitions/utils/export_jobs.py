@@ -0,0 +1,292 @@
+"""
+Background export jobs.
+
+Even streamed, exporting a very large event keeps a web thread busy for as
+long as the download takes. Admins can instead request an export job:
+
+1. ``POST admin/exports/`` with ``exhibition_id``, ``kind`` (visitors,
+   exhibitors, applications, properties) and ``format`` (csv, xlsx,
+   parquet) returns 202 and a job id,
+2. ``run_export_job`` (Celery) reads the rows in chunks through the same
+   specs as the streamed CSV download (exhibitions/utils/exports.py), writes
+   them to a temporary file, records ``rows_done`` as it goes, and saves the
+   artifact under ``exports/<job id>/`` in the default storage,
+3. ``GET admin/exports/<id>/`` reports progress and, once done, a signed
+   download link valid for EXPORT_LINK_MAX_AGE seconds that needs no login.
+
+Each job carries a fingerprint of kind, format, exhibition and the state of
+the source rows (count, highest id, latest ``updated_at``). A request whose
+fingerprint matches a job that is still running, or finished within
+EXPORT_ARTIFACT_TTL, gets that job back instead of a new export. Edits to
+user or profile details do not change the fingerprint; the TTL bounds how
+long such an artifact is reused.
+
+A job's ``heartbeat_at`` is set when it is queued, when the worker starts it
+and at every progress update. A PENDING or RUNNING job with no heartbeat for
+EXPORT_STALE_AFTER (its worker died, or the task was lost) is never reused,
+and ``purge_expired_exports`` marks it FAILED.
+
+XLSX needs ``openpyxl`` and Parquet needs ``pyarrow`` (both pinned in
+requirements.txt); in an environment without one of them, a request for
+that format is rejected. Parquet columns are written as strings, matching
+the CSV.
+
+``run_export_job`` is routed to its own ``exports`` queue
+(CELERY_TASK_ROUTES), served by the ``celery-exports`` worker, so a long
+export never holds up emails and the other tasks on the default worker.
+"""
+import csv
+import hashlib
+import importlib.util
+import logging
+import os
+import tempfile
+from datetime import timedelta
+from itertools import islice
+
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .exports import EXPORT_CHUNK_SIZE, EXPORTS, safe_filename
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = "exports"
+EXPORT_ARTIFACT_TTL = timedelta(hours=24)
+EXPORT_STALE_AFTER = timedelta(minutes=30)   # PENDING/RUNNING with no heartbeat for this long has failed
+EXPORT_LINK_MAX_AGE = 3600            # seconds a download link stays valid
+PROGRESS_EVERY = 10000                # rows between progress updates
+SIGNING_SALT = "exhibitions.export-download"
+
+FORMAT_DEPENDENCIES = {"csv": None, "xlsx": "openpyxl", "parquet": "pyarrow"}
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportUnavailable(Exception):
+    """The requested export cannot be produced here (unknown kind, missing package)."""
+
+
+def check_available(kind, fmt):
+    if kind not in EXPORTS:
+        raise ExportUnavailable(f"Unknown export kind {kind!r}")
+    if fmt not in FORMAT_DEPENDENCIES:
+        raise ExportUnavailable(f"Unknown export format {fmt!r}")
+    package = FORMAT_DEPENDENCIES[fmt]
+    if package and importlib.util.find_spec(package) is None:
+        raise ExportUnavailable(f"{fmt.upper()} export requires the {package} package")
+
+
+def _fingerprint(kind, fmt, exhibition_id):
+    """(fingerprint, row count) of the rows ``kind`` would export right now."""
+    _, queryset_for = EXPORTS[kind]
+    state = queryset_for(exhibition_id).order_by().aggregate(
+        rows=Count("id"), top=Max("id"), changed=Max("updated_at"),
+    )
+    raw = f"{kind}:{fmt}:{exhibition_id}:{state['rows']}:{state['top']}:{state['changed']}"
+    return hashlib.sha256(raw.encode()).hexdigest(), state["rows"]
+
+
+def request_export(exhibition, kind, fmt, user=None):
+    """Return ``(job, created)``: a reusable job for this dataset, or a newly queued one."""
+    from exhibitions.models import ExportJob
+    from exhibitions.utils.tasks import run_export_job
+
+    check_available(kind, fmt)
+    fingerprint, rows = _fingerprint(kind, fmt, exhibition.id)
+
+    now = timezone.now()
+    reusable = (
+        ExportJob.objects.filter(fingerprint=fingerprint)
+        .filter(
+            Q(status__in=["PENDING", "RUNNING"], heartbeat_at__gte=now - EXPORT_STALE_AFTER) |
+            Q(status="DONE", finished_at__gte=now - EXPORT_ARTIFACT_TTL)
+        )
+        .order_by("-created_at")
+        .first()
+    )
+    if reusable is not None:
+        return reusable, False
+
+    with transaction.atomic():
+        job = ExportJob.objects.create(
+            exhibition=exhibition, kind=kind, format=fmt,
+            requested_by=user if user and user.is_authenticated else None,
+            fingerprint=fingerprint, rows_total=rows,
+        )
+        transaction.on_commit(lambda: run_export_job.delay(str(job.pk)))
+    return job, True
+
+
+# ---------------------------------------------------------------------------
+# Writers — header once, then batches of formatted rows
+# ---------------------------------------------------------------------------
+
+class CSVWriter:
+    def __init__(self, path, header):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class XLSXWriter:
+    def __init__(self, path, header):
+        from openpyxl import Workbook
+
+        self._path = path
+        self._book = Workbook(write_only=True)   # rows are streamed to disk, not kept
+        self._sheet = self._book.create_sheet("Export")
+        self._sheet.append(header)
+
+    def write(self, rows):
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self):
+        self._book.save(self._path)
+
+
+class ParquetWriter:
+    def __init__(self, path, header):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string()) for name in header])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self._writer.write_batch(self._pa.record_batch(
+            [
+                self._pa.array([None if v is None else str(v) for v in column], self._pa.string())
+                for column in columns
+            ],
+            schema=self._schema,
+        ))
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {"csv": CSVWriter, "xlsx": XLSXWriter, "parquet": ParquetWriter}
+
+
+def run_export(job_id):
+    from exhibitions.models import ExportJob
+
+    job = ExportJob.objects.select_related("exhibition").get(pk=job_id)
+    if job.status == "DONE":
+        return job
+    check_available(job.kind, job.format)
+    ExportJob.objects.filter(pk=job.pk).update(
+        status="RUNNING", rows_done=0, error="", heartbeat_at=timezone.now(),
+    )
+
+    spec, queryset_for = EXPORTS[job.kind]
+    rows = spec.rows(queryset_for(job.exhibition_id))
+    filename = f"{job.kind}-{safe_filename(job.exhibition.name)}.{job.format}"
+
+    fd, tmp_path = tempfile.mkstemp(suffix=f".{job.format}")
+    os.close(fd)
+    try:
+        writer = WRITERS[job.format](tmp_path, spec.header)
+        done = reported = 0
+        try:
+            while True:
+                batch = list(islice(rows, EXPORT_CHUNK_SIZE))
+                if not batch:
+                    break
+                writer.write(batch)
+                done += len(batch)
+                if done - reported >= PROGRESS_EVERY:
+                    ExportJob.objects.filter(pk=job.pk).update(rows_done=done, heartbeat_at=timezone.now())
+                    reported = done
+        finally:
+            writer.close()
+
+        with open(tmp_path, "rb") as f:
+            path = default_storage.save(f"{EXPORT_DIR}/{job.pk}/{filename}", File(f))
+        size = os.path.getsize(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        status="DONE", rows_done=done, rows_total=done, file=path, size=size,
+        finished_at=timezone.now(),
+    )
+    logger.info("Export %s: %d row(s), %d bytes -> %s", job.pk, done, size, path)
+    job.refresh_from_db()
+    return job
+
+
+# ---------------------------------------------------------------------------
+# Signed download links
+# ---------------------------------------------------------------------------
+
+def download_token(job):
+    return signing.dumps(str(job.pk), salt=SIGNING_SALT)
+
+
+def job_for_token(token):
+    """The finished job a download token points at, or None if invalid / expired."""
+    from exhibitions.models import ExportJob
+
+    try:
+        job_id = signing.loads(token, salt=SIGNING_SALT, max_age=EXPORT_LINK_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return ExportJob.objects.filter(pk=job_id, status="DONE").first()
+
+
+def fail_stale_jobs():
+    """Mark PENDING/RUNNING jobs with no heartbeat for EXPORT_STALE_AFTER as FAILED."""
+    from exhibitions.models import ExportJob
+
+    now = timezone.now()
+    return ExportJob.objects.filter(
+        status__in=["PENDING", "RUNNING"], heartbeat_at__lt=now - EXPORT_STALE_AFTER,
+    ).update(status="FAILED", error="Export stopped reporting progress", finished_at=now)
+
+
+def purge_expired_exports(batch_size=500):
+    """
+    Fail stale jobs, then delete artifacts and finished jobs older than
+    EXPORT_ARTIFACT_TTL. Returns the number of jobs deleted.
+    """
+    from exhibitions.models import ExportJob
+
+    stale = fail_stale_jobs()
+    if stale:
+        logger.warning("Marked %d stale export job(s) as failed", stale)
+
+    cutoff = timezone.now() - EXPORT_ARTIFACT_TTL
+    deleted = 0
+    while True:
+        jobs = list(
+            ExportJob.objects.filter(created_at__lt=cutoff)
+            .exclude(status__in=["PENDING", "RUNNING"])
+            .values_list("pk", "file")[:batch_size]
+        )
+        if not jobs:
+            return deleted
+        for _, path in jobs:
+            if path:
+                try:
+                    default_storage.delete(path)
+                except Exception:
+                    logger.warning("Could not delete export %s", path, exc_info=True)
+        deleted += ExportJob.objects.filter(pk__in=[pk for pk, _ in jobs]).delete()[0]
@@ -0,0 +1,167 @@
+"""
+Admin list exports.
+
+Each export is described once — header, the ``values_list`` fields it reads
+and how a row of those values becomes a CSV row — so the download paths never
+build model instances. ``stream_csv`` reads the queryset with
+``iterator(chunk_size=EXPORT_CHUNK_SIZE)`` (a server-side cursor on
+Postgres) and yields the CSV in ~64 KB pieces, optionally gzip-compressed,
+so a worker holds one chunk of rows and one piece of output however large
+the event is.
+"""
+import csv
+import io
+import re
+import zlib
+
+from .people_search import search_filter
+
+EXPORT_CHUNK_SIZE = 1000
+FLUSH_BYTES = 64 * 1024
+
+
+def _yes_no(value):
+    return "Yes" if value else "No"
+
+
+def _timestamp(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else "N/A"
+
+
+def _exhibitor_row(id, company_name, username, email, booth_number, contact_number,
+                   business_type, council_area):
+    if company_name is None:  # no exhibitor profile
+        return [id, username, email, booth_number or "N/A", "N/A", "N/A", "N/A"]
+    return [id, company_name, email, booth_number or "N/A", contact_number, business_type,
+            council_area]
+
+
+class ExportSpec:
+    def __init__(self, name, header, fields, format_row):
+        self.name = name
+        self.header = header
+        self.fields = fields
+        self.format_row = format_row
+
+    def rows(self, queryset):
+        """Formatted rows (without the header), read in chunks."""
+        values = queryset.values_list(*self.fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for row in values:
+            yield self.format_row(row)
+
+
+VISITORS = ExportSpec(
+    "visitors",
+    ["ID", "Visitor Name", "Email", "Registered At", "Checked In", "QR Code"],
+    ("id", "user__username", "user__email", "registered_at", "is_checked_in", "qr_code"),
+    lambda r: [r[0], r[1], r[2], _timestamp(r[3]), _yes_no(r[4]), str(r[5])],
+)
+
+EXHIBITORS = ExportSpec(
+    "exhibitors",
+    ["ID", "Company Name", "Email", "Booth Number", "Contact Number", "Business Type", "Council Area"],
+    (
+        "id", "user__exhibitorprofile__company_name", "user__username", "user__email",
+        "booth_number", "user__exhibitorprofile__contact_number",
+        "user__exhibitorprofile__business_type", "user__exhibitorprofile__council_area",
+    ),
+    lambda r: _exhibitor_row(*r),
+)
+
+APPLICATIONS = ExportSpec(
+    "applications",
+    ["ID", "Company Name", "Email", "Status", "Booth Number", "Transaction ID", "Applied At"],
+    (
+        "id", "user__exhibitorprofile__company_name", "user__username", "user__email",
+        "status", "booth_number", "transaction_id", "applied_at",
+    ),
+    lambda r: [r[0], r[1] or r[2], r[3], r[4], r[5] or "N/A", r[6] or "N/A", _timestamp(r[7])],
+)
+
+PROPERTIES = ExportSpec(
+    "properties",
+    ["ID", "Title", "Exhibitor Email", "Location", "Price From", "Price To", "Created At"],
+    ("id", "title", "exhibitor__email", "location", "price_from", "price_to", "created_at"),
+    lambda r: [r[0], r[1], r[2], r[3], r[4], r[5], _timestamp(r[6])],
+)
+
+
+def visitors_queryset(exhibition_id, search=""):
+    from exhibitions.models import VisitorRegistration
+
+    regs = VisitorRegistration.objects.filter(exhibition_id=exhibition_id)
+    if search:
+        regs = regs.filter(search_filter(search))
+    return regs.order_by("id")
+
+
+def exhibitors_queryset(exhibition_id, search=""):
+    from exhibitions.models import ExhibitorApplication
+
+    apps = ExhibitorApplication.objects.filter(exhibition_id=exhibition_id, status="APPROVED")
+    if search:
+        apps = apps.filter(search_filter(search, company=True))
+    return apps.order_by("id")
+
+
+def applications_queryset(exhibition_id):
+    from exhibitions.models import ExhibitorApplication
+
+    return ExhibitorApplication.objects.filter(exhibition_id=exhibition_id).order_by("id")
+
+
+def properties_queryset(exhibition_id):
+    from exhibitions.models import Property
+
+    return Property.objects.filter(exhibition_id=exhibition_id).order_by("id")
+
+
+# export kind -> (spec, queryset for an exhibition)
+EXPORTS = {
+    "visitors": (VISITORS, visitors_queryset),
+    "exhibitors": (EXHIBITORS, exhibitors_queryset),
+    "applications": (APPLICATIONS, applications_queryset),
+    "properties": (PROPERTIES, properties_queryset),
+}
+
+
+def safe_filename(name):
+    return re.sub(r"[^a-zA-Z0-9_\-]", "_", name)
+
+
+def csv_chunks(spec, queryset):
+    """Yield the CSV (header included) as UTF-8 byte strings of about FLUSH_BYTES."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(spec.header)
+    for row in spec.rows(queryset):
+        writer.writerow(row)
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_csv(spec, queryset, filename, gzip=False):
+    """A StreamingHttpResponse downloading ``queryset`` as ``filename``.csv(.gz)."""
+    from django.http import StreamingHttpResponse
+
+    chunks = csv_chunks(spec, queryset)
+    if gzip:
+        response = StreamingHttpResponse(gzip_chunks(chunks), content_type="application/gzip")
+        response["Content-Disposition"] = f'attachment; filename="{filename}.csv.gz"'
+    else:
+        response = StreamingHttpResponse(chunks, content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
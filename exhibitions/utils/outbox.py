@@ -0,0 +1,199 @@
+"""
+Transactional email outbox.
+
+Views call ``enqueue_email`` inside the same ``transaction.atomic()`` block as
+the registration / approval they are confirming. Nothing touches the broker on
+the request path; ``dispatch_email_outbox`` (Celery Beat) drains the table:
+
+* rows are claimed in batches with ``SELECT … FOR UPDATE SKIP LOCKED`` and
+  marked SENDING in a short transaction, so several dispatchers never send the
+  same row; the send itself runs outside any transaction and the results are
+  recorded in a second one. A SENDING row whose lease (OUTBOX_SENDING_LEASE)
+  ran out — its worker died — is picked up again,
+* pending copies of the same notification (same ``dedupe_key``) are coalesced
+  into one send, and anything already SENT (or being sent) under that key is
+  not sent again; ``enqueue_email(..., resend=True)`` is how to send it anyway,
+* each batch goes out over one pooled SMTP session,
+* every row records its status, attempt count and last error; failures are
+  retried with exponential backoff up to OUTBOX_MAX_ATTEMPTS,
+* when the shared mail rate limit is exhausted the unsent rows are pushed back
+  by ``retry_after`` without spending an attempt, and the run stops.
+"""
+from datetime import timedelta
+from uuid import uuid4
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.mail_throttle import MailThrottled
+from accounts.smtp_pool import send_each
+from exhibitions.models import EmailOutbox
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_BATCHES = 20          # per dispatcher run, so one run never hogs the worker
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_SENDING_LEASE = timedelta(minutes=10)   # a SENDING row older than this is retried
+
+
+def _builders():
+    from exhibitions.utils.tasks import (
+        build_exhibitor_approval_message, build_visitor_qr_message,
+    )
+    return {
+        "VISITOR_QR": build_visitor_qr_message,
+        "EXHIBITOR_APPROVAL": build_exhibitor_approval_message,
+    }
+
+
+def enqueue_email(kind, recipient, payload, dedupe_key, resend=False):
+    """
+    Queue one transactional email. Call inside the caller's transaction so the
+    email exists if and only if the change that triggered it commits.
+
+    ``resend=True`` is a deliberate repeat of a notification that may already
+    have been sent: the key gets a nonce so the SENT copy does not suppress it.
+    """
+    if resend:
+        dedupe_key = f"{dedupe_key}:resend:{uuid4().hex}"
+    return EmailOutbox.objects.create(
+        kind=kind,
+        recipient=recipient,
+        payload=payload,
+        dedupe_key=dedupe_key,
+    )
+
+
+def enqueue_emails(entries):
+    """Bulk version of ``enqueue_email``: ``entries`` is an iterable of dicts."""
+    return EmailOutbox.objects.bulk_create(
+        [EmailOutbox(**entry) for entry in entries]
+    )
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _claim(batch_size, now):
+    """
+    Claim one batch in a short transaction: coalesce it, mark the rows to send
+    SENDING for OUTBOX_SENDING_LEASE and return them.
+    Returns (claimed, to_send, coalesced).
+    """
+    due = Q(status__in=["PENDING", "SENDING"], next_attempt_at__lte=now)
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("id")[:batch_size]
+        )
+        if not rows:
+            return 0, [], 0
+
+        # ---- Coalesce: newest due copy per key wins; skip keys already sent or in flight ----
+        handled = set(
+            EmailOutbox.objects
+            .filter(dedupe_key__in={r.dedupe_key for r in rows})
+            .filter(Q(status="SENT") | Q(status="SENDING", next_attempt_at__gt=now))
+            .values_list("dedupe_key", flat=True)
+        )
+        latest = {}
+        for row in rows:
+            latest[row.dedupe_key] = row
+        to_send = [row for key, row in latest.items() if key not in handled]
+        send_ids = {row.id for row in to_send}
+
+        EmailOutbox.objects.filter(id__in=send_ids).update(
+            status="SENDING", next_attempt_at=now + OUTBOX_SENDING_LEASE,
+        )
+        coalesced = EmailOutbox.objects.filter(
+            id__in=[row.id for row in rows if row.id not in send_ids]
+        ).update(status="COALESCED")
+
+    return len(rows), to_send, coalesced
+
+
+def _drain_batch(batch_size):
+    """
+    Claim, coalesce and send one batch.
+    Returns (claimed, sent, failed, coalesced, throttled).
+
+    Sending happens outside any transaction (SMTP and the mail rate limiter
+    can take a while), so no row lock is held meanwhile and a worker dying
+    mid-batch does not roll back the record of what was already delivered.
+    Rows it leaves SENDING become due again once their lease runs out.
+    """
+    builders = _builders()
+    now = timezone.now()
+    claimed, to_send, coalesced = _claim(batch_size, now)
+    if not to_send:
+        return claimed, 0, 0, coalesced, False
+
+    # ---- Build messages; a payload that cannot be built is a failed attempt ----
+    messages, buildable, results = [], [], {}
+    for row in to_send:
+        try:
+            messages.append(builders[row.kind](**row.payload))
+            buildable.append(row)
+        except Exception as exc:
+            results[row.id] = exc
+
+    # ---- Send the whole batch over one pooled SMTP session ----
+    if messages:
+        try:
+            errors = send_each(messages)
+        except Exception as exc:  # could not even open a session
+            errors = [exc] * len(messages)
+        for row, error in zip(buildable, errors):
+            results[row.id] = error
+
+    # ---- Record outcome ----
+    done = timezone.now()
+    sent = failed = 0
+    throttled = False
+    for row in to_send:
+        error = results.get(row.id)
+        if isinstance(error, MailThrottled):
+            # Never reached SMTP: reschedule without spending an attempt
+            row.status = "PENDING"
+            row.next_attempt_at = done + timedelta(seconds=error.retry_after)
+            throttled = True
+            continue
+        row.attempts += 1
+        if error is None:
+            row.status = "SENT"
+            row.sent_at = done
+            row.last_error = ""
+            sent += 1
+        else:
+            row.last_error = f"{type(error).__name__}: {error}"[:2000]
+            if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                row.status = "FAILED"
+            else:
+                row.status = "PENDING"
+                row.next_attempt_at = done + _retry_delay(row.attempts)
+            failed += 1
+
+    with transaction.atomic():
+        EmailOutbox.objects.bulk_update(
+            to_send,
+            ["status", "attempts", "last_error", "next_attempt_at", "sent_at"],
+        )
+
+    return claimed, sent, failed, coalesced, throttled
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, max_batches=OUTBOX_MAX_BATCHES):
+    """Drain up to ``max_batches`` batches. Returns (sent, failed, coalesced)."""
+    sent_total = failed_total = coalesced_total = 0
+    for _ in range(max_batches):
+        claimed, sent, failed, coalesced, throttled = _drain_batch(batch_size)
+        sent_total += sent
+        failed_total += failed
+        coalesced_total += coalesced
+        if throttled or claimed < batch_size:
+            break
+    return sent_total, failed_total, coalesced_total
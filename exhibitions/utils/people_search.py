@@ -0,0 +1,84 @@
+"""
+Admin people search (visitor and exhibitor lists of an exhibition).
+
+Searches run ``icontains`` over the user's username and email and, for
+exhibitors, the profile's company name, whatever the query looks like. On
+Postgres Django compiles that to ``UPPER(col) LIKE UPPER('%query%')``; the
+``pg_trgm`` GIN indexes on ``UPPER(col)`` (accounts.User, ExhibitorProfile)
+answer it for queries of three or more characters, so a keystroke in the
+search box no longer scans every joined row. Shorter queries cannot use a
+trigram index and fall back to scanning the exhibition's rows, which the
+``limit`` keeps cheap.
+
+The search endpoints are meant to be called as the admin types: they return
+at most ``limit`` (capped at MAX_RESULTS) slim rows plus ``has_more``
+instead of a COUNT, and echo the query so a debounced client can drop
+responses for input it has already moved past.
+"""
+from django.db.models import Q
+
+DEFAULT_RESULTS = 20
+MAX_RESULTS = 50
+
+
+def search_filter(query, company=False, prefix="user__"):
+    """``Q`` matching ``query`` against the user fields reachable through ``prefix``."""
+    query = query.strip()
+    condition = (
+        Q(**{f"{prefix}username__icontains": query}) |
+        Q(**{f"{prefix}email__icontains": query})
+    )
+    if company:
+        condition |= Q(**{f"{prefix}exhibitorprofile__company_name__icontains": query})
+    return condition
+
+
+def _capped(queryset, fields, limit):
+    limit = max(1, min(limit, MAX_RESULTS))
+    rows = list(queryset.values(*fields)[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def search_visitors(exhibition_id, query, limit=DEFAULT_RESULTS):
+    """``(rows, has_more)`` of the exhibition's visitors matching ``query``."""
+    from exhibitions.models import VisitorRegistration
+
+    rows, has_more = _capped(
+        VisitorRegistration.objects.filter(exhibition_id=exhibition_id)
+        .filter(search_filter(query))
+        .order_by("user__email"),
+        ("id", "user__username", "user__email", "is_checked_in"),
+        limit,
+    )
+    return [
+        {
+            "id": row["id"],
+            "name": row["user__username"],
+            "email": row["user__email"],
+            "is_checked_in": row["is_checked_in"],
+        }
+        for row in rows
+    ], has_more
+
+
+def search_exhibitors(exhibition_id, query, limit=DEFAULT_RESULTS):
+    """``(rows, has_more)`` of the exhibition's approved exhibitors matching ``query``."""
+    from exhibitions.models import ExhibitorApplication
+
+    rows, has_more = _capped(
+        ExhibitorApplication.objects.filter(exhibition_id=exhibition_id, status="APPROVED")
+        .filter(search_filter(query, company=True))
+        .order_by("user__email"),
+        ("id", "user__username", "user__email", "user__exhibitorprofile__company_name",
+         "booth_number"),
+        limit,
+    )
+    return [
+        {
+            "id": row["id"],
+            "company_name": row["user__exhibitorprofile__company_name"] or row["user__username"],
+            "email": row["user__email"],
+            "booth_number": row["booth_number"],
+        }
+        for row in rows
+    ], has_more
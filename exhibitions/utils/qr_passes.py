@@ -0,0 +1,98 @@
+"""
+Pre-rendered visitor pass (QR) images.
+
+Each registration's pass is rendered once — a compact 1-bit optimised PNG and
+an SVG — and stored content-addressed under ``passes/<aa>/<sha256>.{png,svg}``,
+the hash covering both images. It is kept on
+``VisitorRegistration.qr_pass_hash`` so emails (including retries and resends)
+and the app's "my QR" screens read the stored files instead of regenerating
+the QR code every time.
+
+Rendering happens off the request path: the first confirmation email built
+by the outbox dispatcher stores the images, or the first "my QR" request if
+that comes sooner (``prerender_passes`` fills in bulk imports).
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PASS_DIR = "passes"
+PASS_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def render_pass_images(qr_code_uuid):
+    """Render ``qr_code_uuid`` as (png_bytes, svg_bytes)."""
+    import qrcode
+    import qrcode.image.svg
+
+    # Error correction M keeps a UUID at version 3 (29×29 modules), which scans
+    # reliably on phone screens and paper at a fraction of the H/box-10 size.
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=8,
+        border=4,
+    )
+    qr.add_data(qr_code_uuid)
+    qr.make(fit=True)
+
+    buf = BytesIO()
+    qr.make_image().save(buf, format="PNG", optimize=True)
+    svg = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).to_string()
+    return buf.getvalue(), svg
+
+
+def pass_path(pass_hash, fmt):
+    return f"{PASS_DIR}/{pass_hash[:2]}/{pass_hash}.{fmt}"
+
+
+def store_pass_images(registration):
+    """
+    Render and store the pass images for ``registration`` unless already done.
+    Returns the content hash. Identical content is written only once.
+    """
+    if registration.qr_pass_hash:
+        return registration.qr_pass_hash
+
+    png, svg = render_pass_images(str(registration.qr_code))
+    # Both images under one hash, so a change to either moves both paths
+    # (and the ETag of either format).
+    pass_hash = hashlib.sha256(png + b"\0" + svg).hexdigest()
+    for fmt, content in (("png", png), ("svg", svg)):
+        path = pass_path(pass_hash, fmt)
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(content))
+
+    registration.qr_pass_hash = pass_hash
+    type(registration).objects.filter(pk=registration.pk).update(qr_pass_hash=pass_hash)
+    return pass_hash
+
+
+def read_pass_image(registration, fmt="png"):
+    """Stored pass image bytes for ``registration``, rendering them first if missing."""
+    pass_hash = store_pass_images(registration)
+    path = pass_path(pass_hash, fmt)
+    if not default_storage.exists(path):
+        # Storage was wiped; re-render and re-store under the same hash.
+        registration.qr_pass_hash = ""
+        pass_hash = store_pass_images(registration)
+        path = pass_path(pass_hash, fmt)
+    with default_storage.open(path, "rb") as f:
+        return f.read()
+
+
+def get_pass_png(qr_code_uuid):
+    """
+    PNG for the pass with ``qr_code_uuid``: the stored copy when the
+    registration exists, otherwise rendered in memory.
+    """
+    from exhibitions.models import VisitorRegistration
+
+    registration = VisitorRegistration.objects.filter(qr_code=qr_code_uuid).first()
+    if registration is None:
+        return render_pass_images(qr_code_uuid)[0]
+    return read_pass_image(registration, "png")
@@ -0,0 +1,175 @@
+"""
+Exhibitor application review queue.
+
+The full application list serializes every application of an exhibition,
+in every status, with nested user / profile data and absolute file URLs.
+The review queue instead returns one page at a time, oldest application
+first, as a flat ``values()`` projection of just what a reviewer needs.
+
+Pages are keyset-paginated on ``(applied_at, id)``: the response carries an
+opaque ``next_cursor`` encoding the last row, and the next page is read with
+``WHERE (applied_at, id) > cursor``. Together with the
+``(exhibition, status, applied_at, id)`` index each page is a short index
+range scan however deep into the queue the reviewer is, and applications
+approved or rejected meanwhile never shift rows between pages the way an
+OFFSET would.
+
+Per-status counts (for the queue tabs) are only computed on the first page.
+
+When several admins work the same exhibition, each one claims the next
+batch of pending applications with ``claim_next``. Candidate rows are read
+with ``SELECT … FOR UPDATE SKIP LOCKED``, so concurrent claimers take
+disjoint rows without waiting on each other, and are stamped with
+``claimed_by`` / ``claim_expires_at``. A claim lapses after CLAIM_TTL, so
+rows claimed by a reviewer who walked away return to the pool; claiming
+again renews the reviewer's own claims. Decisions on applications claimed
+by someone else are refused (exhibitions/utils/application_decisions.py),
+and a decision clears the claim.
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .people_search import search_filter
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+CLAIM_TTL = timedelta(minutes=15)
+MAX_CLAIM = 50
+
+FIELDS = (
+    "id", "status", "applied_at", "booth_number", "transaction_id", "payment_screenshot",
+    "user_id", "user__username", "user__email",
+    "user__exhibitorprofile__company_name", "user__exhibitorprofile__business_type",
+    "claimed_by_id", "claim_expires_at",
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(applied_at, pk):
+    raw = f"{applied_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        applied_at, pk = raw.split("|")
+        return datetime.fromisoformat(applied_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def _row(values, request, now=None):
+    screenshot = values["payment_screenshot"]
+    expires = values["claim_expires_at"]
+    claimed = expires is not None and expires > (now or timezone.now())
+    return {
+        "id": values["id"],
+        "status": values["status"],
+        "applied_at": values["applied_at"],
+        "booth_number": values["booth_number"],
+        "transaction_id": values["transaction_id"],
+        "payment_screenshot": (
+            request.build_absolute_uri(default_storage.url(screenshot)) if screenshot else None
+        ),
+        "user_id": values["user_id"],
+        "email": values["user__email"],
+        "company_name": values["user__exhibitorprofile__company_name"] or values["user__username"],
+        "business_type": values["user__exhibitorprofile__business_type"],
+        "claimed_by": values["claimed_by_id"] if claimed else None,
+        "claim_expires_at": expires if claimed else None,
+    }
+
+
+def review_page(request, exhibition_id, status="PENDING", search="", cursor=None,
+                limit=DEFAULT_PAGE_SIZE):
+    """One page of the queue as a response payload. ``status=None`` lists every status."""
+    from exhibitions.models import ExhibitorApplication
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    base = ExhibitorApplication.objects.filter(exhibition_id=exhibition_id)
+
+    apps = base.filter(status=status) if status else base
+    if search:
+        apps = apps.filter(search_filter(search, company=True))
+    if cursor:
+        applied_at, pk = decode_cursor(cursor)
+        apps = apps.filter(Q(applied_at__gt=applied_at) | Q(applied_at=applied_at, id__gt=pk))
+
+    rows = list(apps.order_by("applied_at", "id").values(*FIELDS)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    now = timezone.now()
+    payload = {
+        "data": [_row(values, request, now) for values in rows],
+        "next_cursor": (
+            encode_cursor(rows[-1]["applied_at"], rows[-1]["id"]) if has_more else None
+        ),
+        "limit": limit,
+    }
+    if not cursor:
+        payload["counts"] = dict(
+            base.values_list("status").annotate(n=Count("id")).order_by()
+        )
+    return payload
+
+
+def _claimable(user, now):
+    """Unclaimed, lapsed, or already ours."""
+    return Q(claim_expires_at__isnull=True) | Q(claim_expires_at__lte=now) | Q(claimed_by=user)
+
+
+def claim_next(request, exhibition_id, user, count):
+    """
+    Claim up to ``count`` pending applications for ``user``, oldest first,
+    skipping rows other reviewers are claiming right now. Returns the claimed
+    rows in the review-queue projection.
+    """
+    from exhibitions.models import ExhibitorApplication
+
+    count = max(1, min(count, MAX_CLAIM))
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            ExhibitorApplication.objects.select_for_update(skip_locked=True)
+            .filter(exhibition_id=exhibition_id, status="PENDING")
+            .filter(_claimable(user, now))
+            .order_by("applied_at", "id")
+            .values_list("id", flat=True)[:count]
+        )
+        # Not touching updated_at: a claim does not change the exported data.
+        ExhibitorApplication.objects.filter(id__in=ids).update(
+            claimed_by=user, claim_expires_at=now + CLAIM_TTL,
+        )
+
+    rows = ExhibitorApplication.objects.filter(id__in=ids).order_by("applied_at", "id").values(*FIELDS)
+    return [_row(values, request, now) for values in rows]
+
+
+def release_claims(exhibition_id, user, application_ids=None):
+    """Give back ``user``'s claims (all of them for this exhibition if no ids). Returns the count."""
+    from exhibitions.models import ExhibitorApplication
+
+    claims = ExhibitorApplication.objects.filter(exhibition_id=exhibition_id, claimed_by=user)
+    if application_ids is not None:
+        claims = claims.filter(id__in=application_ids)
+    return claims.update(claimed_by=None, claim_expires_at=None)
+
+
+
+def held_by_other(claimed_by_id, claim_expires_at, user, now=None):
+    """Whether a row's claim belongs to a reviewer other than ``user`` and is still live."""
+    return (
+        claimed_by_id is not None and claimed_by_id != user.pk
+        and claim_expires_at is not None and claim_expires_at > (now or timezone.now())
+    )
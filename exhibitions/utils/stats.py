@@ -0,0 +1,291 @@
+"""
+Rollups behind the admin dashboard.
+
+The dashboard used to run ``COUNT(DISTINCT user)`` over every
+``VisitorRegistration`` and approved ``ExhibitorApplication`` on each load.
+The figures are now maintained incrementally in Redis and read in O(1):
+
+* ``stats:dashboard`` (hash) — ``events_total`` / ``events_active``,
+  recounted whenever an exhibition is saved or deleted (a small table) and
+  after the nightly deactivation job, plus the exact unique visitor /
+  exhibitor counts as of the last reconcile,
+* ``stats:hll:visitors`` / ``stats:hll:exhibitors`` — HyperLogLog sketches
+  of user ids, fed on every registration and approval (12 KB each however
+  many users there are),
+* ``stats:removed:visitors`` / ``stats:removed:exhibitors`` — users who no
+  longer count (last registration deleted, last approved application
+  rejected or deleted, account deleted) since the last reconcile; a user who
+  qualifies again is taken back out. Removals are recorded set-based by the
+  code that deletes (exhibition delete, account deletion, application
+  decisions), not by per-row delete signals, which would stop Django from
+  fast-deleting the two largest tables.
+
+A figure is the exact count at the last reconcile, plus the users the sketch
+has gained since (``PFCOUNT`` now minus ``PFCOUNT`` right after the rebuild;
+the ~0.8% sketch error applies to that day's growth only), minus the removed
+set.
+
+``reconcile_dashboard_stats`` (nightly beat job) counts the users exactly
+while streaming them into fresh sketches, then swaps the sketches and the
+counts in and clears the removed sets with one MULTI. While it runs,
+``record_*`` also add to a side sketch that is merged in before the swap, so
+no registration or approval made during the rebuild is lost.
+
+Updates are sent after the surrounding transaction commits and never fail
+the request; if the rollups are missing or Redis is down, the dashboard
+falls back to counting in the database.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from backend.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_KEY = "stats:dashboard"
+VISITORS_HLL = "stats:hll:visitors"
+EXHIBITORS_HLL = "stats:hll:exhibitors"
+VISITORS_REMOVED = "stats:removed:visitors"
+EXHIBITORS_REMOVED = "stats:removed:exhibitors"
+REBUILDING_KEY = "stats:rebuilding"
+RECONCILE_QUEUED_KEY = "stats:reconcile:queued"
+REBUILD_CHUNK_SIZE = 10000
+REBUILD_MAX_SECONDS = 3600      # the rebuilding flag outlives a crashed reconcile by at most this
+
+# KEYS[1] = sketch, KEYS[2] = its side sketch, KEYS[3] = removed set,
+# KEYS[4] = rebuilding flag; ARGV = user ids
+_RECORD_SCRIPT = """
+redis.call('PFADD', KEYS[1], unpack(ARGV))
+if redis.call('EXISTS', KEYS[4]) == 1 then
+    redis.call('PFADD', KEYS[2], unpack(ARGV))
+end
+redis.call('SREM', KEYS[3], unpack(ARGV))
+return 1
+"""
+
+_record_script = None
+
+
+def _after_commit(func, *args):
+    def run():
+        try:
+            func(*args)
+        except RedisError as exc:
+            logger.warning("Dashboard rollup update failed (%s); the nightly reconcile will fix it.", exc)
+
+    transaction.on_commit(run)
+
+
+def _side(key):
+    return f"{key}:during-rebuild"
+
+
+def _record(sketch, removed, user_ids):
+    global _record_script
+    if _record_script is None:
+        _record_script = get_redis().register_script(_RECORD_SCRIPT)
+    _record_script(keys=[sketch, _side(sketch), removed, REBUILDING_KEY], args=list(user_ids))
+
+
+def _count_events():
+    from exhibitions.models import Exhibition
+
+    return {
+        "events_total": Exhibition.objects.count(),
+        "events_active": Exhibition.objects.filter(is_active=True).count(),
+    }
+
+
+def refresh_event_counts():
+    get_redis().hset(DASHBOARD_KEY, mapping=_count_events())
+
+
+def record_visitor(user_id):
+    """A user registered for an exhibition."""
+    _after_commit(_record, VISITORS_HLL, VISITORS_REMOVED, [user_id])
+
+
+def record_exhibitor(user_id):
+    """A user had an exhibitor application approved."""
+    _after_commit(_record, EXHIBITORS_HLL, EXHIBITORS_REMOVED, [user_id])
+
+
+def record_exhibitors(user_ids):
+    """Bulk ``record_exhibitor`` for set-based approvals, which send no post_save."""
+    user_ids = list(user_ids)
+    if user_ids:
+        _after_commit(_record, EXHIBITORS_HLL, EXHIBITORS_REMOVED, user_ids)
+
+
+def _removed(key, user_ids):
+    if user_ids:
+        _after_commit(get_redis().sadd, key, *user_ids)
+
+
+def visitor_registrations_removed(user_ids):
+    """
+    Registrations of ``user_ids`` were deleted; call after the delete, inside
+    its transaction. Users with another registration still count.
+    """
+    from exhibitions.models import VisitorRegistration
+
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    still_registered = set(
+        VisitorRegistration.objects.filter(user_id__in=user_ids)
+        .values_list("user_id", flat=True).distinct()
+    )
+    _removed(VISITORS_REMOVED, sorted(user_ids - still_registered))
+
+
+def exhibitor_approvals_removed(user_ids):
+    """
+    Approved applications of ``user_ids`` were rejected or deleted; call after
+    the change, inside its transaction. Users with another approval still count.
+    """
+    from exhibitions.models import ExhibitorApplication
+
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    still_approved = set(
+        ExhibitorApplication.objects.filter(user_id__in=user_ids, status="APPROVED")
+        .values_list("user_id", flat=True).distinct()
+    )
+    _removed(EXHIBITORS_REMOVED, sorted(user_ids - still_approved))
+
+
+def events_changed():
+    _after_commit(refresh_event_counts)
+
+
+def _exact_counts():
+    from exhibitions.models import ExhibitorApplication, VisitorRegistration
+
+    counts = _count_events()
+    counts["total_visitors"] = VisitorRegistration.objects.values("user").distinct().count()
+    counts["total_exhibitors"] = (
+        ExhibitorApplication.objects.filter(status="APPROVED").values("user").distinct().count()
+    )
+    return counts
+
+
+def _build_sketch(key, user_ids):
+    """Stream distinct ``user_ids`` into ``key``'s rebuild sketch. Returns (rebuild key, count)."""
+    r = get_redis()
+    tmp = f"{key}:rebuild"
+    r.delete(tmp)
+    count = 0
+    chunk = []
+    for user_id in user_ids:
+        chunk.append(user_id)
+        if len(chunk) == REBUILD_CHUNK_SIZE:
+            r.pfadd(tmp, *chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        r.pfadd(tmp, *chunk)
+        count += len(chunk)
+    return tmp, count
+
+
+def reconcile():
+    """Recompute every dashboard figure from the database. Returns the exact counts."""
+    from exhibitions.models import ExhibitorApplication, VisitorRegistration
+
+    r = get_redis()
+    # From here on record_* also feed the side sketches, merged in at the swap.
+    r.set(REBUILDING_KEY, 1, ex=REBUILD_MAX_SECONDS)
+    for key in (VISITORS_HLL, EXHIBITORS_HLL):
+        r.delete(_side(key))
+
+    visitors_tmp, total_visitors = _build_sketch(
+        VISITORS_HLL,
+        VisitorRegistration.objects.values_list("user_id", flat=True)
+        .distinct().order_by().iterator(chunk_size=REBUILD_CHUNK_SIZE),
+    )
+    exhibitors_tmp, total_exhibitors = _build_sketch(
+        EXHIBITORS_HLL,
+        ExhibitorApplication.objects.filter(status="APPROVED")
+        .values_list("user_id", flat=True)
+        .distinct().order_by().iterator(chunk_size=REBUILD_CHUNK_SIZE),
+    )
+    counts = dict(_count_events(), total_visitors=total_visitors, total_exhibitors=total_exhibitors)
+
+    # The baselines are the rebuilt sketches' own estimates, so the delta read
+    # by dashboard_stats starts at zero whatever the sketch error.
+    pipe = r.pipeline()
+    pipe.pfcount(visitors_tmp)
+    pipe.pfcount(exhibitors_tmp)
+    visitors_base, exhibitors_base = pipe.execute()
+
+    pipe = r.pipeline()   # MULTI: readers see the old or the new figures, never a mix
+    for key, tmp in ((VISITORS_HLL, visitors_tmp), (EXHIBITORS_HLL, exhibitors_tmp)):
+        pipe.delete(key)
+        pipe.pfmerge(key, tmp, _side(key))
+        pipe.delete(tmp, _side(key))
+    pipe.hset(DASHBOARD_KEY, mapping={
+        **counts,
+        "visitors_base": visitors_base,
+        "exhibitors_base": exhibitors_base,
+        "reconciled_at": timezone.now().isoformat(),
+    })
+    # Cleared at the swap, not before the read: a removal that commits while
+    # the users are being read is already missing from the exact count and
+    # must not be subtracted again. One that commits after its user was read
+    # is lost until the next reconcile (an overcount of at most a few users).
+    pipe.delete(VISITORS_REMOVED, EXHIBITORS_REMOVED)
+    pipe.delete(REBUILDING_KEY)
+    pipe.execute()
+    return counts
+
+
+def _queue_reconcile():
+    from exhibitions.utils.tasks import reconcile_dashboard_stats
+
+    try:
+        if get_redis().set(RECONCILE_QUEUED_KEY, 1, nx=True, ex=300):
+            reconcile_dashboard_stats.delay()
+    except RedisError as exc:
+        logger.warning("Could not queue a dashboard reconcile: %s", exc)
+
+
+def dashboard_stats():
+    """The dashboard figures from the rollups, or from the database if they are unavailable."""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hmget(
+            DASHBOARD_KEY, "events_total", "events_active", "reconciled_at",
+            "total_visitors", "visitors_base", "total_exhibitors", "exhibitors_base",
+        )
+        pipe.pfcount(VISITORS_HLL)
+        pipe.pfcount(EXHIBITORS_HLL)
+        pipe.scard(VISITORS_REMOVED)
+        pipe.scard(EXHIBITORS_REMOVED)
+        (
+            (events_total, events_active, reconciled_at,
+             total_visitors, visitors_base, total_exhibitors, exhibitors_base),
+            visitors, exhibitors, visitors_removed, exhibitors_removed,
+        ) = pipe.execute()
+    except RedisError as exc:
+        logger.warning("Dashboard rollups unavailable (%s); counting in the database.", exc)
+        return _exact_counts()
+
+    if reconciled_at is None or total_visitors is None or total_exhibitors is None:
+        # Never reconciled (new deployment or Redis flushed): build the rollups once.
+        _queue_reconcile()
+        return _exact_counts()
+
+    def figure(exact, base, estimate, removed):
+        return max(0, int(exact) + max(0, estimate - int(base or 0)) - removed)
+
+    return {
+        "events_total": int(events_total or 0),
+        "events_active": int(events_active or 0),
+        "total_visitors": figure(total_visitors, visitors_base, visitors, visitors_removed),
+        "total_exhibitors": figure(total_exhibitors, exhibitors_base, exhibitors, exhibitors_removed),
+    }
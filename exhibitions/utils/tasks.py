@@ -1,11 +1,18 @@
 from celery import shared_task
-from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-from django.template.loader import render_to_string
 from email.mime.image import MIMEImage
 import os
+import smtplib
 from django.utils import timezone
 from datetime import date
+from accounts.smtp_pool import is_connection_error, send_each, send_messages
+from accounts.mail_throttle import MailThrottled, is_deferral
+from accounts.suppression import filter_suppressed, suppress
+from redis.exceptions import RedisError
+from backend.redis_client import get_redis
+from exhibitions.utils.stats import refresh_event_counts
+from exhibitions.utils.email_render import render_personalised, logo_part
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,10 +25,12 @@ logger = logging.getLogger(__name__)
 def _build_event_invitation_messages(subject, exhibition_data, recipients):
     """
     Build a list of EmailMultiAlternatives objects for event invitations.
-    Rendering is done once; one Message object per recipient is created
-    so the To: field is personalised, but all share the same connection.
+    The HTML comes from the per-process render cache (rendered once per
+    exhibition version, shared by every batch of the campaign); one Message
+    object per recipient is created so the To: field is personalised, but all
+    share the same connection and the same pre-encoded logo part.
     """
-    html_content = render_to_string('emails/event_invitation.html', {
+    html_content = render_personalised('emails/event_invitation.html', {
         'exhibition_name': exhibition_data.get('name'),
         'start_date': exhibition_data.get('start_date'),
         'end_date': exhibition_data.get('end_date'),
@@ -30,13 +39,7 @@ def _build_event_invitation_messages(subject, exhibition_data, recipients):
         'state': exhibition_data.get('state'),
         'country': exhibition_data.get('country'),
     })
-
-    # Pre-load logo once (shared across all messages)
-    logo_path = os.path.join(settings.STATIC_ROOT, 'emails', 'logo.png')
-    logo_bytes = None
-    if os.path.exists(logo_path):
-        with open(logo_path, 'rb') as f:
-            logo_bytes = f.read()
+    logo_img = logo_part()
 
     messages = []
     for email in recipients:
@@ -48,10 +51,7 @@ def _build_event_invitation_messages(subject, exhibition_data, recipients):
         )
         msg.attach_alternative(html_content, "text/html")
 
-        if logo_bytes:
-            logo_img = MIMEImage(logo_bytes)
-            logo_img.add_header('Content-ID', '<logo>')
-            logo_img.add_header('Content-Disposition', 'inline', filename='logo.png')
+        if logo_img:
             msg.attach(logo_img)
 
         messages.append(msg)
@@ -59,51 +59,166 @@ def _build_event_invitation_messages(subject, exhibition_data, recipients):
     return messages
 
 
+CAMPAIGN_MAX_RETRIES = 30
+CAMPAIGN_PROGRESS_TTL = 2 * 24 * 3600  # seconds
+
+
 @shared_task(
     bind=True,
     autoretry_for=(Exception,),
-    retry_kwargs={"max_retries": 3, "countdown": 10}
+    retry_backoff=10,
+    retry_backoff_max=600,
+    max_retries=CAMPAIGN_MAX_RETRIES,
 )
 def send_event_email(self, subject, exhibition_data, recipients):
     """
-    Send HTML event-invitation emails to all recipients using a single
-    SMTP connection (chunked in batches of 50).
+    Send HTML event-invitation emails to all recipients over the worker's
+    pooled SMTP connection (chunked in batches of 50).
 
     Before: 100 emails = 100 separate SMTP connect/auth/send/disconnect cycles.
-    After : 100 emails = 2 batches of 50 over ONE persistent connection.
+    After : 100 emails = 2 batches of 50 over ONE persistent connection, which
+    stays open for the next task.
+
+    Sends are paced by the shared provider token bucket. Addresses already
+    handled are recorded in Redis under the task id (kept across Celery
+    retries), so when the bucket runs dry or the provider answers 4xx the task
+    reschedules itself and resumes where it stopped instead of re-sending the
+    whole list.
+
+    If Redis is unavailable the batch is sent without resume tracking (a
+    retry would then re-send it) rather than not at all.
+
+    Suppressed addresses (bounces, complaints, unsubscribes) are dropped before
+    any message is built; recipients the server rejects outright are added to
+    the suppression list.
     """
     if not recipients:
         return "No recipients — skipping."
 
+    recipients = filter_suppressed(recipients)
+
+    done_key = f"mail:campaign:{self.request.id}:done" if self.request.id else None
+    if done_key and recipients:
+        try:
+            redis = get_redis()
+            already_done = redis.smismember(done_key, recipients)
+        except RedisError:
+            logger.warning(
+                "send_event_email: Redis unavailable, sending without resume tracking.", exc_info=True,
+            )
+            done_key = None
+        else:
+            recipients = [email for email, done in zip(recipients, already_done) if not done]
+
     messages = _build_event_invitation_messages(subject, exhibition_data, recipients)
 
     BATCH_SIZE = 50
     sent_total = 0
-
-    connection = get_connection(backend=settings.EMAIL_BACKEND)
-    try:
-        connection.open()
-        for i in range(0, len(messages), BATCH_SIZE):
-            batch = messages[i:i + BATCH_SIZE]
-            sent_total += connection.send_messages(batch)
-    finally:
-        connection.close()
+    throttled_for = None   # rate limiter: resume when tokens are back
+    deferred_for = None    # 4xx / server unreachable: back off and retry
+
+    for i in range(0, len(messages), BATCH_SIZE):
+        batch = messages[i:i + BATCH_SIZE]
+        handled, bounced = [], []
+        for msg, error in zip(batch, send_each(batch)):
+            if error is None:
+                sent_total += 1
+                handled.append(msg.to[0])
+            elif isinstance(error, MailThrottled):
+                throttled_for = max(throttled_for or 0, error.retry_after)
+            elif is_deferral(error) or is_connection_error(error):
+                deferred_for = min(60 * 2 ** self.request.retries, 900)
+            else:
+                # Permanent refusal (5xx) for this address; do not retry it
+                logger.warning("send_event_email: %s refused: %s", msg.to[0], error)
+                handled.append(msg.to[0])
+                if isinstance(error, smtplib.SMTPRecipientsRefused):
+                    bounced.append(msg.to[0])
+
+        if bounced:
+            suppress(bounced, reason="HARD_BOUNCE", source="smtp")
+        if done_key and handled:
+            try:
+                pipe = redis.pipeline()
+                pipe.sadd(done_key, *handled)
+                pipe.expire(done_key, CAMPAIGN_PROGRESS_TTL)
+                pipe.execute()
+            except RedisError:
+                logger.warning("send_event_email: Redis unavailable, resume tracking stopped.", exc_info=True)
+                done_key = None
+        if throttled_for is not None or deferred_for is not None:
+            break
+
+    remaining = len(messages) - sent_total
+    if deferred_for is not None:
+        logger.info(
+            "send_event_email: sent %d, %d deferred; retrying in %ds.",
+            sent_total, remaining, deferred_for,
+        )
+        raise self.retry(countdown=deferred_for)
+    if throttled_for is not None:
+        # Pacing is not a failure: requeue under the same id (so the progress set
+        # still applies) without spending the retry budget.
+        logger.info(
+            "send_event_email: sent %d, %d remaining; resuming in %ds.",
+            sent_total, remaining, throttled_for,
+        )
+        self.apply_async(
+            args=(subject, exhibition_data, recipients),
+            task_id=self.request.id,
+            countdown=throttled_for,
+            retries=self.request.retries,
+        )
+        return f"Sent {sent_total} of {len(messages)} emails; rescheduled the rest."
 
     logger.info("send_event_email: sent %d/%d invitation(s).", sent_total, len(messages))
     return f"Sent {sent_total} of {len(messages)} emails."
 
 
-# ---------------------------------------------------------------------------
-# Exhibitor approval email (unchanged logic, kept as-is)
-# ---------------------------------------------------------------------------
+INVITATION_CHUNK_SIZE = 500
+
 
 @shared_task(
     bind=True,
     autoretry_for=(Exception,),
-    retry_kwargs={"max_retries": 3, "countdown": 10},
+    retry_kwargs={"max_retries": 3, "countdown": 10}
 )
-def send_exhibitor_approval_email(
-    self,
+def fan_out_event_invitations(self, subject, exhibition_data, audience, exhibition_id=None):
+    """
+    Resolve the campaign audience (see exhibitions/utils/audience.py) and
+    queue one ``send_event_email`` per chunk of recipients. Recipients are
+    streamed from the database in id order, never loaded all at once.
+    """
+    from exhibitions.utils.audience import iter_audience_emails
+
+    chunks = total = 0
+    for emails in iter_audience_emails(
+        audience,
+        chunk_size=INVITATION_CHUNK_SIZE,
+        city=exhibition_data.get("city", ""),
+        country=exhibition_data.get("country", ""),
+        exclude_exhibition_id=exhibition_id,
+    ):
+        # Deterministic chunk ids: if this task is retried, re-queued chunks share
+        # the progress set of the first attempt and nobody is mailed twice.
+        send_event_email.apply_async(
+            args=(subject, exhibition_data, emails),
+            task_id=f"{self.request.id}-{chunks}" if self.request.id else None,
+        )
+        chunks += 1
+        total += len(emails)
+
+    logger.info(
+        "fan_out_event_invitations: queued %d recipient(s) in %d chunk(s).", total, chunks,
+    )
+    return f"Queued {total} recipients in {chunks} chunks."
+
+
+# ---------------------------------------------------------------------------
+# Exhibitor approval email
+# ---------------------------------------------------------------------------
+
+def build_exhibitor_approval_message(
     email,
     exhibitor_name,
     exhibition_name,
@@ -112,11 +227,11 @@ def send_exhibitor_approval_email(
 ):
     subject = f"Exhibitor Participation Confirmed – {exhibition_name}"
 
-    html_content = render_to_string('emails/exhibitor_approval.html', {
-        'exhibitor_name': exhibitor_name,
-        'exhibition_name': exhibition_name,
-        'booth_number': booth_number,
-    })
+    html_content = render_personalised(
+        'emails/exhibitor_approval.html',
+        {'exhibition_name': exhibition_name},
+        {'exhibitor_name': exhibitor_name, 'booth_number': booth_number},
+    )
 
     msg = EmailMultiAlternatives(
         subject=subject,
@@ -130,20 +245,37 @@ def send_exhibitor_approval_email(
     if badge_path and os.path.exists(badge_path):
         msg.attach_file(badge_path)
 
-    msg.send(fail_silently=False)
+    return msg
 
 
-# ---------------------------------------------------------------------------
-# Feature 2 — Visitor QR Code email
-# ---------------------------------------------------------------------------
-
 @shared_task(
     bind=True,
     autoretry_for=(Exception,),
     retry_kwargs={"max_retries": 3, "countdown": 10},
 )
-def send_visitor_qr_email(
+def send_exhibitor_approval_email(
     self,
+    email,
+    exhibitor_name,
+    exhibition_name,
+    booth_number,
+    badge_path=None,
+):
+    msg = build_exhibitor_approval_message(
+        email=email,
+        exhibitor_name=exhibitor_name,
+        exhibition_name=exhibition_name,
+        booth_number=booth_number,
+        badge_path=badge_path,
+    )
+    send_messages([msg])
+
+
+# ---------------------------------------------------------------------------
+# Feature 2 — Visitor QR Code email
+# ---------------------------------------------------------------------------
+
+def build_visitor_qr_message(
     email,
     visitor_name,
     exhibition_name,
@@ -154,30 +286,17 @@ def send_visitor_qr_email(
     qr_code_uuid,
 ):
     """
-    Generate a QR code image in-memory and send a registration confirmation
-    email to the visitor with the QR embedded inline.
+    Build the registration confirmation email for the visitor with the QR pass
+    image embedded inline.
     """
     subject = f"Your Entry Pass – {exhibition_name}"
 
-    # ---- Generate QR image in memory ----
+    # ---- Pass image: stored copy, rendered by the first build (reused on retries) ----
     qr_image_bytes = None
     try:
-        import qrcode
-        from io import BytesIO
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_code_uuid)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
+        from exhibitions.utils.qr_passes import get_pass_png
 
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        qr_image_bytes = buf.getvalue()
+        qr_image_bytes = get_pass_png(qr_code_uuid)
     except ImportError:
         logger.warning(
             "send_visitor_qr_email: 'qrcode' package not installed. "
@@ -185,16 +304,18 @@ def send_visitor_qr_email(
         )
 
     # ---- Render HTML template ----
-    html_content = render_to_string('emails/visitor_registration.html', {
-        'visitor_name': visitor_name,
-        'exhibition_name': exhibition_name,
-        'exhibition_venue': exhibition_venue,
-        'exhibition_city': exhibition_city,
-        'start_date': start_date,
-        'end_date': end_date,
-        'qr_code_uuid': qr_code_uuid,
-        'has_qr_image': qr_image_bytes is not None,
-    })
+    html_content = render_personalised(
+        'emails/visitor_registration.html',
+        {
+            'exhibition_name': exhibition_name,
+            'exhibition_venue': exhibition_venue,
+            'exhibition_city': exhibition_city,
+            'start_date': start_date,
+            'end_date': end_date,
+            'has_qr_image': qr_image_bytes is not None,
+        },
+        {'visitor_name': visitor_name, 'qr_code_uuid': qr_code_uuid},
+    )
 
     # ---- Build message ----
     msg = EmailMultiAlternatives(
@@ -218,10 +339,60 @@ def send_visitor_qr_email(
         qr_img.add_header('Content-Disposition', 'inline', filename='entry_pass.png')
         msg.attach(qr_img)
 
-    msg.send(fail_silently=False)
+    return msg
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_kwargs={"max_retries": 3, "countdown": 10},
+)
+def send_visitor_qr_email(
+    self,
+    email,
+    visitor_name,
+    exhibition_name,
+    exhibition_venue,
+    exhibition_city,
+    start_date,
+    end_date,
+    qr_code_uuid,
+):
+    msg = build_visitor_qr_message(
+        email=email,
+        visitor_name=visitor_name,
+        exhibition_name=exhibition_name,
+        exhibition_venue=exhibition_venue,
+        exhibition_city=exhibition_city,
+        start_date=start_date,
+        end_date=end_date,
+        qr_code_uuid=qr_code_uuid,
+    )
+    send_messages([msg])
     logger.info("send_visitor_qr_email: sent QR pass to %s for %s.", email, exhibition_name)
 
 
+# ---------------------------------------------------------------------------
+# Transactional email outbox dispatcher
+# ---------------------------------------------------------------------------
+
+@shared_task
+def dispatch_email_outbox():
+    """
+    Drain pending EmailOutbox rows in batches (run every few seconds by Celery
+    Beat). See exhibitions/utils/outbox.py.
+    """
+    from exhibitions.utils.outbox import drain_outbox
+
+    sent, failed, coalesced = drain_outbox()
+    if sent or failed or coalesced:
+        logger.info(
+            "dispatch_email_outbox: sent=%d failed=%d coalesced=%d",
+            sent, failed, coalesced,
+        )
+    return f"Sent {sent}, failed {failed}, coalesced {coalesced}."
+
+
 # ---------------------------------------------------------------------------
 # Periodic task — deactivate expired events (unchanged)
 # ---------------------------------------------------------------------------
@@ -233,6 +404,7 @@ def deactivate_expired_events():
     This task should be run periodically (e.g., daily) via Celery Beat.
     """
     from exhibitions.models import Exhibition
+    from exhibitions.signals import exhibition_changed
 
     today = date.today()
 
@@ -244,10 +416,78 @@ def deactivate_expired_events():
     count = expired_events.count()
 
     if count > 0:
-        event_names = list(expired_events.values_list('name', flat=True))
+        expired = list(expired_events.values_list('id', 'name'))
+        event_names = [name for _, name in expired]
         expired_events.update(is_active=False)
         logger.info(f"Deactivated {count} expired event(s): {', '.join(event_names)}")
+        try:
+            refresh_event_counts()  # update() sends no signals
+        except RedisError as exc:
+            logger.warning("Could not refresh dashboard event counts: %s", exc)
+        for exhibition_id, _ in expired:
+            exhibition_changed(exhibition_id)  # outside a transaction: runs immediately
         return f"Successfully deactivated {count} event(s)"
     else:
         logger.info("No expired events found to deactivate")
         return "No expired events to deactivate"
+
+
+# ---------------------------------------------------------------------------
+# Periodic task — reconcile dashboard rollups (exhibitions/utils/stats.py)
+# ---------------------------------------------------------------------------
+
+@shared_task
+def reconcile_dashboard_stats():
+    """Recompute the dashboard figures exactly and rebuild the unique-user sketches."""
+    from exhibitions.utils.stats import RECONCILE_QUEUED_KEY, reconcile
+
+    counts = reconcile()
+    get_redis().delete(RECONCILE_QUEUED_KEY)
+    logger.info("Reconciled dashboard stats: %s", counts)
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Periodic task — per-exhibition analytics rollups (exhibitions/utils/analytics.py)
+# ---------------------------------------------------------------------------
+
+@shared_task
+def update_exhibition_rollups():
+    """Recompute the analytics buckets touched since the last run."""
+    from exhibitions.utils.analytics import update_rollups
+
+    result = update_rollups()
+    if result["exhibitions"]:
+        logger.info("Updated exhibition rollups: %s", result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Background exports (exhibitions/utils/export_jobs.py)
+# ---------------------------------------------------------------------------
+
+@shared_task
+def run_export_job(job_id):
+    """Write one export artifact to storage, reporting progress on the job."""
+    from exhibitions.models import ExportJob
+    from exhibitions.utils.export_jobs import run_export
+
+    try:
+        run_export(job_id)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job_id)
+        ExportJob.objects.filter(pk=job_id).update(
+            status="FAILED", error=str(exc), finished_at=timezone.now(),
+        )
+        raise
+
+
+@shared_task
+def purge_expired_exports():
+    """Fail stale export jobs and remove artifacts past their TTL."""
+    from exhibitions.utils.export_jobs import purge_expired_exports as purge
+
+    deleted = purge()
+    if deleted:
+        logger.info("Purged %d expired export(s).", deleted)
+    return deleted
@@ -1,15 +1,16 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
 from .models import (
     ExhibitorProfile, Exhibition, ExhibitionImage, ExhibitorApplication,
     VisitorRegistration, Property, PropertyImage,
     EventRecap, RecapImage, RecapVideo, RecapSocialLink, ExhibitionPriceTier,
-    ExhibitionSchedule,
+    ExhibitionSchedule, ExportJob,
 )
 from rest_framework.parsers import MultiPartParser, FormParser
 from accounts.permissions import IsAdminUserRole, IsExhibitorWithProfile
+from accounts.throttling import IPRateThrottle, UserRateThrottle
 from .serializers import (
     ExhibitionSerializer, PropertySerializer,
     ExhibitorProfileSerializer, ExhibitorApplicationSerializer,
@@ -17,19 +18,65 @@ from .serializers import (
 )
 from rest_framework.permissions import AllowAny
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import reverse
 from rest_framework import status
-from exhibitions.utils.tasks import send_event_email, send_exhibitor_approval_email, send_visitor_qr_email
+from backend.caching import cached_view
+from exhibitions.signals import (
+    PUBLIC_EXHIBITION_CACHE, PUBLIC_EXHIBITIONS_CACHE, PUBLIC_EXHIBITORS_CACHE, exhibition_changed,
+    exhibitors_changed,
+)
+from exhibitions.utils.tasks import fan_out_event_invitations
+from exhibitions.utils.audience import AudienceError, check_location, count_audience, parse_audience
+from exhibitions.utils.outbox import enqueue_email
+from exhibitions.utils.stats import dashboard_stats
+from exhibitions.utils.analytics import exhibition_analytics
+from exhibitions.utils import (
+    application_decisions, export_jobs, exports, people_search, review_queue, stats,
+)
+from exhibitions.utils.exports import stream_csv
+from exhibitions.utils.qr_passes import PASS_FORMATS, read_pass_image, store_pass_images
 from accounts.models import User
 from exhibitions.utils.image_tasks import compress_model_image
 from django.utils import timezone
-from django.db.models import Case, When, Value, IntegerField, Q, Prefetch
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Case, F, When, Value, IntegerField, Q, Prefetch
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def enqueue_visitor_qr_email(user, exhibition, registration, resend=False):
+    """Queue the QR pass email for ``registration`` in the transactional outbox."""
+    enqueue_email(
+        kind="VISITOR_QR",
+        recipient=user.email,
+        payload={
+            "email": user.email,
+            "visitor_name": user.username,
+            "exhibition_name": exhibition.name,
+            "exhibition_venue": exhibition.venue,
+            "exhibition_city": exhibition.city,
+            "start_date": str(exhibition.start_date),
+            "end_date": str(exhibition.end_date),
+            "qr_code_uuid": str(registration.qr_code),
+        },
+        dedupe_key=f"visitor_qr:{registration.qr_code}",
+        resend=resend,
+    )
+
+
+def pass_image_url(request, qr_code, fmt="png"):
+    # Always the main URLconf: the ASGI read service (backend/async_urls.py)
+    # links to pass images but does not serve them.
+    return request.build_absolute_uri(
+        reverse("visitor-pass-image", urlconf="backend.urls", kwargs={"qr_code": qr_code, "fmt": fmt})
+    )
+
+
 class ExhibitorProfileView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -108,7 +155,7 @@ class ExhibitorProfileView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class ExhibitorProfileStatusView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -120,13 +167,19 @@ class ExhibitorProfileStatusView(APIView):
         })
 
 class AdminCreateExhibitionView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request):
         data = request.data.copy()
 
+        try:
+            audience = parse_audience(request.data.get("audience"))
+            check_location(audience, data.get("city"), data.get("country"))
+        except AudienceError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         import json
         schedules_raw = request.data.get("schedules")
         schedules_list = []
@@ -204,9 +257,6 @@ class AdminCreateExhibitionView(APIView):
             except (json.JSONDecodeError, TypeError):
                 pass
 
-        users = User.objects.filter(is_active=True).exclude(email="")
-        emails = list(users.values_list("email", flat=True))
-
         subject = f"Invitation: {exhibition.name} | {exhibition.city}"
         exhibition_data = {
             'name': exhibition.name,
@@ -218,16 +268,49 @@ class AdminCreateExhibitionView(APIView):
             'country': exhibition.country,
         }
 
-        if emails:
-            send_event_email.delay(subject, exhibition_data, emails)
+        fan_out_event_invitations.delay(subject, exhibition_data, audience, exhibition.id)
 
         return Response(
             ExhibitionSerializer(exhibition, context={'request': request}).data,
             status=201
         )
 
+class AdminAudienceCountView(APIView):
+    """
+    Dry run for campaign targeting: how many users an audience spec would
+    invite, without sending anything. Body: ``{"audience": {...}, "city": "...",
+    "country": "..."}`` or ``{"audience": {...}, "exhibition_id": 1}``.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def post(self, request):
+        try:
+            audience = parse_audience(request.data.get("audience"))
+        except AudienceError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        exhibition_id = request.data.get("exhibition_id")
+        if exhibition_id:
+            exhibition = get_object_or_404(Exhibition, id=exhibition_id)
+            city, country = exhibition.city, exhibition.country
+        else:
+            city = request.data.get("city", "")
+            country = request.data.get("country", "")
+
+        try:
+            check_location(audience, city, country)
+        except AudienceError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        count = count_audience(
+            audience, city=city, country=country, exclude_exhibition_id=exhibition_id,
+        )
+        return Response({"audience": audience, "count": count})
+
+
 class AdminListExhibitionsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def get(self, request):
@@ -301,7 +384,7 @@ class AdminListExhibitionsView(APIView):
         })
 
 class AdminUpdateExhibitionView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
     parser_classes = [MultiPartParser, FormParser]
 
@@ -432,17 +515,32 @@ class AdminUpdateExhibitionView(APIView):
         return Response(ExhibitionSerializer(exhibition, context={'request': request}).data)
 
 class AdminDeleteExhibitionView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def delete(self, request, pk):
-        Exhibition.objects.filter(pk=pk).delete()
+        with transaction.atomic():
+            # Registrations and applications are fast-deleted by the cascade,
+            # which sends no per-row signals: read who stops counting first.
+            visitors = list(
+                VisitorRegistration.objects.filter(exhibition_id=pk)
+                .values_list("user_id", flat=True).distinct()
+            )
+            exhibitors = list(
+                ExhibitorApplication.objects.filter(exhibition_id=pk, status="APPROVED")
+                .values_list("user_id", flat=True).distinct()
+            )
+            deleted, _ = Exhibition.objects.filter(pk=pk).delete()
+            if deleted:
+                stats.visitor_registrations_removed(visitors)
+                stats.exhibitor_approvals_removed(exhibitors)
+                exhibitors_changed(pk)
         return Response({"message": "Deleted"})
 
 
 class AdminEventRecapView(APIView):
     """GET / PUT the event recap for a past exhibition."""
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
     parser_classes = [MultiPartParser, FormParser]
 
@@ -523,7 +621,7 @@ class AdminEventRecapView(APIView):
         return Response(serializer.data)
 
 class ExhibitorApplyView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsExhibitorWithProfile]
     parser_classes = [MultiPartParser, FormParser]
 
@@ -569,7 +667,7 @@ class ExhibitorApplyView(APIView):
         return Response({"message": "Application submitted"})
 
 class AdminListExhibitorApplications(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def get(self, request, exhibition_id):
@@ -582,52 +680,131 @@ class AdminListExhibitorApplications(APIView):
         )
         return Response(serializer.data)
 
+class AdminApplicationReviewQueueView(APIView):
+    """Paginated, filterable application queue (exhibitions/utils/review_queue.py)."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request, exhibition_id):
+        status_filter = request.query_params.get('status', 'PENDING').upper()
+        if status_filter == 'ALL':
+            status_filter = None
+        elif status_filter not in dict(ExhibitorApplication.STATUS_CHOICES):
+            return Response({"error": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', review_queue.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "Invalid limit"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            payload = review_queue.review_page(
+                request,
+                exhibition_id,
+                status=status_filter,
+                search=request.query_params.get('search', '').strip(),
+                cursor=request.query_params.get('cursor') or None,
+                limit=limit,
+            )
+        except review_queue.InvalidCursor as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(payload)
+
 class AdminUpdateExhibitorApplication(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request, application_id):
-        action = request.data.get("action")
-        booth_number = request.data.get("booth_number")
+        app = get_object_or_404(ExhibitorApplication, id=application_id)
 
-        app = ExhibitorApplication.objects.get(id=application_id)
-        exhibition = app.exhibition
+        try:
+            decisions = application_decisions.parse_decisions([{
+                "application_id": app.id,
+                "action": request.data.get("action"),
+                "booth_number": request.data.get("booth_number"),
+            }])
+            with transaction.atomic():
+                action, _ = decisions[app.id]
+                badge = None
+                if action == "APPROVE" and "badge" in request.FILES:
+                    # Saved first so the approval email attaches it; the row is
+                    # rolled back with the decision if that is refused, the
+                    # stored file is removed below
+                    app.badge = request.FILES["badge"]
+                    app.save(update_fields=["badge"])
+                    badge = app.badge.name
+
+                # Same rules as the bulk endpoint: the application row is locked
+                # for the claim check, and booths only move on a status change
+                try:
+                    application_decisions.apply_decisions(app.exhibition_id, decisions, request.user)
+                except Exception:
+                    if badge:
+                        default_storage.delete(badge)
+                    raise
+        except application_decisions.ClaimedByOther:
+            return Response(
+                {"error": "Application is claimed by another reviewer"},
+                status=status.HTTP_409_CONFLICT
+            )
+        except application_decisions.NoBoothsLeft:
+            return Response(
+                {"error": "No booths left"},
+                status=400
+            )
+        except application_decisions.DecisionError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if action == "APPROVE":
-            if exhibition.available_booths <= 0:
-                return Response(
-                    {"error": "No booths left"},
-                    status=400
-                )
+        return Response({"message": "Updated"})
 
-            app.status = "APPROVED"
-            app.booth_number = booth_number
-            
-            if "badge" in request.FILES:
-                app.badge = request.FILES["badge"]
+class AdminClaimApplicationsView(APIView):
+    """Claim the next pending applications for review (exhibitions/utils/review_queue.py)."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
 
-            exhibition.available_booths -= 1
-            exhibition.save()
-            app.save()
+    def post(self, request, exhibition_id):
+        get_object_or_404(Exhibition, id=exhibition_id)
+        try:
+            count = int(request.data.get("count", 10))
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid count"}, status=status.HTTP_400_BAD_REQUEST)
 
-            send_exhibitor_approval_email.delay(
-                email=app.user.email,
-                exhibitor_name=app.user.username,
-                exhibition_name=exhibition.name,
-                booth_number=booth_number,
-                badge_path=app.badge.path if app.badge else None,
-            )
+        claimed = review_queue.claim_next(request, exhibition_id, request.user, count)
+        return Response({
+            "data": claimed,
+            "claim_ttl_seconds": int(review_queue.CLAIM_TTL.total_seconds()),
+        })
 
-        elif action == "REJECT":
-            app.status = "REJECTED"
-            app.save()
-            
-        return Response({"message": "Updated"})
+    def delete(self, request, exhibition_id):
+        ids = request.data.get("application_ids")
+        if ids is not None and not isinstance(ids, list):
+            return Response({"error": "application_ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        released = review_queue.release_claims(exhibition_id, request.user, ids)
+        return Response({"released": released})
+
+class AdminBulkApplicationDecisionView(APIView):
+    """Approve / reject many applications at once (exhibitions/utils/application_decisions.py)."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def post(self, request, exhibition_id):
+        get_object_or_404(Exhibition, id=exhibition_id)
+        try:
+            decisions = application_decisions.parse_decisions(request.data.get("decisions"))
+            result = application_decisions.apply_decisions(exhibition_id, decisions, request.user)
+        except (application_decisions.NoBoothsLeft, application_decisions.ClaimedByOther) as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        except application_decisions.DecisionError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
 
 class PublicExhibitionListView(APIView):
     permission_classes = []
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = "public"
 
+    @cached_view(PUBLIC_EXHIBITIONS_CACHE, ttl=60)
     def get(self, request):
         # Add pagination to prevent server memory exhaustion and hanging requests
         page = int(request.query_params.get('page', 1))
@@ -701,7 +878,7 @@ class PublicExhibitionListView(APIView):
         })
 
 class ExhibitorApplicationStatusView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -725,8 +902,16 @@ class ExhibitorApplicationStatusView(APIView):
         return Response(data)
 
 class VisitorRegisterView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle, IPRateThrottle]
+    throttle_scope = "visitor_register"
+
+    def get_throttles(self):
+        # Only registering is limited; the status check is polled by the app.
+        if self.request.method != "POST":
+            return []
+        return super().get_throttles()
 
     def get(self, request, exhibition_id):
         user = request.user
@@ -765,30 +950,29 @@ class VisitorRegisterView(APIView):
                 status=400
             )
 
-        registration = VisitorRegistration.objects.create(
-            user=user,
-            exhibition=exhibition
-        )
+        with transaction.atomic():
+            # Conditional decrement: concurrent signups cannot overbook, and no
+            # post_save throws away the cached public pages on every signup.
+            if not Exhibition.objects.filter(pk=exhibition.pk, available_visitors__gt=0).update(
+                available_visitors=F("available_visitors") - 1
+            ):
+                return Response(
+                    {"error": "Visitor capacity full"},
+                    status=400
+                )
 
-        exhibition.available_visitors -= 1
-        exhibition.save()
+            registration = VisitorRegistration.objects.create(
+                user=user,
+                exhibition=exhibition
+            )
 
-        # Send QR confirmation email to the visitor (async via Celery)
-        send_visitor_qr_email.delay(
-            email=user.email,
-            visitor_name=user.username,
-            exhibition_name=exhibition.name,
-            exhibition_venue=exhibition.venue,
-            exhibition_city=exhibition.city,
-            start_date=str(exhibition.start_date),
-            end_date=str(exhibition.end_date),
-            qr_code_uuid=str(registration.qr_code),
-        )
+            # QR confirmation email is queued in the outbox, committed with the registration
+            enqueue_visitor_qr_email(user, exhibition, registration)
 
         return Response({"message": "Registered successfully"})
 
 class VisitorQRListView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -799,13 +983,48 @@ class VisitorQRListView(APIView):
             data.append({
                 "exhibition": r.exhibition.name,
                 "qr_code": str(r.qr_code),
+                "qr_image_url": pass_image_url(request, r.qr_code),
                 "is_checked_in": r.is_checked_in,
             })
 
         return Response(data)
 
+
+class VisitorPassImageView(APIView):
+    """
+    Pre-rendered QR pass image for one of the caller's registrations.
+
+    GET /exhibitions/visitor/my-qr/<qr_code>/pass.png  (or pass.svg)
+
+    The image for a QR code never changes, so it is served with a year-long
+    immutable (private) cache lifetime and its content hash as the ETag.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, qr_code, fmt):
+        if fmt not in PASS_FORMATS:
+            return Response({"error": "Unsupported format"}, status=status.HTTP_404_NOT_FOUND)
+
+        regs = VisitorRegistration.objects.all()
+        if request.user.active_role != "ADMIN":
+            regs = regs.filter(user=request.user)
+        registration = get_object_or_404(regs, qr_code=qr_code)
+
+        etag = f'"{store_pass_images(registration)}.{fmt}"'
+        if request.META.get("HTTP_IF_NONE_MATCH") == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                read_pass_image(registration, fmt),
+                content_type=PASS_FORMATS[fmt],
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
+        return response
+
 class AdminQRScanView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def post(self, request):
@@ -835,7 +1054,7 @@ class AdminQRScanView(APIView):
         })
 
 class ExhibitorCreatePropertyView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsExhibitorWithProfile]
     parser_classes = [MultiPartParser, FormParser]
 
@@ -882,7 +1101,7 @@ class ExhibitorCreatePropertyView(APIView):
         )
 
 class ExhibitorMyPropertiesView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsExhibitorWithProfile]
 
     def get(self, request):
@@ -890,7 +1109,7 @@ class ExhibitorMyPropertiesView(APIView):
         return Response(PropertySerializer(props, many=True, context={'request': request}).data)
 
 class ExhibitorDeletePropertyView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsExhibitorWithProfile]
 
     def delete(self, request, property_id):
@@ -903,7 +1122,7 @@ class ExhibitorDeletePropertyView(APIView):
         return Response({"message": "Deleted"})
     
 class ExhibitorEditPropertyView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsExhibitorWithProfile]
 
     def patch(self, request, property_id):
@@ -944,6 +1163,8 @@ class ExhibitorEditPropertyView(APIView):
 
 class PublicExhibitionPropertiesView(APIView):
     permission_classes = []
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = "public"
 
     def get(self, request, exhibitor_id):
         props = Property.objects.filter(exhibitor_id=exhibitor_id).prefetch_related("images").order_by("-created_at")
@@ -951,7 +1172,10 @@ class PublicExhibitionPropertiesView(APIView):
 
 class PublicExhibitionDetailView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = "public"
 
+    @cached_view(PUBLIC_EXHIBITION_CACHE, ttl=300)
     def get(self, request, id):
         # Apply prefetch_related for images to avoid individual query evaluation limits
         # and ensure only active events are fetchable publicly.
@@ -962,7 +1186,10 @@ class PublicExhibitionDetailView(APIView):
 
 class PublicExhibitorsByExhibitionView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = "public"
 
+    @cached_view(PUBLIC_EXHIBITORS_CACHE, ttl=300)
     def get(self, request, id):
         applications = (
             ExhibitorApplication.objects
@@ -1001,27 +1228,152 @@ class PublicExhibitorsByExhibitionView(APIView):
         return Response(ExhibitorProfileSerializer(profile).data)
 
 class AdminDashboardStatsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def get(self, request):
-        total_events = Exhibition.objects.count()
-        active_events = Exhibition.objects.filter(is_active=True).count()
-
-        unique_visitors = VisitorRegistration.objects.values('user').distinct().count()
-        unique_exhibitors = ExhibitorApplication.objects.filter(status='APPROVED').values('user').distinct().count()
+        # Read from the Redis rollups, not COUNT(DISTINCT) over the big tables
+        stats = dashboard_stats()
 
         return Response({
-            "total_events": total_events,
-            "active_events": active_events,
-            "total_visitors": unique_visitors,
-            "total_exhibitors": unique_exhibitors
+            "total_events": stats["events_total"],
+            "active_events": stats["events_active"],
+            "total_visitors": stats["total_visitors"],
+            "total_exhibitors": stats["total_exhibitors"]
         })
 
+
+class AdminExhibitionAnalyticsView(APIView):
+    """Registrations per day, check-in rate, business-type mix and booth fill-rate, from the rollups."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request, exhibition_id):
+        exhibition = get_object_or_404(Exhibition, id=exhibition_id)
+        return Response(exhibition_analytics(exhibition))
+
+
+def _export_job_data(request, job):
+    data = {
+        "job_id": str(job.pk),
+        "exhibition_id": job.exhibition_id,
+        "kind": job.kind,
+        "format": job.format,
+        "status": job.status,
+        "rows_done": job.rows_done,
+        "rows_total": job.rows_total,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+    if job.status == "DONE":
+        data["size"] = job.size
+        data["download_url"] = request.build_absolute_uri(
+            reverse("export-download", args=[export_jobs.download_token(job)])
+        )
+        data["download_expires_in"] = export_jobs.EXPORT_LINK_MAX_AGE
+    elif job.status == "FAILED":
+        data["error"] = "Export failed"
+    return data
+
+
+class AdminExportJobCreateView(APIView):
+    """Queue a background export, or reuse one for an unchanged dataset."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def post(self, request):
+        exhibition = get_object_or_404(Exhibition, id=request.data.get("exhibition_id"))
+        kind = request.data.get("kind")
+        fmt = (request.data.get("format") or "csv").lower()
+
+        try:
+            job, created = export_jobs.request_export(exhibition, kind, fmt, request.user)
+        except export_jobs.ExportUnavailable as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            dict(_export_job_data(request, job), reused=not created),
+            status=status.HTTP_200_OK if job.status == "DONE" else status.HTTP_202_ACCEPTED,
+        )
+
+
+class AdminExportJobView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(ExportJob, pk=job_id)
+        return Response(_export_job_data(request, job))
+
+
+class ExportDownloadView(APIView):
+    """Serve a finished export. The signed, expiring token is the credential."""
+    permission_classes = []
+
+    def get(self, request, token):
+        from django.core.files.storage import default_storage
+        from django.http import FileResponse
+
+        job = export_jobs.job_for_token(token)
+        if job is None:
+            return Response(
+                {"error": "Download link is invalid or has expired"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            f = default_storage.open(job.file, "rb")
+        except FileNotFoundError:
+            return Response(
+                {"error": "Export is no longer available"},
+                status=status.HTTP_410_GONE
+            )
+        return FileResponse(
+            f,
+            as_attachment=True,
+            filename=job.file.rsplit("/", 1)[-1],
+            content_type=export_jobs.CONTENT_TYPES[job.format],
+        )
+
+
+class AdminMailMetricsView(APIView):
+    """Outbound mail health: rate-limit bucket, send counters and queue depths."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request):
+        from redis.exceptions import RedisError
+        from accounts.mail_throttle import mail_metrics
+        from .models import EmailOutbox
+
+        try:
+            metrics = mail_metrics()
+        except RedisError as exc:
+            logger.warning("Mail metrics unavailable: %s", exc)
+            metrics = {"error": "Redis unavailable"}
+
+        metrics["outbox_pending"] = EmailOutbox.objects.filter(status="PENDING").count()
+        metrics["outbox_failed"] = EmailOutbox.objects.filter(status="FAILED").count()
+        return Response(metrics)
+
+class AdminCacheMetricsView(APIView):
+    """Response cache lookups per tier (L1 / Redis / miss) and hit ratios."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request):
+        from redis.exceptions import RedisError
+        from backend.caching import cache_metrics
+
+        try:
+            return Response(cache_metrics())
+        except RedisError as exc:
+            logger.warning("Cache metrics unavailable: %s", exc)
+            return Response({"error": "Redis unavailable"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
 from django.db.models import Q
 
 class AdminEventVisitorsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def get(self, request, exhibition_id):
@@ -1033,36 +1385,17 @@ class AdminEventVisitorsView(APIView):
         regs = VisitorRegistration.objects.filter(exhibition_id=exhibition_id).select_related('user')
 
         if query:
-            regs = regs.filter(
-                Q(user__username__icontains=query) |
-                Q(user__email__icontains=query)
-            )
+            regs = regs.filter(people_search.search_filter(query))
 
         if download:
-            import csv
-            from django.http import HttpResponse
-            import re
-            
-            exhibition = Exhibition.objects.get(id=exhibition_id)
-            safe_name = re.sub(r'[^a-zA-Z0-9_\-]', '_', exhibition.name)
-            
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="visitors-{safe_name}.csv"'
-            
-            writer = csv.writer(response)
-            writer.writerow(['ID', 'Visitor Name', 'Email', 'Registered At', 'Checked In', 'QR Code'])
-            
-            for r in regs:
-                reg_at = r.registered_at.strftime('%Y-%m-%d %H:%M:%S') if hasattr(r, 'registered_at') and r.registered_at else 'N/A'
-                writer.writerow([
-                    r.id,
-                    r.user.username,
-                    r.user.email,
-                    reg_at,
-                    'Yes' if r.is_checked_in else 'No',
-                    str(r.qr_code)
-                ])
-            return response
+            # Streamed in chunks (exhibitions/utils/exports.py): constant memory per export
+            exhibition = get_object_or_404(Exhibition, id=exhibition_id)
+            return stream_csv(
+                exports.VISITORS,
+                exports.visitors_queryset(exhibition_id, query),
+                f"visitors-{exports.safe_filename(exhibition.name)}",
+                gzip=request.query_params.get('gzip', '').lower() == 'true',
+            )
 
         total = regs.count()
         start = (page - 1) * page_size
@@ -1087,8 +1420,36 @@ class AdminEventVisitorsView(APIView):
             "limit": page_size
         })
 
+def _people_search_response(request, exhibition_id, search):
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = int(request.query_params.get('limit', people_search.DEFAULT_RESULTS))
+    except ValueError:
+        return Response({"error": "Invalid limit"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not query:
+        return Response({"query": query, "results": [], "has_more": False})
+    results, has_more = search(exhibition_id, query, limit)
+    return Response({"query": query, "results": results, "has_more": has_more})
+
+class AdminEventVisitorSearchView(APIView):
+    """Search-as-you-type over an exhibition's visitors (exhibitions/utils/people_search.py)."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request, exhibition_id):
+        return _people_search_response(request, exhibition_id, people_search.search_visitors)
+
+class AdminEventExhibitorSearchView(APIView):
+    """Search-as-you-type over an exhibition's approved exhibitors."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request, exhibition_id):
+        return _people_search_response(request, exhibition_id, people_search.search_exhibitors)
+
 class AdminEventExhibitorsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def get(self, request, exhibition_id):
@@ -1103,38 +1464,17 @@ class AdminEventExhibitorsView(APIView):
         ).select_related('user', 'user__exhibitorprofile')
 
         if query:
-            apps = apps.filter(
-                Q(user__username__icontains=query) |
-                Q(user__email__icontains=query) |
-                Q(user__exhibitorprofile__company_name__icontains=query)
-            )
+            apps = apps.filter(people_search.search_filter(query, company=True))
 
         if download:
-            import csv
-            from django.http import HttpResponse
-            import re
-            
-            exhibition = Exhibition.objects.get(id=exhibition_id)
-            safe_name = re.sub(r'[^a-zA-Z0-9_\-]', '_', exhibition.name)
-            
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="exhibitors-{safe_name}.csv"'
-            
-            writer = csv.writer(response)
-            writer.writerow(['ID', 'Company Name', 'Email', 'Booth Number', 'Contact Number', 'Business Type', 'Council Area'])
-            
-            for app in apps:
-                profile = getattr(app.user, 'exhibitorprofile', None)
-                writer.writerow([
-                    app.id,
-                    profile.company_name if profile else app.user.username,
-                    app.user.email,
-                    app.booth_number or 'N/A',
-                    profile.contact_number if profile else 'N/A',
-                    profile.business_type if profile else 'N/A',
-                    profile.council_area if profile else 'N/A'
-                ])
-            return response
+            # Streamed in chunks (exhibitions/utils/exports.py): constant memory per export
+            exhibition = get_object_or_404(Exhibition, id=exhibition_id)
+            return stream_csv(
+                exports.EXHIBITORS,
+                exports.exhibitors_queryset(exhibition_id, query),
+                f"exhibitors-{exports.safe_filename(exhibition.name)}",
+                gzip=request.query_params.get('gzip', '').lower() == 'true',
+            )
 
         total = apps.count()
         start = (page - 1) * page_size
@@ -1163,7 +1503,7 @@ class AdminEventExhibitorsView(APIView):
         })
 
 class VisitorMyRegistrationsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -1182,13 +1522,14 @@ class VisitorMyRegistrationsView(APIView):
                 "venue": r.exhibition.venue,
                 "is_active": r.exhibition.is_active,
                 "qr_code": str(r.qr_code),
+                "qr_image_url": pass_image_url(request, r.qr_code),
                 "is_checked_in": r.is_checked_in,
             })
 
         return Response(data)
 
 class AdminToggleVisitorCheckInView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def post(self, request, visitor_id):
@@ -1198,6 +1539,19 @@ class AdminToggleVisitorCheckInView(APIView):
         return Response({"id": reg.id, "is_checked_in": reg.is_checked_in})
 
 
+class AdminResendVisitorPassView(APIView):
+    """Email a visitor their pass again, even if it was already delivered."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUserRole]
+
+    def post(self, request, visitor_id):
+        reg = get_object_or_404(
+            VisitorRegistration.objects.select_related("user", "exhibition"), id=visitor_id
+        )
+        enqueue_visitor_qr_email(reg.user, reg.exhibition, reg, resend=True)
+        return Response({"id": reg.id, "queued": True}, status=status.HTTP_202_ACCEPTED)
+
+
 class AdminCheckExhibitorView(APIView):
     """
     Lookup endpoint for the admin 'Add Exhibitor' multi-step modal.
@@ -1206,7 +1560,7 @@ class AdminCheckExhibitorView(APIView):
 
     GET /exhibitions/admin/exhibitions/<id>/check-exhibitor/?email=...
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def get(self, request, exhibition_id):
@@ -1253,7 +1607,7 @@ class AdminAddExhibitorView(APIView):
     If the user already exists their account is reused. If an ExhibitorProfile
     already exists it is kept; otherwise one is created from the submitted data.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
     parser_classes = [MultiPartParser, FormParser]
 
@@ -1277,7 +1631,8 @@ class AdminAddExhibitorView(APIView):
         except Exhibition.DoesNotExist:
             return Response({"error": "Exhibition not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # --- Check booth availability ---
+        # --- Check booth availability (cheap early exit; the booth is taken
+        # with a conditional UPDATE below) ---
         if exhibition.available_booths <= 0:
             return Response({"error": "No booths available for this event"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1330,33 +1685,45 @@ class AdminAddExhibitorView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # --- Create auto-approved application ---
-        app = ExhibitorApplication.objects.create(
-            user=user,
-            exhibition=exhibition,
-            status="APPROVED",
-            booth_number=booth_number,
-            payment_screenshot=None,
-        )
-
-        # Attach badge if provided
-        if badge_file:
-            app.badge = badge_file
-            app.save()
-
-        # --- Decrement available booths ---
-        exhibition.available_booths -= 1
-        exhibition.save()
-
-        # --- Send approval email (async via Celery) ---
-        send_exhibitor_approval_email.delay(
-            email=user.email,
-            exhibitor_name=profile.company_name,
-            exhibition_name=exhibition.name,
-            booth_number=booth_number,
-            badge_path=app.badge.path if app.badge else None,
-        )
+        with transaction.atomic():
+            # --- Take a booth: only if one is still left, and without writing
+            # the rest of the (possibly stale) exhibition row ---
+            taken = Exhibition.objects.filter(pk=exhibition.pk, available_booths__gt=0).update(
+                available_booths=F("available_booths") - 1
+            )
+            if not taken:
+                return Response({"error": "No booths available for this event"}, status=status.HTTP_400_BAD_REQUEST)
+            # update() sends no post_save
+            exhibition_changed(exhibition.pk)
+
+            # --- Create auto-approved application ---
+            app = ExhibitorApplication.objects.create(
+                user=user,
+                exhibition=exhibition,
+                status="APPROVED",
+                booth_number=booth_number,
+                payment_screenshot=None,
+            )
 
+            # Attach badge if provided (only once the booth is taken, so a
+            # refused request leaves no file behind)
+            if badge_file:
+                app.badge = badge_file
+                app.save(update_fields=["badge"])
+
+            # --- Queue approval email (outbox, committed with the application) ---
+            enqueue_email(
+                kind="EXHIBITOR_APPROVAL",
+                recipient=user.email,
+                payload={
+                    "email": user.email,
+                    "exhibitor_name": profile.company_name,
+                    "exhibition_name": exhibition.name,
+                    "booth_number": booth_number,
+                    "badge_path": app.badge.path if app.badge else None,
+                },
+                dedupe_key=f"exhibitor_approval:{app.id}:{booth_number}",
+            )
 
         return Response({
             "message": "Exhibitor added and approved successfully",
@@ -1374,7 +1741,7 @@ class AdminAddVisitorView(APIView):
     appended. A VisitorRegistration is created and the standard QR pass email
     is dispatched.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUserRole]
 
     def post(self, request, exhibition_id):
@@ -1413,27 +1780,24 @@ class AdminAddVisitorView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # --- Create registration ---
-        registration = VisitorRegistration.objects.create(
-            user=user,
-            exhibition=exhibition
-        )
+        with transaction.atomic():
+            # --- Decrement available visitors (conditional update, no post_save) ---
+            if not Exhibition.objects.filter(pk=exhibition.pk, available_visitors__gt=0).update(
+                available_visitors=F("available_visitors") - 1
+            ):
+                return Response(
+                    {"error": "Visitor capacity is full for this event"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        # --- Decrement available visitors ---
-        exhibition.available_visitors -= 1
-        exhibition.save()
+            # --- Create registration ---
+            registration = VisitorRegistration.objects.create(
+                user=user,
+                exhibition=exhibition
+            )
 
-        # --- Send QR pass email (async via Celery) ---
-        send_visitor_qr_email.delay(
-            email=user.email,
-            visitor_name=user.username,
-            exhibition_name=exhibition.name,
-            exhibition_venue=exhibition.venue,
-            exhibition_city=exhibition.city,
-            start_date=str(exhibition.start_date),
-            end_date=str(exhibition.end_date),
-            qr_code_uuid=str(registration.qr_code),
-        )
+            # --- Queue QR pass email (outbox, committed with the registration) ---
+            enqueue_visitor_qr_email(user, exhibition, registration)
 
         return Response({
             "message": "Visitor registered successfully",